@@ -0,0 +1,175 @@
+from lazy_unreal import unreal
+from collections import OrderedDict
+from typing import Iterable, Optional, Set
+
+
+class AssetResolver:
+    """Resolves object paths to loaded assets through a bounded LRU cache.
+
+    Applying presets to many instances resolves the same handful of layer, blend and texture assets over and
+    over. The resolver keeps recently used assets keyed by path, and `preload` loads every uncached path in a
+    single native pass so package loads overlap instead of running one after another.
+
+    Failed loads are not cached: a path that does not resolve yet, e.g. an asset a later step creates, is
+    loaded again the next time it is asked for.
+
+    Attributes:
+        max_size (int): Maximum number of paths kept in the cache
+        hits (int): Number of `resolve` calls answered from the cache
+        misses (int): Number of paths that had to be loaded, by `resolve` or `preload`
+        evictions (int): Number of paths dropped from the cache to respect max_size
+
+    Example:
+        >>> resolver = AssetResolver(max_size=512)
+        >>> resolver.preload(['/Game/Layers/ML_Rust', '/Game/Layers/MLB_Height'])
+        >>> layer = resolver.resolve('/Game/Layers/ML_Rust')  # Cache hit, no load
+    """
+
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._cache = OrderedDict()
+
+    def resolve(self, path: str) -> Optional['unreal.Object']:
+        """Get the asset at path, loading it on a cache miss.
+
+        Args:
+            path (str): Package or object path of the asset
+
+        Returns:
+            Optional[unreal.Object]: The asset, or None if it could not be loaded
+        """
+        cache = self._cache
+        if path in cache:
+            cache.move_to_end(path)
+            self.hits += 1
+            return cache[path]
+
+        self.misses += 1
+        asset = unreal.load_object(None, path)
+        if asset is not None:
+            self._store(path, asset)
+        return asset
+
+    def preload(self, paths: Iterable[str]) -> int:
+        """Load every uncached path in a single bulk pass.
+
+        Args:
+            paths (Iterable[str]): Package or object paths to load. Duplicates and cached paths are skipped.
+
+        Returns:
+            int: Number of paths that were loaded
+        """
+        missing = []
+        seen = set()
+        for path in paths:
+            if path and path not in self._cache and path not in seen:
+                seen.add(path)
+                missing.append(path)
+
+        if not missing:
+            return 0
+
+        # Only the most recent max_size paths would survive in the cache anyway
+        missing = missing[-self.max_size:]
+        assets = unreal.LayeredMaterialLibrary.load_objects_by_path(missing)
+        for path, asset in zip(missing, assets):
+            if asset is not None:
+                self._store(path, asset)
+        self.misses += len(missing)
+        return len(missing)
+
+    def preload_material_dicts(self, material_dicts: Iterable[dict], textures: bool = True) -> int:
+        """Collect every asset path referenced by a batch of material dictionaries and preload them.
+
+        Args:
+            material_dicts (Iterable[dict]): Material dictionaries, as returned by get_full_material_as_dict
+            textures (bool): Whether texture paths are preloaded too. Diff applies only load the textures that
+                change, so preloading them all can load far more than is needed.
+
+        Returns:
+            int: Number of paths that were loaded
+        """
+        paths = set()
+        for material_data in material_dicts:
+            paths |= collect_asset_paths(material_data, textures)
+        return self.preload(sorted(paths))
+
+    def clear(self) -> None:
+        """Drop every cached asset and reset the counters."""
+        self._cache.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def stats(self) -> dict:
+        """Get the cache counters.
+
+        Returns:
+            dict: 'hits', 'misses', 'evictions', 'size' and 'hitRate' (0.0 when nothing was resolved yet)
+        """
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self._cache),
+            'hitRate': self.hits / lookups if lookups else 0.0
+        }
+
+    def _store(self, path: str, asset: Optional['unreal.Object']) -> None:
+        cache = self._cache
+        cache[path] = asset
+        cache.move_to_end(path)
+        while len(cache) > self.max_size:
+            cache.popitem(last=False)
+            self.evictions += 1
+
+
+def collect_asset_paths(material_data: dict, textures: bool = True) -> Set[str]:
+    """Collect the layer, blend and texture paths referenced by a material dictionary.
+
+    Texture values are only collected when they are given as path strings.
+
+    Args:
+        material_data (dict): Material dictionary, as returned by get_full_material_as_dict
+        textures (bool): Whether texture paths are collected
+
+    Returns:
+        set[str]: Every referenced asset path
+    """
+    paths = set()
+
+    def add_texture_paths(parameters):
+        if not textures:
+            return
+        for param_info in parameters.values():
+            if param_info.get('type') == 'texture' and isinstance(param_info.get('value'), str):
+                paths.add(param_info['value'])
+
+    add_texture_paths(material_data.get('global', {}).get('parameters', {}))
+    for layer_data in material_data.get('layers', {}).values():
+        for asset_key in ('layerAsset', 'blendAsset'):
+            asset_data = layer_data.get(asset_key)
+            if asset_data:
+                if asset_data.get('path'):
+                    paths.add(asset_data['path'])
+                add_texture_paths(asset_data.get('parameters', {}))
+    return paths
+
+
+_DEFAULT_RESOLVER = None
+
+
+def get_default_resolver() -> AssetResolver:
+    """Get the resolver shared by the library functions when no resolver is passed explicitly.
+
+    Returns:
+        AssetResolver: The shared resolver
+    """
+    global _DEFAULT_RESOLVER
+    if _DEFAULT_RESOLVER is None:
+        _DEFAULT_RESOLVER = AssetResolver()
+    return _DEFAULT_RESOLVER
@@ -0,0 +1,291 @@
+import sys
+from array import array
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+
+from lazy_unreal import LazyModule
+from material_values import to_plain_value
+
+# numpy is optional and slow to import, so it is only imported when a snapshot file is read or written
+np = LazyModule('numpy')
+
+# Domain codes stored in the key columns
+_DOMAIN_CODES = {'global': 0, 'layer': 1, 'blend': 2}
+_DOMAIN_NAMES = ('global', 'layer', 'blend')
+
+# Path ids used in the layer table
+_NO_PATH = -1
+_NO_BLEND_ENTRY = -2
+
+# Column groups, each has '<group>_keys' (N x 4 int32: asset, domain, layer index, name id) and '<group>_values'
+_VALUE_GROUPS = ('scalar', 'vector', 'static_switch', 'texture', 'channel_mask')
+
+
+def _require_numpy() -> None:
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("Columnar snapshots require numpy, install it in the editor Python environment "
+                          "(e.g. 'python -m pip install numpy' with the engine's python executable)") from None
+
+
+class _StringTable:
+    """Assigns a stable integer id to each distinct string."""
+
+    def __init__(self):
+        self.ids = {}
+        self.strings = []
+
+    def id_of(self, value: Optional[str]) -> int:
+        if value is None:
+            return _NO_PATH
+        string_id = self.ids.get(value)
+        if string_id is None:
+            string_id = len(self.strings)
+            self.ids[value] = string_id
+            self.strings.append(value)
+        return string_id
+
+
+def write_columnar_snapshots(path: str, snapshots: Iterable[Tuple[str, dict]]) -> int:
+    """Write material snapshots to a compact columnar file.
+
+    Parameter names and asset paths are stored once in string tables, scalars as float32, vectors and channel
+    masks as N x 4 float32 arrays, static switches as a bitset and textures as ids into the path table. The
+    result is an uncompressed .npz file whose arrays are only read when first accessed.
+
+    Snapshots are consumed one at a time, so a generator can be passed to export a whole project without
+    keeping every dictionary in memory.
+
+    Args:
+        path (str): Output file path, '.npz' is appended by numpy if missing
+        snapshots (Iterable[tuple[str, dict]]): (asset path, material dictionary) pairs, e.g. `dict.items()`
+
+    Returns:
+        int: Number of snapshots written
+    """
+    _require_numpy()
+
+    assets = []
+    names = _StringTable()
+    paths = _StringTable()
+    layer_rows = array('i')
+    keys = {group: array('i') for group in _VALUE_GROUPS}
+    values = {
+        'scalar': array('f'),
+        'vector': array('f'),
+        'static_switch': array('b'),
+        'texture': array('i'),
+        'channel_mask': array('f')
+    }
+    # Per asset start offsets into the layer table and every value group
+    offsets = {group: array('q') for group in _VALUE_GROUPS + ('layer',)}
+
+    def add_parameters(asset_idx, domain, parameters):
+        domain_code = _DOMAIN_CODES[domain]
+        for param_info in parameters.values():
+            parameter_type = param_info['type']
+            keys[parameter_type].extend((asset_idx, domain_code, param_info['layerIndex'], names.id_of(param_info['name'])))
+            value = to_plain_value(parameter_type, param_info['value'])
+            if parameter_type == 'texture':
+                values['texture'].append(paths.id_of(value))
+            elif parameter_type in ('vector', 'channel_mask'):
+                values[parameter_type].extend(value if value is not None else (0.0, 0.0, 0.0, 0.0))
+            elif parameter_type == 'static_switch':
+                values['static_switch'].append(1 if value else 0)
+            else:
+                values['scalar'].append(value if value is not None else 0.0)
+
+    for asset_path, material_data in snapshots:
+        asset_idx = len(assets)
+        assets.append(asset_path)
+        offsets['layer'].append(len(layer_rows) // 4)
+        for group in _VALUE_GROUPS:
+            offsets[group].append(len(keys[group]) // 4)
+
+        add_parameters(asset_idx, 'global', material_data.get('global', {}).get('parameters', {}))
+        for layer_data in material_data.get('layers', {}).values():
+            layer_idx = layer_data['layerIndex']
+            layer_asset = layer_data.get('layerAsset') or {}
+            blend_asset = layer_data.get('blendAsset')
+            blend_path_id = _NO_BLEND_ENTRY if blend_asset is None else paths.id_of(blend_asset.get('path'))
+            layer_rows.extend((asset_idx, layer_idx, paths.id_of(layer_asset.get('path')), blend_path_id))
+
+            add_parameters(asset_idx, 'layer', layer_asset.get('parameters', {}))
+            if blend_asset:
+                add_parameters(asset_idx, 'blend', blend_asset.get('parameters', {}))
+
+    # Closing offsets so asset i spans [offsets[i], offsets[i + 1])
+    offsets['layer'].append(len(layer_rows) // 4)
+    for group in _VALUE_GROUPS:
+        offsets[group].append(len(keys[group]) // 4)
+
+    columns = {
+        'assets': np.array(assets, dtype=str),
+        'names': np.array(names.strings, dtype=str),
+        'paths': np.array(paths.strings, dtype=str),
+        'layers': np.frombuffer(layer_rows, dtype=np.int32).reshape(-1, 4),
+        'layer_offsets': np.frombuffer(offsets['layer'], dtype=np.int64),
+        'scalar_values': np.frombuffer(values['scalar'], dtype=np.float32),
+        'vector_values': np.frombuffer(values['vector'], dtype=np.float32).reshape(-1, 4),
+        'channel_mask_values': np.frombuffer(values['channel_mask'], dtype=np.float32).reshape(-1, 4),
+        'texture_values': np.frombuffer(values['texture'], dtype=np.int32),
+        'static_switch_values': np.packbits(np.frombuffer(values['static_switch'], dtype=np.int8).astype(bool)),
+        'static_switch_count': np.array([len(values['static_switch'])], dtype=np.int64)
+    }
+    for group in _VALUE_GROUPS:
+        columns[f'{group}_keys'] = np.frombuffer(keys[group], dtype=np.int32).reshape(-1, 4)
+        columns[f'{group}_offsets'] = np.frombuffer(offsets[group], dtype=np.int64)
+
+    np.savez(path, **columns)
+    return len(assets)
+
+
+class ColumnarSnapshots:
+    """Read access to a file written by write_columnar_snapshots.
+
+    Arrays are read from the file the first time they are needed and material dictionaries are only rebuilt
+    when requested, with plain values (see material_values.to_plain_value). Use it as a context manager or call
+    close() to release the file.
+
+    Attributes:
+        asset_paths (list[str]): Paths of the snapshotted assets, in file order
+
+    Example:
+        >>> with load_columnar_snapshots('C:/Exports/materials.npz') as snapshots:
+        ...     data = snapshots.get_dict('/Game/Materials/MI_Rock')
+    """
+
+    def __init__(self, path: str):
+        _require_numpy()
+        self._file = np.load(path, allow_pickle=False)
+        self._arrays = {}
+        self.asset_paths = [sys.intern(str(asset)) for asset in self._column('assets')]
+        self._asset_indices = {asset: i for i, asset in enumerate(self.asset_paths)}
+        self._names = None
+        self._paths = None
+        self._switches = None
+
+    def __len__(self) -> int:
+        return len(self.asset_paths)
+
+    def __contains__(self, asset_path: str) -> bool:
+        return asset_path in self._asset_indices
+
+    def __enter__(self) -> 'ColumnarSnapshots':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Release the underlying file."""
+        self._file.close()
+
+    def get_dict(self, asset: Union[str, int]) -> dict:
+        """Rebuild the material dictionary of one asset.
+
+        Args:
+            asset (Union[str, int]): Asset path, or index into asset_paths
+
+        Returns:
+            dict: The material dictionary in the get_full_material_as_dict format, with plain values
+        """
+        asset_idx = self._asset_indices[asset] if isinstance(asset, str) else asset
+        names = self._string_column('names')
+        paths = self._string_column('paths')
+
+        result = {'global': {'parameters': {}}, 'layers': {}}
+        layer_offsets = self._column('layer_offsets')
+        for _, layer_idx, layer_path_id, blend_path_id in self._column('layers')[layer_offsets[asset_idx]:layer_offsets[asset_idx + 1]]:
+            layer_data = {
+                'layerIndex': int(layer_idx),
+                'layerAsset': {'path': paths[layer_path_id] if layer_path_id >= 0 else None, 'parameters': {}}
+            }
+            if blend_path_id != _NO_BLEND_ENTRY:
+                layer_data['blendAsset'] = {'path': paths[blend_path_id] if blend_path_id >= 0 else None, 'parameters': {}}
+            result['layers'][f"Layer_{layer_idx}"] = layer_data
+
+        for group in _VALUE_GROUPS:
+            offsets = self._column(f'{group}_offsets')
+            start, end = offsets[asset_idx], offsets[asset_idx + 1]
+            if start == end:
+                continue
+            group_keys = self._column(f'{group}_keys')[start:end]
+            group_values = self._group_values(group, start, end)
+
+            for (_, domain_code, layer_idx, name_id), value in zip(group_keys.tolist(), group_values):
+                domain = _DOMAIN_NAMES[domain_code]
+                name = names[name_id]
+                if domain == 'global':
+                    parameters = result['global']['parameters']
+                else:
+                    layer_data = result['layers'].get(f"Layer_{layer_idx}")
+                    asset_key = 'layerAsset' if domain == 'layer' else 'blendAsset'
+                    if layer_data is None or asset_key not in layer_data:
+                        continue
+                    parameters = layer_data[asset_key]['parameters']
+                parameters[f"{name}_{layer_idx}"] = {
+                    'value': value,
+                    'type': group,
+                    'domain': domain,
+                    'layerIndex': layer_idx,
+                    'name': name
+                }
+        return result
+
+    def iter_dicts(self) -> Iterator[Tuple[str, dict]]:
+        """Rebuild every material dictionary, one at a time.
+
+        Yields:
+            tuple[str, dict]: (asset path, material dictionary) pairs in file order
+        """
+        for asset_idx, asset_path in enumerate(self.asset_paths):
+            yield asset_path, self.get_dict(asset_idx)
+
+    def column(self, name: str) -> 'np.ndarray':
+        """Get a raw column, for vectorized queries across every snapshot.
+
+        Args:
+            name (str): Column name, e.g. 'scalar_keys', 'scalar_values', 'names'
+
+        Returns:
+            np.ndarray: The column
+        """
+        return self._column(name)
+
+    def _column(self, name: str) -> 'np.ndarray':
+        column = self._arrays.get(name)
+        if column is None:
+            column = self._arrays[name] = self._file[name]
+        return column
+
+    def _string_column(self, name: str) -> List[str]:
+        cache_attr = f'_{name}'
+        strings = getattr(self, cache_attr)
+        if strings is None:
+            strings = [sys.intern(str(value)) for value in self._column(name)]
+            setattr(self, cache_attr, strings)
+        return strings
+
+    def _group_values(self, group: str, start: int, end: int) -> list:
+        if group == 'static_switch':
+            if self._switches is None:
+                count = int(self._column('static_switch_count')[0])
+                self._switches = np.unpackbits(self._column('static_switch_values'), count=count).astype(bool)
+            return self._switches[start:end].tolist()
+        if group == 'texture':
+            paths = self._string_column('paths')
+            return [paths[path_id] if path_id >= 0 else None for path_id in self._column('texture_values')[start:end].tolist()]
+        return self._column(f'{group}_values')[start:end].tolist()
+
+
+def load_columnar_snapshots(path: str) -> ColumnarSnapshots:
+    """Open a file written by write_columnar_snapshots.
+
+    Args:
+        path (str): Path of the .npz file
+
+    Returns:
+        ColumnarSnapshots: Lazy reader for the snapshots
+    """
+    return ColumnarSnapshots(path)
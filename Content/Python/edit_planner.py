@@ -0,0 +1,311 @@
+from contextlib import contextmanager
+from lazy_unreal import unreal
+from asset_resolver import AssetResolver, get_default_resolver
+from layered_material_library import LayeredMaterialLibrary, ParameterDomain, ParameterSpec, ParameterType
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Union
+
+# A layer or blend function, or its asset path
+FunctionRef = Union['unreal.MaterialFunctionInterface', str]
+
+
+class InstanceEditPlan:
+    """Pending edits of one material instance, split by whether they change its static permutation.
+
+    Static switches and layer or blend assignments change the shader permutation of the instance, scalar,
+    vector, texture and channel mask values do not. A later edit of the same parameter or slot replaces the
+    earlier one.
+
+    Attributes:
+        instance (unreal.MaterialInstanceConstant): The material instance the edits are applied to
+        layers (dict[int, FunctionRef]): Layer index -> layer function to assign
+        blends (dict[int, FunctionRef]): Layer index -> blend function to assign, indexed like the layer it
+            belongs to
+        static_edits (dict[tuple, ParameterSpec]): (domain, layer index, name) -> static switch edit
+        dynamic_edits (dict[tuple, ParameterSpec]): (domain, layer index, name) -> every other parameter edit
+    """
+
+    def __init__(self, instance: 'unreal.MaterialInstanceConstant'):
+        self.instance = instance
+        self.layers = {}
+        self.blends = {}
+        self.static_edits = {}
+        self.dynamic_edits = {}
+
+    @property
+    def affects_permutation(self) -> bool:
+        """Whether any pending edit can change the static permutation of the instance."""
+        return bool(self.layers or self.blends or self.static_edits)
+
+
+class _ResolvedPlan:
+    """What executing an InstanceEditPlan changes, worked out against the current state of the instance."""
+
+    def __init__(self, plan: InstanceEditPlan):
+        self.plan = plan
+        # set_layer_stack arguments, None if the stack does not change
+        self.stack = None
+        self.assignments = 0
+        self.static_specs = []
+        self.dynamic_specs = []
+
+
+class _PlannerSession:
+    """Stands in for an edit session while a planner captures an instance, see EditPlanner.capture."""
+
+    def __init__(self, planner: 'EditPlanner', instance: 'unreal.MaterialInstanceConstant'):
+        self.planner = planner
+        self.instance = instance
+
+    def queue(
+        self,
+        parameter_name: str,
+        value: Any,
+        layer_index: int = 0,
+        parameter_type: Union[ParameterType, str] = ParameterType.SCALAR,
+        parameter_domain: Union[ParameterDomain, str] = ParameterDomain.LAYER
+    ) -> bool:
+        self.planner.set_parameter(self.instance, parameter_name, value, layer_index, parameter_type, parameter_domain)
+        return True
+
+
+class EditPlanner:
+    """Collects edits across material instances and applies them in the order that rebuilds the fewest shaders.
+
+    Scripts that interleave static switches, layer reassignments and dynamic values update the static
+    permutation of an instance every time a permutation-affecting edit is committed. The planner holds every
+    edit until `execute`, then for each instance sets the layer stack once and applies its static switches
+    ahead of its dynamic values in a single batch, all inside one deferred update scope. Each instance whose
+    permutation changes is then updated exactly once. `estimate` reports how many permutation changes a plan
+    causes before anything is applied, to size the shader compile load of a batch.
+
+    Attributes:
+        only_if_different (bool): Whether edits that would not change the instance are dropped when the plan
+            is resolved
+        resolver (AssetResolver): Resolver used for layer, blend and texture paths
+
+    Example:
+        >>> planner = EditPlanner()
+        >>> for instance in instances:
+        ...     planner.assign_layer(instance, 2, '/Game/Layers/ML_Rust')
+        ...     with planner.capture(instance):
+        ...         LayeredMaterialLibrary.set_many_parameter_values(instance, specs)
+        >>> print(f"{planner.estimate()['permutationChanges']} permutations will be rebuilt")
+        >>> report = planner.execute()
+    """
+
+    def __init__(self, only_if_different: bool = True, resolver: Optional[AssetResolver] = None):
+        self.only_if_different = only_if_different
+        self.resolver = resolver or get_default_resolver()
+        self._plans: Dict['unreal.MaterialInstanceConstant', InstanceEditPlan] = {}
+        self._resolved: Optional[List[_ResolvedPlan]] = None
+
+    @property
+    def plans(self) -> List[InstanceEditPlan]:
+        """Pending edits of every instance, in the order the instances were first edited."""
+        return list(self._plans.values())
+
+    def _plan_for(self, instance: 'unreal.MaterialInstanceConstant') -> InstanceEditPlan:
+        # Any new edit invalidates the resolved plan
+        self._resolved = None
+        plan = self._plans.get(instance)
+        if plan is None:
+            plan = self._plans[instance] = InstanceEditPlan(instance)
+        return plan
+
+    def assign_layer(self, instance: 'unreal.MaterialInstanceConstant', layer_index: int,
+                     layer_function: FunctionRef) -> None:
+        """Plan a layer function assignment. The stack grows if layer_index is past its last layer.
+
+        Args:
+            instance (unreal.MaterialInstanceConstant): The material instance to modify
+            layer_index (int): Index of the layer
+            layer_function (unreal.MaterialFunctionInterface | str): The layer function, or its path
+        """
+        self._plan_for(instance).layers[layer_index] = layer_function
+
+    def assign_blend(self, instance: 'unreal.MaterialInstanceConstant', layer_index: int,
+                     blend_function: FunctionRef) -> None:
+        """Plan a blend function assignment.
+
+        Args:
+            instance (unreal.MaterialInstanceConstant): The material instance to modify
+            layer_index (int): Index of the layer the blend belongs to. Note: layer 0 has no blend.
+            blend_function (unreal.MaterialFunctionInterface | str): The blend function, or its path
+        """
+        if layer_index < 1:
+            raise ValueError(f"Invalid blend layer_index {layer_index}, layer 0 has no blend")
+        self._plan_for(instance).blends[layer_index] = blend_function
+
+    def set_parameter(
+        self,
+        instance: 'unreal.MaterialInstanceConstant',
+        parameter_name: str,
+        value: Any,
+        layer_index: int = 0,
+        parameter_type: Union[ParameterType, str] = 'scalar',
+        parameter_domain: Union[ParameterDomain, str] = 'layer'
+    ) -> None:
+        """Plan a parameter edit, with the same arguments as set_any_material_parameter_value.
+
+        Args:
+            instance: The material instance to modify
+            parameter_name: Name of the parameter to set
+            value: New value for the parameter. Texture values may be given as asset paths.
+            layer_index: Index of the layer containing the parameter (ignored for global parameters)
+            parameter_type: Type of parameter ('scalar', 'vector', 'static_switch', 'texture', 'channel_mask')
+            parameter_domain: Where to set the parameter ('layer', 'blend', 'global')
+        """
+        self.set_parameters(instance, [ParameterSpec(parameter_name, parameter_type, parameter_domain, layer_index, value)])
+
+    def set_parameters(self, instance: 'unreal.MaterialInstanceConstant', specs: Sequence[ParameterSpec]) -> None:
+        """Plan many parameter edits, each spec carrying its new value.
+
+        Args:
+            instance (unreal.MaterialInstanceConstant): The material instance to modify
+            specs (list[ParameterSpec]): Parameters to set. Texture values may be given as asset paths.
+        """
+        plan = self._plan_for(instance)
+        for spec in specs:
+            try:
+                domain, parameter_type = ParameterDomain(spec.parameter_domain), ParameterType(spec.parameter_type)
+            except ValueError:
+                raise ValueError(f"Invalid parameter_type '{spec.parameter_type}' or parameter_domain "
+                                 f"'{spec.parameter_domain}'") from None
+            layer_index = 0 if domain is ParameterDomain.GLOBAL else spec.layer_index
+            spec = ParameterSpec(spec.name, parameter_type, domain, layer_index, spec.value)
+            key = (domain, layer_index, spec.name)
+            if parameter_type is ParameterType.STATIC_SWITCH:
+                plan.static_edits[key] = spec
+            else:
+                plan.dynamic_edits[key] = spec
+
+    @contextmanager
+    def capture(self, instance: 'unreal.MaterialInstanceConstant') -> Iterator['EditPlanner']:
+        """Plan every parameter set on the instance inside the block instead of applying it.
+
+        Works with every setter that edit sessions queue: the layered setters, set_any_material_parameter_value
+        and set_many_parameter_values. Layer and blend assignments still have to go through assign_layer and
+        assign_blend. Getters keep returning the values currently stored on the instance.
+
+        Args:
+            instance (unreal.MaterialInstanceConstant): The material instance whose edits are planned
+
+        Yields:
+            EditPlanner: This planner
+        """
+        with LayeredMaterialLibrary.redirect_edits(instance, _PlannerSession(self, instance)):
+            yield self
+
+    def clear(self) -> None:
+        """Drop every pending edit."""
+        self._plans = {}
+        self._resolved = None
+
+    def estimate(self) -> dict:
+        """Work out what executing the plan changes, without applying anything.
+
+        The current layer stack and parameter values of every planned instance are read once. The result is
+        kept for execute as long as no edit is added in between.
+
+        Returns:
+            dict: 'instances' (planned instances), 'permutationChanges' (instances whose static permutation
+                changes, each updated once by execute), 'unplannedPermutationChanges' (permutation updates the
+                same edits would cause committed one by one: one per changing static switch and layer or blend
+                assignment), 'layerAssignments', 'staticEdits' and 'dynamicEdits' (edits that change something)
+        """
+        if self._resolved is None:
+            self._resolved = [self._resolve(plan) for plan in self._plans.values()]
+
+        report = {'instances': len(self._resolved), 'permutationChanges': 0, 'unplannedPermutationChanges': 0,
+                  'layerAssignments': 0, 'staticEdits': 0, 'dynamicEdits': 0}
+        for resolved in self._resolved:
+            if resolved.stack is not None or resolved.static_specs:
+                report['permutationChanges'] += 1
+            report['layerAssignments'] += resolved.assignments
+            report['staticEdits'] += len(resolved.static_specs)
+            report['dynamicEdits'] += len(resolved.dynamic_specs)
+        report['unplannedPermutationChanges'] = report['layerAssignments'] + report['staticEdits']
+        return report
+
+    def execute(self) -> dict:
+        """Apply every pending edit, permutation-affecting edits first, and clear the planner.
+
+        Per instance, the layer stack is set with a single set_layer_stack call, then static switches and
+        dynamic values are applied in one batch with the static switches first. The deferred update scope around
+        the whole plan commits the layer stack and static switches of each instance together, with one static
+        permutation update, and refreshes each instance once.
+
+        Returns:
+            dict: The estimate report, plus the deferred_updates report ('deferredEdits', 'instancesUpdated',
+                'parentMaterialsUpdated', 'permutationUpdates' and 'avoidedUpdates')
+        """
+        report = self.estimate()
+        resolved_plans = self._resolved
+        with LayeredMaterialLibrary.deferred_updates() as update_report:
+            for resolved in resolved_plans:
+                instance = resolved.plan.instance
+                if resolved.stack is not None:
+                    LayeredMaterialLibrary.set_layer_stack(instance, *resolved.stack)
+                specs = resolved.static_specs + resolved.dynamic_specs
+                if specs:
+                    with LayeredMaterialLibrary.edit_session(instance):
+                        LayeredMaterialLibrary.set_many_parameter_values(instance, specs, resolver=self.resolver)
+        self.clear()
+        report.update(update_report)
+        return report
+
+    def _resolve(self, plan: InstanceEditPlan) -> _ResolvedPlan:
+        """Compare a plan with its instance, keeping only the edits that change something."""
+        resolved = _ResolvedPlan(plan)
+        instance = plan.instance
+        # Values of reassigned slots belong to the previous function, so their edits are always applied
+        reassigned = set()
+
+        if plan.layers or plan.blends:
+            stack = LayeredMaterialLibrary.get_layer_stack(instance)
+            current_layers, current_blends = list(stack.layers), list(stack.blends)
+            layer_count = max([len(current_layers)] + [index + 1 for index in list(plan.layers) + list(plan.blends)])
+            layers = [None] * layer_count
+            blends = [None] * (layer_count - 1)
+
+            for domain, assignments, targets, current, offset in (
+                (ParameterDomain.LAYER, plan.layers, layers, current_layers, 0),
+                (ParameterDomain.BLEND, plan.blends, blends, current_blends, 1)
+            ):
+                for layer_index, function in assignments.items():
+                    if isinstance(function, str):
+                        path, function = function, self.resolver.resolve(function)
+                        if function is None:
+                            print(f"Skipping {domain.value} {layer_index} of {instance.get_path_name()}: "
+                                  f"could not load {path}")
+                            continue
+                    slot = layer_index - offset
+                    if (self.only_if_different and slot < len(current)
+                            and _same_asset(current[slot], function)):
+                        continue
+                    targets[slot] = function
+                    reassigned.add((domain, layer_index))
+                    resolved.assignments += 1
+
+            if resolved.assignments or layer_count != len(current_layers):
+                resolved.stack = (layers, blends)
+
+        static_specs = list(plan.static_edits.values())
+        dynamic_specs = list(plan.dynamic_edits.values())
+        if self.only_if_different and (static_specs or dynamic_specs):
+            specs = static_specs + dynamic_specs
+            change_mask = LayeredMaterialLibrary.get_change_mask(instance, specs)
+            kept = [spec for spec, changed in zip(specs, change_mask)
+                    if changed or (spec.parameter_domain, spec.layer_index) in reassigned]
+            static_specs = [spec for spec in kept if spec.parameter_type is ParameterType.STATIC_SWITCH]
+            dynamic_specs = [spec for spec in kept if spec.parameter_type is not ParameterType.STATIC_SWITCH]
+        resolved.static_specs = static_specs
+        resolved.dynamic_specs = dynamic_specs
+        return resolved
+
+
+def _same_asset(current: Optional['unreal.Object'], target: Optional['unreal.Object']) -> bool:
+    """Whether two asset references point to the same asset."""
+    if current is None or target is None:
+        return current is target
+    return current == target or current.get_path_name() == target.get_path_name()
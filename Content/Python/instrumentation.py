@@ -0,0 +1,258 @@
+import re
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+# (domain, type, operation), '-' where a call has no domain or type
+StatKey = Tuple[str, str, str]
+
+# Wrapper names of the typed accessors, e.g. get_layered_material_blend_scalar_parameter_value
+_ACCESSOR_NAME = re.compile(
+    r'^(get|set)_(layered_material_blend|layered_material|material_instance)_'
+    r'(scalar|vector|static_switch|texture|channel_mask)_parameter_value$'
+)
+_ACCESSOR_DOMAINS = {'layered_material': 'layer', 'layered_material_blend': 'blend', 'material_instance': 'global'}
+
+# Library methods that are not wrapped: context managers would only be timed while they are created
+_UNWRAPPED = {'edit_session', 'deferred_updates', 'stats', 'print_stats', 'measure'}
+
+
+class CallStats:
+    """Call count and latency distribution of one (domain, type, operation).
+
+    Attributes:
+        count (int): Number of calls
+        total (float): Total time spent in the calls, in seconds
+        max (float): Longest call, in seconds
+        histogram (dict[int, int]): Bucket -> number of calls. Bucket b holds calls that took less than 2**b
+            microseconds and at least 2**(b-1) microseconds; bucket 0 holds calls under a microsecond.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.histogram = {}
+
+    def add(self, seconds: float) -> None:
+        """Record one call."""
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        bucket = int(seconds * 1e6).bit_length()
+        self.histogram[bucket] = self.histogram.get(bucket, 0) + 1
+
+    def copy(self) -> 'CallStats':
+        stats = CallStats()
+        stats.count, stats.total, stats.max = self.count, self.total, self.max
+        stats.histogram = dict(self.histogram)
+        return stats
+
+    def since(self, earlier: Optional['CallStats']) -> 'CallStats':
+        """Get the calls recorded after an earlier copy of these stats.
+
+        The maximum cannot be split and is kept as the maximum over both periods.
+        """
+        if earlier is None:
+            return self.copy()
+        stats = CallStats()
+        stats.count = self.count - earlier.count
+        stats.total = self.total - earlier.total
+        stats.max = self.max
+        stats.histogram = {
+            bucket: count - earlier.histogram.get(bucket, 0)
+            for bucket, count in self.histogram.items()
+            if count != earlier.histogram.get(bucket, 0)
+        }
+        return stats
+
+    @property
+    def mean(self) -> float:
+        """Mean call time, in seconds."""
+        return self.total / self.count if self.count else 0.0
+
+    def to_dict(self) -> dict:
+        """Convert to plain data, histogram keys given as the bucket upper bound in microseconds."""
+        return {
+            'count': self.count,
+            'total': self.total,
+            'mean': self.mean,
+            'max': self.max,
+            'histogram': {1 << bucket: count for bucket, count in sorted(self.histogram.items())}
+        }
+
+
+# Recorded stats, and the original functions replaced while instrumentation is enabled
+_STATS: Dict[StatKey, CallStats] = {}
+_ORIGINALS: Dict[str, Callable] = {}
+
+
+def _key_for(name: str) -> StatKey:
+    """Get the stat key of a LayeredMaterialLibrary method from its name."""
+    match = _ACCESSOR_NAME.match(name)
+    if match:
+        operation, domain, type_name = match.groups()
+        return _ACCESSOR_DOMAINS[domain], type_name, operation
+    return '-', '-', name
+
+
+def _timed(func: Callable, key: StatKey) -> Callable:
+    """Wrap a function to record its calls under key."""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            stats = _STATS.get(key)
+            if stats is None:
+                stats = _STATS[key] = CallStats()
+            stats.add(elapsed)
+    return wrapper
+
+
+def is_enabled() -> bool:
+    """Whether library calls are currently recorded."""
+    return bool(_ORIGINALS)
+
+
+def enable() -> None:
+    """Start recording every LayeredMaterialLibrary call.
+
+    Wraps the library methods, the edit session commit and the native accessors used by the convenience
+    methods. Nothing is wrapped until this is called, so instrumentation costs nothing while disabled. Nested
+    calls are recorded too, e.g. apply_material_dict also records the reads and writes it makes.
+    """
+    import layered_material_library as library
+
+    if is_enabled():
+        return
+
+    cls = library.LayeredMaterialLibrary
+    for name, attribute in list(vars(cls).items()):
+        if name.startswith('_') or name in _UNWRAPPED or not isinstance(attribute, staticmethod):
+            continue
+        _ORIGINALS[name] = attribute
+        setattr(cls, name, staticmethod(_timed(attribute.__func__, _key_for(name))))
+
+    session_cls = library.LayeredParameterEditSession
+    _ORIGINALS['LayeredParameterEditSession.commit'] = session_cls.commit
+    session_cls.commit = _timed(session_cls.commit, ('-', '-', 'commit_edit_session'))
+
+    # The convenience methods call the native accessors through the registry, not through the wrappers above
+    registry = {}
+    wrapped = {}
+    for key, accessor in library._build_parameter_registry().items():
+        pair = (accessor.domain, accessor.parameter_type)
+        if pair not in wrapped:
+            domain, type_name = accessor.domain.value, accessor.parameter_type.value
+            wrapped[pair] = accessor._replace(
+                get=_timed(accessor.get, (domain, type_name, 'get')),
+                set=_timed(accessor.set, (domain, type_name, 'set'))
+            )
+        registry[key] = wrapped[pair]
+    library._PARAMETER_REGISTRY = registry
+
+
+def disable() -> None:
+    """Stop recording and restore the original library functions. Recorded stats are kept."""
+    import layered_material_library as library
+
+    if not is_enabled():
+        return
+
+    session_commit = _ORIGINALS.pop('LayeredParameterEditSession.commit')
+    library.LayeredParameterEditSession.commit = session_commit
+    for name, attribute in _ORIGINALS.items():
+        setattr(library.LayeredMaterialLibrary, name, attribute)
+    _ORIGINALS.clear()
+    # Rebuilt from the unwrapped native functions on next use
+    library._PARAMETER_REGISTRY = None
+
+
+def reset() -> None:
+    """Clear every recorded stat."""
+    _STATS.clear()
+
+
+def stats() -> Dict[StatKey, dict]:
+    """Get the stats recorded so far.
+
+    Returns:
+        dict[tuple, dict]: (domain, type, operation) -> 'count', 'total', 'mean' and 'max' (seconds) and
+            'histogram' (bucket upper bound in microseconds -> number of calls)
+    """
+    return {key: call_stats.to_dict() for key, call_stats in sorted(_STATS.items())}
+
+
+def format_stats(recorded: Optional[Dict[StatKey, dict]] = None) -> str:
+    """Format stats as a table, slowest total first.
+
+    Args:
+        recorded (dict, optional): Stats as returned by stats(). Defaults to the stats recorded so far.
+
+    Returns:
+        str: The table
+    """
+    if recorded is None:
+        recorded = stats()
+    lines = [f"{'domain':<8} {'type':<14} {'operation':<40} {'calls':>8} {'total ms':>10} {'mean us':>9} {'max us':>9}"]
+    for (domain, type_name, operation), entry in sorted(recorded.items(), key=lambda item: -item[1]['total']):
+        lines.append(
+            f"{domain:<8} {type_name:<14} {operation:<40} {entry['count']:>8} {entry['total'] * 1e3:>10.2f} "
+            f"{entry['mean'] * 1e6:>9.1f} {entry['max'] * 1e6:>9.1f}"
+        )
+    return '\n'.join(lines)
+
+
+class MeasurementWindow:
+    """Stats of the calls made inside a `measure` block, filled in when the block exits.
+
+    Attributes:
+        stats (dict[tuple, dict]): Same layout as instrumentation.stats()
+        seconds (float): Wall time of the block
+    """
+
+    def __init__(self):
+        self.stats = {}
+        self.seconds = 0.0
+
+    def report(self) -> str:
+        """Format the window as a table."""
+        return format_stats(self.stats)
+
+
+@contextmanager
+def measure() -> Iterator[MeasurementWindow]:
+    """Record the library calls made inside the block.
+
+    Instrumentation is enabled for the block if it was not already, and disabled again afterwards. Stats
+    recorded outside the block are left untouched.
+
+    Yields:
+        MeasurementWindow: Filled with the calls made inside the block once it exits
+
+    Example:
+        >>> with measure() as window:
+        ...     LayeredMaterialLibrary.apply_material_dict(instance, material_data)
+        >>> print(window.report())
+    """
+    was_enabled = is_enabled()
+    before = {key: call_stats.copy() for key, call_stats in _STATS.items()}
+    window = MeasurementWindow()
+    enable()
+    start = time.perf_counter()
+    try:
+        yield window
+    finally:
+        window.seconds = time.perf_counter() - start
+        if not was_enabled:
+            disable()
+        window.stats = {
+            key: call_stats.since(before.get(key)).to_dict()
+            for key, call_stats in sorted(_STATS.items())
+            if call_stats.count != (before[key].count if key in before else 0)
+        }
@@ -1,5 +1,206 @@
-import unreal
-from typing import Optional, Union
+from lazy_unreal import unreal
+from asset_resolver import AssetResolver, get_default_resolver
+from material_values import compute_change_mask
+import instrumentation
+from collections import defaultdict
+from contextlib import contextmanager
+from enum import Enum
+from functools import wraps
+from typing import Any, Callable, ContextManager, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+
+class ParameterDomain(Enum):
+    """Where a parameter lives on a layered material instance."""
+    LAYER = 'layer'
+    BLEND = 'blend'
+    GLOBAL = 'global'
+
+
+class ParameterType(Enum):
+    """Kind of value a parameter holds."""
+    SCALAR = 'scalar'
+    VECTOR = 'vector'
+    STATIC_SWITCH = 'static_switch'
+    TEXTURE = 'texture'
+    CHANNEL_MASK = 'channel_mask'
+
+
+class ParameterSpec(NamedTuple):
+    """A parameter to get or set through the bulk helpers.
+
+    The domain and type accept either the enum members or their string values ('layer', 'scalar', ...).
+
+    Attributes:
+        name (str): Name of the parameter
+        parameter_type (ParameterType): Type of the parameter
+        parameter_domain (ParameterDomain): Where the parameter lives
+        layer_index (int): Index of the layer containing the parameter (ignored for global parameters)
+        value (Any): Value to set. Unused when getting values.
+    """
+    name: str
+    parameter_type: Union[ParameterType, str] = ParameterType.SCALAR
+    parameter_domain: Union[ParameterDomain, str] = ParameterDomain.LAYER
+    layer_index: int = 0
+    value: Any = None
+
+
+class _NativeEnums(NamedTuple):
+    """Native enum values for each parameter type and domain, and the reverse lookups."""
+    parameter_types: Dict[ParameterType, 'unreal.LayeredParameterType']
+    associations: Dict[ParameterDomain, 'unreal.MaterialParameterAssociation']
+    domains_by_association: Dict['unreal.MaterialParameterAssociation', ParameterDomain]
+    types_by_native_type: Dict['unreal.LayeredParameterType', ParameterType]
+
+
+_NATIVE_ENUMS = None
+
+
+def _native_enums() -> _NativeEnums:
+    """Get the native enum tables, built on first use so importing this module does not need unreal."""
+    global _NATIVE_ENUMS
+    if _NATIVE_ENUMS is None:
+        parameter_types = {
+            ParameterType.SCALAR: unreal.LayeredParameterType.SCALAR,
+            ParameterType.VECTOR: unreal.LayeredParameterType.VECTOR,
+            ParameterType.STATIC_SWITCH: unreal.LayeredParameterType.STATIC_SWITCH,
+            ParameterType.TEXTURE: unreal.LayeredParameterType.TEXTURE,
+            ParameterType.CHANNEL_MASK: unreal.LayeredParameterType.CHANNEL_MASK
+        }
+        associations = {
+            ParameterDomain.LAYER: unreal.MaterialParameterAssociation.LAYER_PARAMETER,
+            ParameterDomain.BLEND: unreal.MaterialParameterAssociation.BLEND_PARAMETER,
+            ParameterDomain.GLOBAL: unreal.MaterialParameterAssociation.GLOBAL_PARAMETER
+        }
+        _NATIVE_ENUMS = _NativeEnums(
+            parameter_types,
+            associations,
+            {association: domain for domain, association in associations.items()},
+            {native_type: parameter_type for parameter_type, native_type in parameter_types.items()}
+        )
+    return _NATIVE_ENUMS
+
+
+class _LazyClassConstant:
+    """Class attribute built on first access and then stored on the class, for values that need unreal."""
+
+    def __init__(self, factory: Callable[[], Any]):
+        self.factory = factory
+        self.name = None
+
+    def __set_name__(self, owner: type, name: str):
+        self.name = name
+
+    def __get__(self, instance: Any, owner: type) -> Any:
+        value = self.factory()
+        setattr(owner, self.name, value)
+        return value
+
+
+def _parameter_key(
+    parameter_domain: Union[ParameterDomain, str],
+    parameter_type: Union[ParameterType, str]
+) -> Tuple[ParameterDomain, ParameterType]:
+    """Convert a domain and type given as enums or strings to their enum members."""
+    try:
+        return ParameterDomain(parameter_domain), ParameterType(parameter_type)
+    except ValueError:
+        raise ValueError(f"Invalid parameter_type '{parameter_type}' or parameter_domain '{parameter_domain}'") from None
+
+
+class LayeredParameterEditSession:
+    """Queues parameter edits for one material instance and applies them with a single editor refresh.
+
+    Sessions are normally opened with `LayeredMaterialLibrary.edit_session`. While a session is open, every
+    setter called on its instance is queued instead of applied, and getters keep returning the values currently
+    stored on the instance.
+
+    Attributes:
+        instance (unreal.MaterialInstanceConstant): The material instance the edits are applied to
+        edits (list[unreal.LayeredParameterEdit]): Edits queued so far, in call order
+    """
+
+    def __init__(self, instance: 'unreal.MaterialInstanceConstant'):
+        self.instance = instance
+        self.edits = []
+
+    def queue(
+        self,
+        parameter_name: str,
+        value: Union[float, 'unreal.LinearColor', bool, 'unreal.Texture'],
+        layer_index: int = 0,
+        parameter_type: Union[ParameterType, str] = ParameterType.SCALAR,
+        parameter_domain: Union[ParameterDomain, str] = ParameterDomain.LAYER
+    ) -> bool:
+        """Queue a parameter edit to be applied on commit.
+
+        Args:
+            parameter_name: Name of the parameter to set
+            value: New value for the parameter
+            layer_index: Index of the layer containing the parameter (ignored for global parameters)
+            parameter_type: Type of parameter ('scalar', 'vector', 'static_switch', 'texture', 'channel_mask')
+            parameter_domain: Where to set the parameter ('layer', 'blend', 'global')
+
+        Returns:
+            bool: True once the edit is queued
+        """
+        parameter_domain, parameter_type = _parameter_key(parameter_domain, parameter_type)
+
+        edit = unreal.LayeredParameterEdit()
+        edit.parameter_name = parameter_name
+        native_enums = _native_enums()
+        edit.association = native_enums.associations[parameter_domain]
+        edit.layer_index = layer_index
+        edit.parameter_type = native_enums.parameter_types[parameter_type]
+
+        if parameter_type is ParameterType.SCALAR:
+            edit.scalar_value = value
+        elif parameter_type is ParameterType.STATIC_SWITCH:
+            edit.static_switch_value = value
+        elif parameter_type is ParameterType.TEXTURE:
+            edit.texture_value = value
+        elif hasattr(value, 'r'):
+            edit.vector_value = value
+        else:
+            # Channel masks may also be passed as unreal.Vector4
+            edit.vector_value = unreal.LinearColor(value.x, value.y, value.z, value.w)
+
+        self.edits.append(edit)
+        return True
+
+    def commit(self) -> int:
+        """Apply every queued edit in one native call and clear the queue.
+
+        Returns:
+            int: Number of edits applied
+        """
+        if not self.edits:
+            return 0
+        applied = unreal.LayeredMaterialLibrary.apply_layered_parameter_batch(self.instance, self.edits)
+        self.edits = []
+        return applied
+
+    def discard(self) -> None:
+        """Drop every queued edit without applying it."""
+        self.edits = []
+
+
+# Open edit sessions, keyed by the material instance they belong to
+_EDIT_SESSIONS: Dict['unreal.MaterialInstanceConstant', LayeredParameterEditSession] = {}
+
+
+def _session_aware(parameter_type: ParameterType, parameter_domain: ParameterDomain):
+    """Make a layered setter queue its edit when an edit session is open on the instance."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(instance, parameter_name, layer_index, value):
+            if _EDIT_SESSIONS:
+                session = _EDIT_SESSIONS.get(instance)
+                if session is not None:
+                    return session.queue(parameter_name, value, layer_index, parameter_type, parameter_domain)
+            return func(instance, parameter_name, layer_index, value)
+        return wrapper
+    return decorator
+
 
 class LayeredMaterialLibrary:
     """Python wrapper for the AdvancedMaterialEditingLibrary plugin functionality.
@@ -22,12 +223,17 @@ class LayeredMaterialLibrary:
         ...     print(f"Material has {layer_count} layers")
     """
 
-    # Channel mask constants
-    CHANNEL_RED = unreal.LinearColor(1, 0, 0, 0)
-    CHANNEL_GREEN = unreal.LinearColor(0, 1, 0, 0)
-    CHANNEL_BLUE = unreal.LinearColor(0, 0, 1, 0)
-    CHANNEL_ALPHA = unreal.LinearColor(0, 0, 0, 1)
-    CHANNELS = [CHANNEL_RED, CHANNEL_GREEN, CHANNEL_BLUE, CHANNEL_ALPHA]
+    # Channel mask constants, built on first access
+    CHANNEL_RED = _LazyClassConstant(lambda: unreal.LinearColor(1, 0, 0, 0))
+    CHANNEL_GREEN = _LazyClassConstant(lambda: unreal.LinearColor(0, 1, 0, 0))
+    CHANNEL_BLUE = _LazyClassConstant(lambda: unreal.LinearColor(0, 0, 1, 0))
+    CHANNEL_ALPHA = _LazyClassConstant(lambda: unreal.LinearColor(0, 0, 0, 1))
+    CHANNELS = _LazyClassConstant(lambda: [
+        LayeredMaterialLibrary.CHANNEL_RED,
+        LayeredMaterialLibrary.CHANNEL_GREEN,
+        LayeredMaterialLibrary.CHANNEL_BLUE,
+        LayeredMaterialLibrary.CHANNEL_ALPHA
+    ])
 
     @staticmethod
     def get_layer_count(instance: 'unreal.MaterialInstance') -> int:
@@ -101,6 +307,118 @@ class LayeredMaterialLibrary:
         """
         return unreal.LayeredMaterialLibrary.assign_blend_layer(instance, layer_index, new_blend_layer_function)
 
+    @staticmethod
+    def get_layer_stack(instance: 'unreal.MaterialInstance') -> 'unreal.LayeredMaterialStack':
+        """Get the layer and blend functions assigned to a material instance.
+
+        Args:
+            instance (unreal.MaterialInstance): The material instance to query
+
+        Returns:
+            unreal.LayeredMaterialStack: The assigned functions. `blends[i]` belongs to layer `i + 1`. Both lists
+                are empty if the material is not layered or the instance is invalid.
+        """
+        return unreal.LayeredMaterialLibrary.get_layer_stack(instance)
+
+    @staticmethod
+    def set_layer_stack(
+        instance: 'unreal.MaterialInstance',
+        layers: Sequence[Optional['unreal.MaterialFunctionInterface']],
+        blends: Optional[Sequence[Optional['unreal.MaterialFunctionInterface']]] = None,
+        link_to_parent: Optional[Sequence[bool]] = None
+    ) -> bool:
+        """Set every layer and blend function of a material instance in a single native call.
+
+        Building a stack with `add_material_layer`, `assign_layer_material` and `assign_blend_layer` commits the
+        layer stack once per call, and each commit can invalidate the static permutation of the instance. This
+        commits it once, and not at all if nothing changes.
+
+        Args:
+            instance (unreal.MaterialInstance): The material instance to modify
+            layers (list[unreal.MaterialFunctionInterface]): Layer function of every layer. The stack is resized
+                to this many layers. None keeps the function currently assigned.
+            blends (list[unreal.MaterialFunctionInterface], optional): Blend functions, `blends[i]` belongs to
+                layer `i + 1`. None entries, or a missing list, keep the functions currently assigned.
+            link_to_parent (list[bool], optional): Layers flagged True are left untouched and stay linked to the
+                parent. Other layers whose layer or blend function changes are unlinked.
+
+        Returns:
+            bool: True if the stack was set, False if the material is not layered or layers is empty
+        """
+        return unreal.LayeredMaterialLibrary.set_layer_stack(instance, list(layers), list(blends or []),
+                                                             list(link_to_parent or []))
+
+    @staticmethod
+    def get_layered_parameter_infos(instance: 'unreal.MaterialInstance') -> 'list[unreal.LayeredParameterInfo]':
+        """List every parameter of a material instance with its association, layer index and type.
+
+        Values are not read, so this is a single native call no matter how many layers the material has. A layer
+        stack set inside a deferred update scope is already followed, the parameters of a newly assigned function
+        are listed before the stack is committed.
+
+        Args:
+            instance (unreal.MaterialInstance): The material instance to query
+
+        Returns:
+            list[unreal.LayeredParameterInfo]: One entry per parameter. Layer indices follow the same convention
+                as the getters and setters (blend indices are offset by 1, 0 for global parameters).
+        """
+        return unreal.LayeredMaterialLibrary.get_layered_parameter_infos(instance)
+
+    @staticmethod
+    def get_parameter_specs(instance: 'unreal.MaterialInstance') -> List[ParameterSpec]:
+        """List every parameter of a material instance as specs usable with the bulk helpers.
+
+        Args:
+            instance (unreal.MaterialInstance): The material instance to query
+
+        Returns:
+            list[ParameterSpec]: One spec per parameter, with enum type and domain and no value
+        """
+        native_enums = _native_enums()
+        return [
+            ParameterSpec(str(info.parameter_name), native_enums.types_by_native_type[info.parameter_type],
+                          native_enums.domains_by_association[info.association], info.layer_index)
+            for info in unreal.LayeredMaterialLibrary.get_layered_parameter_infos(instance)
+        ]
+
+    @staticmethod
+    def get_parameter_schema_key(instance: 'unreal.MaterialInstance') -> str:
+        """Get a key identifying the parameter layout of a material instance.
+
+        Instances share a key when they have the same base material and the same layer and blend functions. The
+        key changes when any of those is recompiled or a layer or blend is reassigned, also inside a deferred
+        update scope.
+
+        Args:
+            instance (unreal.MaterialInstance): The material instance to query
+
+        Returns:
+            str: The schema key, empty if the instance is invalid
+        """
+        return unreal.LayeredMaterialLibrary.get_parameter_schema_key(instance)
+
+    @staticmethod
+    def get_all_layered_parameter_values(
+        instance: 'unreal.MaterialInstance',
+        load_textures: bool = True
+    ) -> 'unreal.LayeredParameterValues':
+        """Read every parameter value of a material instance in a single native call.
+
+        Args:
+            instance (unreal.MaterialInstance): The material instance to query
+            load_textures (bool): Whether texture values are returned as loaded textures. Texture paths are
+                always returned in `texture_paths`, read from the override data without loading anything.
+
+        Returns:
+            unreal.LayeredParameterValues: Parallel info and value arrays for each parameter type
+                (`scalar_infos`/`scalar_values`, `vector_infos`/`vector_values`, `static_switch_infos`/
+                `static_switch_values`, `texture_infos`/`texture_values`/`texture_paths`, `channel_mask_infos`/
+                `channel_mask_values`). `texture_values` is empty without load_textures. Empty if the instance
+                is invalid.
+        """
+        return unreal.LayeredMaterialLibrary.get_all_layered_parameter_values(instance, load_textures)
+
     @staticmethod
     def get_layered_material_scalar_parameter_value(
         instance: 'unreal.MaterialInstance',
@@ -120,6 +438,7 @@ class LayeredMaterialLibrary:
         return unreal.LayeredMaterialLibrary.get_layered_material_scalar_parameter_value(instance, parameter_name, layer_index)
 
     @staticmethod
+    @_session_aware(ParameterType.SCALAR, ParameterDomain.LAYER)
     def set_layered_material_scalar_parameter_value(
         instance: 'unreal.MaterialInstanceConstant',
         parameter_name: str,
@@ -155,6 +474,7 @@ class LayeredMaterialLibrary:
         return unreal.LayeredMaterialLibrary.get_layered_material_vector_parameter_value(instance, parameter_name, layer_index)
 
     @staticmethod
+    @_session_aware(ParameterType.VECTOR, ParameterDomain.LAYER)
     def set_layered_material_vector_parameter_value(instance: 'unreal.MaterialInstanceConstant',
                                                     parameter_name: str, layer_index: int,
                                                     value: 'unreal.LinearColor') -> bool:
@@ -190,6 +510,7 @@ class LayeredMaterialLibrary:
         return unreal.LayeredMaterialLibrary.get_layered_material_static_switch_parameter_value(instance, parameter_name, layer_index)
 
     @staticmethod
+    @_session_aware(ParameterType.STATIC_SWITCH, ParameterDomain.LAYER)
     def set_layered_material_static_switch_parameter_value(
         instance: 'unreal.MaterialInstanceConstant',
         parameter_name: str,
@@ -228,6 +549,7 @@ class LayeredMaterialLibrary:
         return unreal.LayeredMaterialLibrary.get_layered_material_texture_parameter_value(instance, parameter_name, layer_index)
 
     @staticmethod
+    @_session_aware(ParameterType.TEXTURE, ParameterDomain.LAYER)
     def set_layered_material_texture_parameter_value(
         instance: 'unreal.MaterialInstanceConstant',
         parameter_name: str,
@@ -264,6 +586,7 @@ class LayeredMaterialLibrary:
         return unreal.LayeredMaterialLibrary.get_layered_material_channel_mask_parameter_value(instance, parameter_name, layer_index)
 
     @staticmethod
+    @_session_aware(ParameterType.CHANNEL_MASK, ParameterDomain.LAYER)
     def set_layered_material_channel_mask_parameter_value(instance: 'unreal.MaterialInstanceConstant',
                                                         parameter_name: str,
                                                         layer_index: int,
@@ -299,6 +622,7 @@ class LayeredMaterialLibrary:
         return unreal.LayeredMaterialLibrary.get_layered_material_blend_scalar_parameter_value(instance, parameter_name, layer_index)
 
     @staticmethod
+    @_session_aware(ParameterType.SCALAR, ParameterDomain.BLEND)
     def set_layered_material_blend_scalar_parameter_value(instance: 'unreal.MaterialInstanceConstant',
                                                         parameter_name: str, layer_index: int, value: float) -> bool:
         """Set the value of a scalar parameter in a specific blend layer.
@@ -330,6 +654,7 @@ class LayeredMaterialLibrary:
         return unreal.LayeredMaterialLibrary.get_layered_material_blend_vector_parameter_value(instance, parameter_name, layer_index)
 
     @staticmethod
+    @_session_aware(ParameterType.VECTOR, ParameterDomain.BLEND)
     def set_layered_material_blend_vector_parameter_value(instance: 'unreal.MaterialInstanceConstant',
                                                         parameter_name: str, layer_index: int,
                                                         value: 'unreal.LinearColor') -> bool:
@@ -362,6 +687,7 @@ class LayeredMaterialLibrary:
         return unreal.LayeredMaterialLibrary.get_layered_material_blend_static_switch_parameter_value(instance, parameter_name, layer_index)
 
     @staticmethod
+    @_session_aware(ParameterType.STATIC_SWITCH, ParameterDomain.BLEND)
     def set_layered_material_blend_static_switch_parameter_value(instance: 'unreal.MaterialInstanceConstant',
                                                                 parameter_name: str, layer_index: int, value: bool) -> bool:
         """Set the value of a static switch parameter in a specific blend layer.
@@ -393,6 +719,7 @@ class LayeredMaterialLibrary:
         return unreal.LayeredMaterialLibrary.get_layered_material_blend_texture_parameter_value(instance, parameter_name, layer_index)
 
     @staticmethod
+    @_session_aware(ParameterType.TEXTURE, ParameterDomain.BLEND)
     def set_layered_material_blend_texture_parameter_value(instance: 'unreal.MaterialInstanceConstant',
                                                         parameter_name: str, layer_index: int,
                                                         value: 'unreal.Texture') -> bool:
@@ -426,6 +753,7 @@ class LayeredMaterialLibrary:
         return unreal.LayeredMaterialLibrary.get_layered_material_blend_channel_mask_parameter_value(instance, parameter_name, layer_index)
 
     @staticmethod
+    @_session_aware(ParameterType.CHANNEL_MASK, ParameterDomain.BLEND)
     def set_layered_material_blend_channel_mask_parameter_value(instance: 'unreal.MaterialInstanceConstant',
                                                             parameter_name: str,
                                                             layer_index: int,
@@ -449,7 +777,7 @@ class LayeredMaterialLibrary:
     def get_material_instance_channel_mask_parameter_value(
         instance: 'unreal.MaterialInstance',
         parameter_name: str,
-        association: 'unreal.MaterialParameterAssociation' = unreal.MaterialParameterAssociation.GLOBAL_PARAMETER
+        association: Optional['unreal.MaterialParameterAssociation'] = None
     ) -> 'unreal.LinearColor':
         """Get the value of a channel mask parameter from a material. Not for material
         layers, just extends original material functionality that was missing.
@@ -463,6 +791,8 @@ class LayeredMaterialLibrary:
         Returns:
             unreal.LinearColor: The parameter value. Returns (0,0,0,0) if parameter not found or instance is invalid
         """
+        if association is None:
+            association = unreal.MaterialParameterAssociation.GLOBAL_PARAMETER
         return unreal.LayeredMaterialLibrary.get_material_instance_channel_mask_parameter_value(
             instance,
             parameter_name,
@@ -474,7 +804,7 @@ class LayeredMaterialLibrary:
         instance: 'unreal.MaterialInstanceConstant',
         parameter_name: str,
         value: 'unreal.LinearColor',
-        association: 'unreal.MaterialParameterAssociation' = unreal.MaterialParameterAssociation.GLOBAL_PARAMETER
+        association: Optional['unreal.MaterialParameterAssociation'] = None
     ) -> bool:
         """Set the value of a channel mask parameter in a material. Not for material
         layers, just extends original material functionality that was missing.
@@ -489,6 +819,13 @@ class LayeredMaterialLibrary:
         Returns:
             bool: True if the parameter was successfully set, False otherwise
         """
+        if association is None:
+            association = unreal.MaterialParameterAssociation.GLOBAL_PARAMETER
+        if _EDIT_SESSIONS and association == unreal.MaterialParameterAssociation.GLOBAL_PARAMETER:
+            session = _EDIT_SESSIONS.get(instance)
+            if session is not None:
+                return session.queue(parameter_name, value, 0, ParameterType.CHANNEL_MASK, ParameterDomain.GLOBAL)
+
         return unreal.LayeredMaterialLibrary.set_material_instance_channel_mask_parameter_value(
             instance,
             parameter_name,
@@ -496,6 +833,225 @@ class LayeredMaterialLibrary:
             association
         )
 
+    # Batched Edits
+
+    @staticmethod
+    @contextmanager
+    def edit_session(instance: 'unreal.MaterialInstanceConstant') -> Iterator[LayeredParameterEditSession]:
+        """Queue every parameter set on the instance and apply them with a single editor refresh.
+
+        Each individual setter refreshes the material instance editor data after every edit, which dominates
+        the cost of setting many parameters. Inside the session, setters (including
+        `set_any_material_parameter_value`) are queued and applied together when the block exits. If the block
+        raises, the queued edits are discarded. Nested sessions on the same instance join the outer session.
+
+        Args:
+            instance (unreal.MaterialInstanceConstant): The material instance to modify
+
+        Yields:
+            LayeredParameterEditSession: The session collecting the edits
+
+        Example:
+            >>> with LayeredMaterialLibrary.edit_session(instance):
+            ...     LayeredMaterialLibrary.set_layered_material_scalar_parameter_value(instance, 'Metallic', 1, 1.0)
+            ...     LayeredMaterialLibrary.set_layered_material_scalar_parameter_value(instance, 'Roughness', 1, 0.2)
+        """
+        session = _EDIT_SESSIONS.get(instance)
+        if session is not None:
+            yield session
+            return
+
+        session = LayeredParameterEditSession(instance)
+        _EDIT_SESSIONS[instance] = session
+        try:
+            yield session
+        finally:
+            del _EDIT_SESSIONS[instance]
+        session.commit()
+
+    @staticmethod
+    @contextmanager
+    def redirect_edits(instance: 'unreal.MaterialInstanceConstant', session: Any) -> Iterator[Any]:
+        """Hand every parameter set on the instance inside the block to session instead of applying it.
+
+        session stands in for an edit session: it needs a `queue` method taking the same arguments as
+        `LayeredParameterEditSession.queue`, and is never committed. It replaces any session open on the
+        instance, which is restored when the block exits.
+
+        Args:
+            instance (unreal.MaterialInstanceConstant): The material instance whose edits are redirected
+            session: Object receiving the edits through its queue method
+
+        Yields:
+            The session
+        """
+        previous = _EDIT_SESSIONS.get(instance)
+        _EDIT_SESSIONS[instance] = session
+        try:
+            yield session
+        finally:
+            if previous is None:
+                del _EDIT_SESSIONS[instance]
+            else:
+                _EDIT_SESSIONS[instance] = previous
+
+    # Deferred Updates
+
+    @staticmethod
+    def begin_deferred_material_updates() -> None:
+        """Start deferring material updates, see `deferred_updates`. Every call needs a matching end call."""
+        unreal.LayeredMaterialLibrary.begin_deferred_material_updates()
+
+    @staticmethod
+    def end_deferred_material_updates() -> 'unreal.LayeredMaterialUpdateReport':
+        """End a deferred update scope, updating every touched instance once if it is the outermost scope.
+
+        Returns:
+            unreal.LayeredMaterialUpdateReport: What was flushed. Empty for inner scopes.
+        """
+        return unreal.LayeredMaterialLibrary.end_deferred_material_updates()
+
+    @staticmethod
+    def is_deferring_material_updates() -> bool:
+        """Check whether a deferred update scope is open.
+
+        Returns:
+            bool: True between a begin call and its matching end call
+        """
+        return unreal.LayeredMaterialLibrary.is_deferring_material_updates()
+
+    @staticmethod
+    @contextmanager
+    def deferred_updates() -> Iterator[dict]:
+        """Update every material instance edited inside the block once, when the block exits.
+
+        Edit sessions coalesce the refreshes of one instance; this scope covers every instance, every setter
+        and layer stack changes. Edits are applied to the instances right away, but their editor refresh and
+        static permutation update are collected and flushed through a single material update context, so a
+        script touching thousands of instances that share a parent does not update them one edit at a time.
+        Scopes nest, only the outermost one flushes. The flush also happens if the block raises, as the edits
+        are already applied.
+
+        Parameter reads inside the block see the new values, and layer stack reads see the new stack, but
+        parameter enumeration reflects the layer stack from before the block until it exits.
+
+        Yields:
+            dict: Filled when the outermost block exits with 'deferredEdits', 'instancesUpdated',
+                'parentMaterialsUpdated', 'permutationUpdates' (instances whose layer stack or static switches
+                changed, their static permutation is updated once) and 'avoidedUpdates' (updates saved by
+                coalescing)
+
+        Example:
+            >>> with LayeredMaterialLibrary.deferred_updates() as report:
+            ...     for instance in instances:
+            ...         LayeredMaterialLibrary.set_many_parameter_values(instance, specs)
+            >>> print(f"Avoided {report['avoidedUpdates']} updates")
+        """
+        report = {}
+        unreal.LayeredMaterialLibrary.begin_deferred_material_updates()
+        try:
+            yield report
+        finally:
+            native_report = unreal.LayeredMaterialLibrary.end_deferred_material_updates()
+            report.update({
+                'deferredEdits': native_report.deferred_edits,
+                'instancesUpdated': native_report.instances_updated,
+                'parentMaterialsUpdated': native_report.parent_materials_updated,
+                'permutationUpdates': native_report.permutation_updates,
+                'avoidedUpdates': native_report.avoided_updates
+            })
+
+    # Saving
+
+    @staticmethod
+    def get_edited_packages() -> List[str]:
+        """Get the packages edited through the library and not saved since.
+
+        Every setter, batch and layer stack function records the package of its instance before its first edit,
+        including global parameters set through the convenience methods.
+
+        Returns:
+            list[str]: Package names
+        """
+        return list(unreal.LayeredMaterialLibrary.get_edited_packages())
+
+    @staticmethod
+    def track_edited_assets(assets: Sequence['unreal.Object']) -> None:
+        """Record assets about to be edited outside the library, so flush_saves saves them too.
+
+        Args:
+            assets (list[unreal.Object]): Assets to record, before they are edited
+        """
+        unreal.LayeredMaterialLibrary.track_edited_assets(list(assets))
+
+    @staticmethod
+    def clear_edited_packages() -> None:
+        """Stop tracking every edited package without saving it."""
+        unreal.LayeredMaterialLibrary.clear_edited_packages()
+
+    @staticmethod
+    def set_change_detection(enabled: bool) -> None:
+        """Enable or disable hashing packages on their first edit, for flush_saves(skip_unchanged=True).
+
+        Off by default: each hash serializes the whole package, which bulk edits that never need it should not pay.
+        Only packages first edited while it is enabled can be skipped.
+
+        Args:
+            enabled (bool): Whether packages are hashed on their first edit
+        """
+        unreal.LayeredMaterialLibrary.set_edited_package_change_detection(enabled)
+
+    @staticmethod
+    def flush_saves(
+        chunk_size: int = 100,
+        skip_unchanged: bool = True,
+        progress_callback: Optional[Callable[[dict], None]] = None,
+        package_names: Optional[Iterable[str]] = None
+    ) -> dict:
+        """Save every package edited through the library, in bulk chunks.
+
+        Only packages the library touched are saved, unlike saving every dirty package of the editor, and each
+        chunk is written by a single save call instead of one call per asset. Call it outside deferred update
+        scopes, so the saved instances are up to date.
+
+        Args:
+            chunk_size (int): Number of packages saved per call
+            skip_unchanged (bool): Skip packages whose edits restored the state they were loaded with. Needs
+                set_change_detection(True) before the edits; new packages, packages that were already dirty before
+                their first edit and packages edited without change detection are always saved. Packages that fail
+                to save stay tracked for the next call.
+            progress_callback (Callable, optional): Called with the report of every chunk
+            package_names (Iterable[str], optional): Only save these packages, those that were not edited through
+                the library are ignored. Defaults to every edited package.
+
+        Returns:
+            dict: Totals 'saved', 'skipped', 'failed', 'bytes' and 'seconds', and 'chunks', the list of per chunk
+                reports with the same keys
+        """
+        edited = LayeredMaterialLibrary.get_edited_packages()
+        if package_names is not None:
+            requested = set(package_names)
+            edited = [package_name for package_name in edited if package_name in requested]
+        package_names = edited
+        totals = {'saved': 0, 'skipped': 0, 'failed': 0, 'bytes': 0, 'seconds': 0.0, 'chunks': []}
+        chunk_size = max(1, chunk_size)
+        for start in range(0, len(package_names), chunk_size):
+            native_report = unreal.LayeredMaterialLibrary.save_edited_packages(
+                package_names[start:start + chunk_size], skip_unchanged)
+            chunk_report = {
+                'saved': native_report.saved,
+                'skipped': native_report.skipped,
+                'failed': native_report.failed,
+                'bytes': native_report.bytes_written,
+                'seconds': native_report.seconds
+            }
+            for key, value in chunk_report.items():
+                totals[key] += value
+            totals['chunks'].append(chunk_report)
+            if progress_callback is not None:
+                progress_callback(chunk_report)
+        return totals
+
     # Convenience Methods
 
     @staticmethod
@@ -503,8 +1059,8 @@ class LayeredMaterialLibrary:
         instance: 'unreal.MaterialInstance',
         parameter_name: str,
         layer_index: int = 0,
-        parameter_type: str = 'scalar',
-        parameter_domain: str = 'layer'
+        parameter_type: Union[ParameterType, str] = 'scalar',
+        parameter_domain: Union[ParameterDomain, str] = 'layer'
     ) -> Union[float, 'unreal.LinearColor', bool, 'unreal.Texture']:
         """Get any material parameter value based on type and domain.
 
@@ -518,39 +1074,10 @@ class LayeredMaterialLibrary:
         Returns:
             The parameter value of appropriate type
         """
-        # Function mappings for each parameter type and domain
-        get_functions = {
-            'layer': {
-                'scalar': LayeredMaterialLibrary.get_layered_material_scalar_parameter_value,
-                'vector': LayeredMaterialLibrary.get_layered_material_vector_parameter_value,
-                'static_switch': LayeredMaterialLibrary.get_layered_material_static_switch_parameter_value,
-                'texture': LayeredMaterialLibrary.get_layered_material_texture_parameter_value,
-                'channel_mask': LayeredMaterialLibrary.get_layered_material_channel_mask_parameter_value
-            },
-            'blend': {
-                'scalar': LayeredMaterialLibrary.get_layered_material_blend_scalar_parameter_value,
-                'vector': LayeredMaterialLibrary.get_layered_material_blend_vector_parameter_value,
-                'static_switch': LayeredMaterialLibrary.get_layered_material_blend_static_switch_parameter_value,
-                'texture': LayeredMaterialLibrary.get_layered_material_blend_texture_parameter_value,
-                'channel_mask': LayeredMaterialLibrary.get_layered_material_blend_channel_mask_parameter_value
-            },
-            'global': {
-                'scalar': unreal.MaterialEditingLibrary.get_material_instance_scalar_parameter_value,
-                'vector': unreal.MaterialEditingLibrary.get_material_instance_vector_parameter_value,
-                'static_switch': unreal.MaterialEditingLibrary.get_material_instance_static_switch_parameter_value,
-                'texture': unreal.MaterialEditingLibrary.get_material_instance_texture_parameter_value,
-                'channel_mask': LayeredMaterialLibrary.get_material_channel_mask_parameter_value
-            }
-        }
-
-        func = get_functions.get(parameter_domain, {}).get(parameter_type)
-        if not func:
-            raise ValueError(f"Invalid parameter_type '{parameter_type}' or parameter_domain '{parameter_domain}'")
-
-        if parameter_domain == 'global':
-            return func(instance, parameter_name)
-        else:
-            return func(instance, parameter_name, layer_index)
+        accessor = _parameter_accessor(parameter_domain, parameter_type)
+        if accessor.takes_layer:
+            return accessor.get(instance, parameter_name, layer_index)
+        return accessor.get(instance, parameter_name)
 
     @staticmethod
     def set_any_material_parameter_value(
@@ -558,84 +1085,160 @@ class LayeredMaterialLibrary:
         parameter_name: str,
         value: Union[float, 'unreal.LinearColor', bool, 'unreal.Texture'],
         layer_index: int = 0,
-        parameter_type: str = 'scalar',
-        parameter_domain: str = 'layer',
-        only_if_different: bool = False
+        parameter_type: Union[ParameterType, str] = 'scalar',
+        parameter_domain: Union[ParameterDomain, str] = 'layer',
+        only_if_different: bool = False,
+        tolerances: Optional[Dict[str, Tuple[float, float]]] = None
     ) -> bool:
         """Set any material parameter value based on type and domain.
 
         Args:
             instance: The material instance to modify
             parameter_name: Name of the parameter to set
-            value: New value for the parameter
+            value: New value for the parameter. Texture values may be given as asset paths, an empty path clears
+                the texture.
             layer_index: Index of the layer containing the parameter (ignored for global parameters)
             parameter_type: Type of parameter ('scalar', 'vector', 'static_switch', 'texture', 'channel_mask')
             parameter_domain: Where to set the parameter ('layer', 'blend', 'global')
-            only_if_different: Only set the parameter if the new value is different from the current value
-
-        Returns:
-            bool: True if the parameter was successfully set
-        """
-        set_functions = {
-            'layer': {
-                'scalar': LayeredMaterialLibrary.set_layered_material_scalar_parameter_value,
-                'vector': LayeredMaterialLibrary.set_layered_material_vector_parameter_value,
-                'static_switch': LayeredMaterialLibrary.set_layered_material_static_switch_parameter_value,
-                'texture': LayeredMaterialLibrary.set_layered_material_texture_parameter_value,
-                'channel_mask': LayeredMaterialLibrary.set_layered_material_channel_mask_parameter_value
-            },
-            'blend': {
-                'scalar': LayeredMaterialLibrary.set_layered_material_blend_scalar_parameter_value,
-                'vector': LayeredMaterialLibrary.set_layered_material_blend_vector_parameter_value,
-                'static_switch': LayeredMaterialLibrary.set_layered_material_blend_static_switch_parameter_value,
-                'texture': LayeredMaterialLibrary.set_layered_material_blend_texture_parameter_value,
-                'channel_mask': LayeredMaterialLibrary.set_layered_material_blend_channel_mask_parameter_value
-            },
-            'global': {
-                'scalar': unreal.MaterialEditingLibrary.set_material_instance_scalar_parameter_value,
-                'vector': unreal.MaterialEditingLibrary.set_material_instance_vector_parameter_value,
-                'static_switch': unreal.MaterialEditingLibrary.set_material_instance_static_switch_parameter_value,
-                'texture': unreal.MaterialEditingLibrary.set_material_instance_texture_parameter_value,
-                'channel_mask': LayeredMaterialLibrary.set_material_channel_mask_parameter_value
-            }
-        }
+            only_if_different: Only set the parameter if the new value is different from the current value, see
+                get_change_mask. An unchanged texture path is not even loaded.
+            tolerances: (absolute, relative) tolerances per type used with only_if_different, see
+                material_values.compute_change_mask
 
-        func = set_functions.get(parameter_domain, {}).get(parameter_type)
-        if not func:
-            raise ValueError(f"Invalid parameter_type '{parameter_type}' or parameter_domain '{parameter_domain}'")
+        Returns:
+            bool: True if the parameter was successfully set, False if a texture path could not be loaded
+        """
+        accessor = _parameter_accessor(parameter_domain, parameter_type)
+        texture_path = value if accessor.parameter_type is ParameterType.TEXTURE and isinstance(value, str) else None
 
         if only_if_different:
-            # Get current value
-            current_value = LayeredMaterialLibrary.get_any_material_parameter_value(
-                instance,
-                parameter_name,
-                layer_index,
-                parameter_type,
-                parameter_domain)
-
-            # Compare values based on type
-            if parameter_type == 'scalar':
-                if abs(current_value - value) < 0.0001:  # Use small epsilon for float comparison
-                    return True
-            elif parameter_type in ('vector', 'channel_mask'):
-                # For LinearColor, compare each component
-                if (abs(current_value.r - value.r) < 0.0001 and
-                    abs(current_value.g - value.g) < 0.0001 and
-                    abs(current_value.b - value.b) < 0.0001 and
-                    abs(current_value.a - value.a) < 0.0001):
-                    return True
-            elif parameter_type == 'static_switch':
-                if current_value == value:
-                    return True
-            elif parameter_type == 'texture':
-                if current_value == value:  # Direct comparison for texture references
-                    return True
+            if accessor.takes_layer:
+                current_value = accessor.get(instance, parameter_name, layer_index)
+            else:
+                current_value = accessor.get(instance, parameter_name)
+            # Textures are compared by path, so an unchanged texture is not loaded
+            target_value = (texture_path or None) if texture_path is not None else value
+            if not compute_change_mask([accessor.parameter_type], [current_value], [target_value], tolerances)[0]:
+                return True
+
+        if texture_path is not None:
+            # An empty path clears the texture, a path that does not load is an error rather than a silent clear
+            value = get_default_resolver().resolve(texture_path) if texture_path else None
+            if value is None and texture_path:
+                print(f"Could not load texture '{texture_path}' for parameter {parameter_name}")
+                return False
 
         # Set the new value if we get here
-        if parameter_domain == 'global':
-            return func(instance, parameter_name, value)
-        else:
-            return func(instance, parameter_name, layer_index, value)
+        if _EDIT_SESSIONS:
+            session = _EDIT_SESSIONS.get(instance)
+            if session is not None:
+                return session.queue(parameter_name, value, layer_index, accessor.parameter_type, accessor.domain)
+
+        if accessor.takes_layer:
+            return accessor.set(instance, parameter_name, layer_index, value)
+        # Global setters live in MaterialEditingLibrary, which does not record edited packages
+        unreal.LayeredMaterialLibrary.track_edited_assets([instance])
+        return accessor.set(instance, parameter_name, value)
+
+    @staticmethod
+    def get_many_parameter_values(
+        instance: 'unreal.MaterialInstance',
+        specs: Sequence[ParameterSpec]
+    ) -> List[Union[float, 'unreal.LinearColor', bool, 'unreal.Texture']]:
+        """Get the values of many parameters at once.
+
+        Specs are grouped by domain and type so each group is read with the same native function in a tight
+        loop, instead of resolving the function for every parameter.
+
+        Args:
+            instance: The material instance to query
+            specs: Parameters to read. The value of each spec is ignored.
+
+        Returns:
+            list: The parameter values, in the same order as specs
+        """
+        values = [None] * len(specs)
+        for accessor, indices in _group_specs(specs):
+            get = accessor.get
+            if accessor.takes_layer:
+                for i in indices:
+                    spec = specs[i]
+                    values[i] = get(instance, spec.name, spec.layer_index)
+            else:
+                for i in indices:
+                    values[i] = get(instance, specs[i].name)
+        return values
+
+    @staticmethod
+    def set_many_parameter_values(
+        instance: 'unreal.MaterialInstanceConstant',
+        specs: Sequence[ParameterSpec],
+        only_if_different: bool = False,
+        resolver: Optional[AssetResolver] = None,
+        tolerances: Optional[Dict[str, Tuple[float, float]]] = None
+    ) -> List[bool]:
+        """Set the values of many parameters at once.
+
+        Specs are grouped by domain and type and each group is dispatched in a tight loop. If an edit session
+        is open on the instance, the edits are queued on it instead.
+
+        Args:
+            instance: The material instance to modify
+            specs: Parameters to set, each carrying its new value. Texture values may be given as asset paths, an
+                empty path clears the texture. A path that cannot be loaded fails its spec.
+            only_if_different: Only set parameters whose new value is different from the current value, see
+                get_change_mask. Unchanged texture paths are not even loaded.
+            resolver: Resolver used to load texture paths. Defaults to the shared resolver.
+            tolerances: (absolute, relative) tolerances per type used with only_if_different, see
+                material_values.compute_change_mask
+
+        Returns:
+            list[bool]: Whether each parameter was successfully set (or already had the value), in the same
+                order as specs
+        """
+        results = [True] * len(specs)
+        session = _EDIT_SESSIONS.get(instance) if _EDIT_SESSIONS else None
+        change_mask = LayeredMaterialLibrary.get_change_mask(instance, specs, tolerances) if only_if_different else None
+
+        for accessor, indices in _group_specs(specs):
+            parameter_type = accessor.parameter_type
+            if change_mask is not None:
+                indices = [i for i in indices if change_mask[i]]
+            values = [specs[i].value for i in indices]
+            if parameter_type is ParameterType.TEXTURE:
+                # Changed texture paths are loaded together, in one bulk pass
+                resolver = resolver or get_default_resolver()
+                resolver.preload(value for value in values if isinstance(value, str) and value)
+                resolved_indices, resolved_values = [], []
+                for i, value in zip(indices, values):
+                    if isinstance(value, str):
+                        path = value
+                        value = resolver.resolve(path) if path else None
+                        # Not set nor queued: a path that does not load would otherwise clear the texture
+                        if value is None and path:
+                            print(f"Could not load texture '{path}' for parameter {specs[i].name}")
+                            results[i] = False
+                            continue
+                    resolved_indices.append(i)
+                    resolved_values.append(value)
+                indices, values = resolved_indices, resolved_values
+
+            if session is not None:
+                for i, value in zip(indices, values):
+                    spec = specs[i]
+                    session.queue(spec.name, value, spec.layer_index, parameter_type, accessor.domain)
+            elif accessor.takes_layer:
+                set_value = accessor.set
+                for i, value in zip(indices, values):
+                    spec = specs[i]
+                    results[i] = set_value(instance, spec.name, spec.layer_index, value)
+            elif indices:
+                # Global setters live in MaterialEditingLibrary, which does not record edited packages
+                unreal.LayeredMaterialLibrary.track_edited_assets([instance])
+                set_value = accessor.set
+                for i, value in zip(indices, values):
+                    results[i] = set_value(instance, specs[i].name, value)
+        return results
 
     @staticmethod
     def get_any_parameter_source(
@@ -666,13 +1269,63 @@ class LayeredMaterialLibrary:
         return source_funcs[parameter_type](instance, parameter_name)
 
     @staticmethod
-    def get_full_material_as_dict(instance: 'unreal.MaterialInstance') -> dict:
+    def get_change_mask(
+        instance: 'unreal.MaterialInstance',
+        specs: Sequence[ParameterSpec],
+        tolerances: Optional[Dict[str, Tuple[float, float]]] = None
+    ) -> List[bool]:
+        """Find which specs would change the material instance.
+
+        Current values are read in a single native call and compared against the spec values per type, see
+        material_values.compute_change_mask. Parameters the instance does not expose count as changed, so
+        setting them reports the failure as usual.
+
+        Args:
+            instance: The material instance to compare against
+            specs: Parameters carrying their target values. Texture values may be given as asset paths.
+            tolerances: (absolute, relative) tolerance overrides per type, e.g. {'scalar': (0.001, 0.01)}
+
+        Returns:
+            list[bool]: True for every spec that needs applying, in the same order as specs
+        """
+        domains_by_association = _native_enums().domains_by_association
+        current_by_key = {}
+        # Textures are compared by path, so nothing is loaded
+        values = LayeredMaterialLibrary.get_all_layered_parameter_values(instance, load_textures=False)
+        for info, value in _iter_parameter_values(values, texture_paths=True):
+            current_by_key[(domains_by_association[info.association], info.layer_index, str(info.parameter_name))] = value
+
+        parameter_types = []
+        current_values = []
+        missing = []
+        for i, spec in enumerate(specs):
+            domain, parameter_type = _parameter_key(spec.parameter_domain, spec.parameter_type)
+            key = (domain, 0 if domain is ParameterDomain.GLOBAL else spec.layer_index, spec.name)
+            parameter_types.append(parameter_type)
+            current_values.append(current_by_key.get(key))
+            if key not in current_by_key:
+                missing.append(i)
+
+        mask = compute_change_mask(parameter_types, current_values, [spec.value for spec in specs], tolerances)
+        for i in missing:
+            mask[i] = True
+        return mask
+
+    @staticmethod
+    def get_full_material_as_dict(instance: 'unreal.MaterialInstance', load_textures: bool = False) -> dict:
         """Get a comprehensive dictionary of material information.
 
         This includes global parameters, layer assets, blend assets, and their respective parameters.
+        Parameters are enumerated once together with their association and layer index, so each layer and
+        blend only reports the parameters it actually exposes.
+
+        Texture values are soft object paths (None for no texture) read from the override data of the instance,
+        so snapshotting does not load textures or keep them resident. The apply functions only load a texture
+        path when it differs from the current value.
 
         Args:
             instance (unreal.MaterialInstance): The material instance to query.
+            load_textures (bool): Store texture values as loaded unreal.Texture objects instead of paths
 
         Returns:
             dict: A dictionary containing all material information structured as:
@@ -700,144 +1353,524 @@ class LayeredMaterialLibrary:
             'layers': {}
         }
 
-        def get_parameters_for_domain(inst, layer_idx, domain):
-            params = {}
-            # Get parameter names
-            scalar_params = unreal.MaterialEditingLibrary.get_scalar_parameter_names(inst)
-            vector_params = unreal.MaterialEditingLibrary.get_vector_parameter_names(inst)
-            switch_params = unreal.MaterialEditingLibrary.get_static_switch_parameter_names(inst)
-            texture_params = unreal.MaterialEditingLibrary.get_texture_parameter_names(inst)
-
-            def add_param(name, param_type):
-                try:
-                    value = LayeredMaterialLibrary.get_any_material_parameter_value(
-                        inst, name, layer_idx, param_type, domain
-                    )
-                    param_key = f"{name}_{layer_idx}"
-                    params[param_key] = {
-                        'value': value,
-                        'type': param_type,
-                        'domain': domain,
-                        'layerIndex': layer_idx,
-                        'name': name
-                    }
-                except:
-                    pass
-
-            for name in scalar_params:
-                add_param(name, 'scalar')
-            for name in vector_params:
-                add_param(name, 'vector')
-            for name in switch_params:
-                add_param(name, 'static_switch')
-            for name in texture_params:
-                add_param(name, 'texture')
-
-            return params
+        # Every parameter value is read in one native call, already tagged with its association and
+        # layer index, so nothing has to be probed
+        values = LayeredMaterialLibrary.get_all_layered_parameter_values(instance, load_textures)
+        stack = LayeredMaterialLibrary.get_layer_stack(instance)
 
-        # Get global parameters
-        result['global']['parameters'] = get_parameters_for_domain(instance, 0, 'global')
-
-        # Get layer information
-        layer_count = LayeredMaterialLibrary.get_layer_count(instance)
-        for layer_idx in range(layer_count):
-            # Get layer and blend assets
-            layer_asset = None  # You'll need to implement a way to get the layer asset
-            blend_asset = None  # You'll need to implement a way to get the blend asset
-
-            layer_name = f"Layer_{layer_idx}"  # You might want to get actual layer names if possible
-
-            result['layers'][layer_name] = {
+        for layer_idx, layer_asset in enumerate(stack.layers):
+            layer_data = {
                 'layerIndex': layer_idx,
                 'layerAsset': {
                     'path': layer_asset.get_path_name() if layer_asset else None,
-                    'parameters': get_parameters_for_domain(instance, layer_idx, 'layer')
+                    'parameters': {}
                 }
             }
 
             # Don't add blend asset for base layer
             if layer_idx > 0:
-                result['layers'][layer_name]['blendAsset'] = {
+                blend_asset = stack.blends[layer_idx - 1] if layer_idx - 1 < len(stack.blends) else None
+                layer_data['blendAsset'] = {
                     'path': blend_asset.get_path_name() if blend_asset else None,
-                    'parameters': get_parameters_for_domain(instance, layer_idx, 'blend')
+                    'parameters': {}
                 }
 
+            result['layers'][f"Layer_{layer_idx}"] = layer_data
+
+        native_enums = _native_enums()
+        for info, value in _iter_parameter_values(values, texture_paths=not load_textures):
+            domain = native_enums.domains_by_association[info.association]
+            parameter_type = native_enums.types_by_native_type[info.parameter_type]
+            name = str(info.parameter_name)
+            layer_idx = info.layer_index
+
+            if domain is ParameterDomain.GLOBAL:
+                params = result['global']['parameters']
+            else:
+                layer_data = result['layers'].get(f"Layer_{layer_idx}")
+                asset_key = 'layerAsset' if domain is ParameterDomain.LAYER else 'blendAsset'
+                if layer_data is None or asset_key not in layer_data:
+                    continue
+                params = layer_data[asset_key]['parameters']
+
+            params[f"{name}_{layer_idx}"] = {
+                'value': value,
+                'type': parameter_type.value,
+                'domain': domain.value,
+                'layerIndex': layer_idx,
+                'name': name
+            }
+
         return result
 
     @staticmethod
     def create_full_material_from_dict(
         instance: 'unreal.MaterialInstanceConstant',
-        material_data: dict
+        material_data: dict,
+        resolver: Optional[AssetResolver] = None
     ) -> bool:
         """Create or modify a layered material using a comprehensive dictionary of parameters.
 
         Args:
             instance: Material instance to modify
             material_data: Dictionary containing material definition as returned by get_parameter_info
+            resolver: Resolver used to load layer and blend paths. Defaults to the shared resolver.
 
         Returns:
             bool: True if successful
         """
+        resolver = resolver or get_default_resolver()
         try:
-            # Set global parameters
-            if 'global' in material_data and 'parameters' in material_data['global']:
-                for param_info in material_data['global']['parameters'].values():
-                    LayeredMaterialLibrary.set_any_material_parameter_value(
-                        instance=instance,
-                        parameter_name=param_info['name'],
-                        value=param_info['value'],
-                        parameter_type=param_info['type'],
-                        parameter_domain='global'
-                    )
-
-            # Process layers
-            if 'layers' in material_data:
-                for layer_name, layer_data in material_data['layers'].items():
+            # Resolve the whole layer stack first so it is committed in one native call
+            layer_assets = {}
+            blend_assets = {}
+            layers = list(material_data.get('layers', {}).values())
+            for layer_data in layers:
+                layer_idx = layer_data['layerIndex']
+                if 'layerAsset' in layer_data and layer_data['layerAsset']['path']:
+                    layer_asset = resolver.resolve(layer_data['layerAsset']['path'])
+                    if layer_asset:
+                        layer_assets[layer_idx] = layer_asset
+
+                # Skip blend for base layer
+                if layer_idx > 0 and 'blendAsset' in layer_data and layer_data['blendAsset']['path']:
+                    blend_asset = resolver.resolve(layer_data['blendAsset']['path'])
+                    if blend_asset:
+                        blend_assets[layer_idx] = blend_asset
+
+            if layer_assets or blend_assets:
+                layer_count = max(LayeredMaterialLibrary.get_layer_count(instance),
+                                  max(list(layer_assets) + list(blend_assets)) + 1)
+                LayeredMaterialLibrary.set_layer_stack(
+                    instance,
+                    [layer_assets.get(layer_idx) for layer_idx in range(layer_count)],
+                    [blend_assets.get(layer_idx) for layer_idx in range(1, layer_count)]
+                )
+
+            # Parameters are queued and applied with a single refresh when the session closes
+            with LayeredMaterialLibrary.edit_session(instance):
+                # Set global parameters
+                if 'global' in material_data and 'parameters' in material_data['global']:
+                    for param_info in material_data['global']['parameters'].values():
+                        LayeredMaterialLibrary.set_any_material_parameter_value(
+                            instance=instance,
+                            parameter_name=param_info['name'],
+                            value=param_info['value'],
+                            parameter_type=param_info['type'],
+                            parameter_domain='global'
+                        )
+
+                # Set the parameters of every assigned layer and blend
+                for layer_data in layers:
                     layer_idx = layer_data['layerIndex']
-
-                    # Assign layer asset
-                    if 'layerAsset' in layer_data and layer_data['layerAsset']['path']:
-                        layer_asset = unreal.load_object(None, layer_data['layerAsset']['path'])
-                        if layer_asset:
-                            LayeredMaterialLibrary.assign_layer_material(
-                                instance, layer_idx, layer_asset
-                            )
-
-                            # Set layer parameters
-                            for param_info in layer_data['layerAsset']['parameters'].values():
-                                LayeredMaterialLibrary.set_any_material_parameter_value(
-                                    instance=instance,
-                                    parameter_name=param_info['name'],
-                                    value=param_info['value'],
-                                    layer_index=layer_idx,
-                                    parameter_type=param_info['type'],
-                                    parameter_domain='layer'
-                                )
-
-                    # Assign blend asset (skip for base layer)
-                    if layer_idx > 0 and 'blendAsset' in layer_data and layer_data['blendAsset']['path']:
-                        blend_asset = unreal.load_object(None, layer_data['blendAsset']['path'])
-                        if blend_asset:
-                            LayeredMaterialLibrary.assign_blend_layer(
-                                instance, layer_idx, blend_asset
+                    for asset_key, domain, assets in (('layerAsset', 'layer', layer_assets),
+                                                      ('blendAsset', 'blend', blend_assets)):
+                        if layer_idx not in assets:
+                            continue
+                        for param_info in layer_data[asset_key]['parameters'].values():
+                            LayeredMaterialLibrary.set_any_material_parameter_value(
+                                instance=instance,
+                                parameter_name=param_info['name'],
+                                value=param_info['value'],
+                                layer_index=layer_idx,
+                                parameter_type=param_info['type'],
+                                parameter_domain=domain
                             )
 
-                            # Set blend parameters
-                            for param_info in layer_data['blendAsset']['parameters'].values():
-                                LayeredMaterialLibrary.set_any_material_parameter_value(
-                                    instance=instance,
-                                    parameter_name=param_info['name'],
-                                    value=param_info['value'],
-                                    layer_index=layer_idx,
-                                    parameter_type=param_info['type'],
-                                    parameter_domain='blend'
-                                )
-
             return True
         except Exception as e:
             print(f"Error creating material from dictionary: {e}")
             return False
 
+    @staticmethod
+    def apply_material_dict(
+        instance: 'unreal.MaterialInstanceConstant',
+        material_data: dict,
+        mode: str = 'diff',
+        resolver: Optional[AssetResolver] = None,
+        tolerances: Optional[Dict[str, Tuple[float, float]]] = None
+    ) -> dict:
+        """Apply a material dictionary, touching only what actually differs from the instance.
+
+        In 'diff' mode the instance is snapshotted first and only the layer stack changes and parameters whose
+        value differs (within tolerances) are applied, so re-applying a mostly identical preset is cheap and
+        does not enable the override checkbox of parameters that already match. In 'full' mode every layer
+        asset and parameter in the dictionary is applied, like `create_full_material_from_dict`.
+
+        Args:
+            instance: Material instance to modify
+            material_data: Dictionary containing material definition as returned by get_full_material_as_dict
+            mode: 'diff' to apply only the differences, 'full' to apply everything
+            resolver: Resolver used to load layer, blend and texture paths. Defaults to the shared resolver.
+            tolerances: (absolute, relative) tolerance overrides per type used in 'diff' mode, see
+                material_values.compute_change_mask
+
+        Returns:
+            dict: Report of the applied changes, in the format returned by `diff_material_dicts`, with a 'failed'
+                list describing what could not be applied: layer or blend assets that failed to load or assign,
+                and parameters that failed to set. Parameters of a layer or blend whose asset failed are not
+                applied to the function still assigned.
+        """
+        if mode == 'diff':
+            current = LayeredMaterialLibrary.get_full_material_as_dict(instance)
+        elif mode == 'full':
+            # Only the layer count is needed, every asset and parameter will count as changed
+            current = {'layers': {
+                f"Layer_{layer_idx}": {'layerIndex': layer_idx}
+                for layer_idx in range(LayeredMaterialLibrary.get_layer_count(instance))
+            }}
+        else:
+            raise ValueError(f"Invalid mode '{mode}', expected 'diff' or 'full'")
+
+        changes = diff_material_dicts(current, material_data, tolerances)
+        changes['failed'] = []
+        resolver = resolver or get_default_resolver()
+
+        # Slots whose parameters cannot be applied because their asset was not assigned
+        failed_slots = set()
+        if changes['layersAdded'] or changes['layerAssets'] or changes['blendAssets']:
+            # The whole stack is committed in one native call
+            assets = {}
+            for asset_key, domain in (('layerAssets', 'layer'), ('blendAssets', 'blend')):
+                assets[asset_key] = {}
+                for layer_idx, path in list(changes[asset_key].items()):
+                    asset = resolver.resolve(path)
+                    if asset:
+                        assets[asset_key][layer_idx] = asset
+                    else:
+                        del changes[asset_key][layer_idx]
+                        changes['failed'].append(f"{domain} {layer_idx} asset '{path}'")
+                        failed_slots.add((domain, layer_idx))
+
+            layer_count = len(current['layers']) + changes['layersAdded']
+            if not LayeredMaterialLibrary.set_layer_stack(
+                instance,
+                [assets['layerAssets'].get(layer_idx) for layer_idx in range(layer_count)],
+                [assets['blendAssets'].get(layer_idx) for layer_idx in range(1, layer_count)]
+            ):
+                for asset_key, domain in (('layerAssets', 'layer'), ('blendAssets', 'blend')):
+                    for layer_idx, path in changes[asset_key].items():
+                        changes['failed'].append(f"{domain} {layer_idx} asset '{path}'")
+                        failed_slots.add((domain, layer_idx))
+                    changes[asset_key] = {}
+
+        specs = []
+        for spec in changes['parameters']:
+            if (ParameterDomain(spec.parameter_domain).value, spec.layer_index) in failed_slots:
+                changes['failed'].append(_describe_spec(spec))
+            else:
+                specs.append(spec)
+        changes['parameters'] = specs
+
+        if specs:
+            with LayeredMaterialLibrary.edit_session(instance):
+                results = LayeredMaterialLibrary.set_many_parameter_values(instance, specs, resolver=resolver)
+            changes['failed'] += [_describe_spec(spec) for spec, result in zip(specs, results) if not result]
+
+        return changes
+
+    # Instrumentation
+
+    @staticmethod
+    def stats() -> Dict[Tuple[str, str, str], dict]:
+        """Get the call counts and latencies recorded since instrumentation was enabled.
+
+        Recording is opt-in, see `instrumentation.enable` or `measure`. Native timings are available separately
+        through `stat LayeredMaterialLibrary` and the Unreal Insights CPU trace.
+
+        Returns:
+            dict[tuple, dict]: (domain, type, operation) -> 'count', 'total', 'mean' and 'max' (seconds) and
+                'histogram' (bucket upper bound in microseconds -> number of calls)
+        """
+        return instrumentation.stats()
+
+    @staticmethod
+    def print_stats() -> None:
+        """Print the recorded stats as a table, slowest total first."""
+        print(instrumentation.format_stats())
+
+    @staticmethod
+    def measure() -> ContextManager['instrumentation.MeasurementWindow']:
+        """Record the library calls made inside a with block.
+
+        Returns:
+            ContextManager[instrumentation.MeasurementWindow]: Yields the window, filled with the calls made
+                inside the block once it exits
+
+        Example:
+            >>> with LayeredMaterialLibrary.measure() as window:
+            ...     LayeredMaterialLibrary.apply_material_dict(instance, material_data)
+            >>> print(window.report())
+        """
+        return instrumentation.measure()
+
+
+
+class _ParameterAccessor(NamedTuple):
+    """Native getter and setter for one (domain, type) pair."""
+    domain: ParameterDomain
+    parameter_type: ParameterType
+    get: Callable
+    set: Callable
+    takes_layer: bool
+
+
+def _build_parameter_registry() -> Dict[tuple, _ParameterAccessor]:
+    """Build the (domain, type) -> accessor registry used by the convenience methods.
+
+    Layer and blend accessors call the native library directly; the Python setters are only needed for edit
+    session routing, which the convenience methods handle themselves. Each accessor is registered under both
+    its enum key and its string key so the string-based API needs no conversion.
+    """
+    native = unreal.LayeredMaterialLibrary
+    editing = unreal.MaterialEditingLibrary
+    functions = {
+        ParameterDomain.LAYER: {
+            ParameterType.SCALAR: (native.get_layered_material_scalar_parameter_value,
+                                   native.set_layered_material_scalar_parameter_value),
+            ParameterType.VECTOR: (native.get_layered_material_vector_parameter_value,
+                                   native.set_layered_material_vector_parameter_value),
+            ParameterType.STATIC_SWITCH: (native.get_layered_material_static_switch_parameter_value,
+                                          native.set_layered_material_static_switch_parameter_value),
+            ParameterType.TEXTURE: (native.get_layered_material_texture_parameter_value,
+                                    native.set_layered_material_texture_parameter_value),
+            ParameterType.CHANNEL_MASK: (native.get_layered_material_channel_mask_parameter_value,
+                                         native.set_layered_material_channel_mask_parameter_value)
+        },
+        ParameterDomain.BLEND: {
+            ParameterType.SCALAR: (native.get_layered_material_blend_scalar_parameter_value,
+                                   native.set_layered_material_blend_scalar_parameter_value),
+            ParameterType.VECTOR: (native.get_layered_material_blend_vector_parameter_value,
+                                   native.set_layered_material_blend_vector_parameter_value),
+            ParameterType.STATIC_SWITCH: (native.get_layered_material_blend_static_switch_parameter_value,
+                                          native.set_layered_material_blend_static_switch_parameter_value),
+            ParameterType.TEXTURE: (native.get_layered_material_blend_texture_parameter_value,
+                                    native.set_layered_material_blend_texture_parameter_value),
+            ParameterType.CHANNEL_MASK: (native.get_layered_material_blend_channel_mask_parameter_value,
+                                         native.set_layered_material_blend_channel_mask_parameter_value)
+        },
+        ParameterDomain.GLOBAL: {
+            ParameterType.SCALAR: (editing.get_material_instance_scalar_parameter_value,
+                                   editing.set_material_instance_scalar_parameter_value),
+            ParameterType.VECTOR: (editing.get_material_instance_vector_parameter_value,
+                                   editing.set_material_instance_vector_parameter_value),
+            ParameterType.STATIC_SWITCH: (editing.get_material_instance_static_switch_parameter_value,
+                                          editing.set_material_instance_static_switch_parameter_value),
+            ParameterType.TEXTURE: (editing.get_material_instance_texture_parameter_value,
+                                    editing.set_material_instance_texture_parameter_value),
+            ParameterType.CHANNEL_MASK: (native.get_material_instance_channel_mask_parameter_value,
+                                         native.set_material_instance_channel_mask_parameter_value)
+        }
+    }
+
+    registry = {}
+    for domain, type_functions in functions.items():
+        for parameter_type, (get, set_value) in type_functions.items():
+            accessor = _ParameterAccessor(domain, parameter_type, get, set_value, domain is not ParameterDomain.GLOBAL)
+            registry[(domain, parameter_type)] = accessor
+            registry[(domain.value, parameter_type.value)] = accessor
+    return registry
+
+
+# Built on first use so importing this module does not need unreal
+_PARAMETER_REGISTRY = None
+
+
+def _parameter_accessor(
+    parameter_domain: Union[ParameterDomain, str],
+    parameter_type: Union[ParameterType, str]
+) -> _ParameterAccessor:
+    """Look up the accessor for a domain and type given as enums or strings."""
+    global _PARAMETER_REGISTRY
+    registry = _PARAMETER_REGISTRY
+    if registry is None:
+        registry = _PARAMETER_REGISTRY = _build_parameter_registry()
+    accessor = registry.get((parameter_domain, parameter_type))
+    if accessor is None:
+        # Mixed enum and string keys, or an invalid pair which _parameter_key reports
+        accessor = registry[_parameter_key(parameter_domain, parameter_type)]
+    return accessor
+
+
+def _group_specs(specs: Sequence[ParameterSpec]) -> Iterator[Tuple[_ParameterAccessor, List[int]]]:
+    """Group spec indices by accessor, preserving the order of the specs within each group."""
+    groups = defaultdict(list)
+    for i, spec in enumerate(specs):
+        groups[(spec.parameter_domain, spec.parameter_type)].append(i)
+
+    # String and enum keys for the same pair resolve to one accessor, so merge their groups
+    merged = {}
+    for key, indices in groups.items():
+        accessor = _parameter_accessor(*key)
+        if accessor in merged:
+            merged[accessor] = sorted(merged[accessor] + indices)
+        else:
+            merged[accessor] = indices
+    return iter(merged.items())
+
+
+def diff_material_dicts(
+    current: Optional[dict],
+    target: dict,
+    tolerances: Optional[Dict[str, Tuple[float, float]]] = None
+) -> dict:
+    """Compute the minimal set of changes that turns one material dictionary into another.
+
+    A parameter counts as changed if its value differs beyond its tolerance, if it is missing from current, or if
+    the layer or blend asset it belongs to is reassigned (its current value then belongs to another asset).
+    Values are compared with material_values.compute_change_mask, like get_change_mask, see diff_material_state.
+
+    Args:
+        current: Current material dictionary, as returned by get_full_material_as_dict. None counts as empty.
+        target: Material dictionary to reach
+        tolerances: (absolute, relative) tolerance overrides per type, merged over
+            material_values.DEFAULT_TOLERANCES
+
+    Returns:
+        dict: The change set, structured as:
+            {
+                'layersAdded': int,               # Layers to append to reach the target layer count
+                'layerAssets': {int: str},        # Layer index -> layer asset path to assign
+                'blendAssets': {int: str},        # Layer index -> blend asset path to assign
+                'parameters': [ParameterSpec],    # Parameters to set, with their target values
+                'unchanged': int                  # Parameters that already match
+            }
+    """
+    current = current or {}
+    return diff_material_state(
+        _index_material_layers(current),
+        _index_material_layers(target),
+        {key: (param_info['type'], param_info['value'])
+         for key, param_info in _index_material_parameters(current).items()},
+        [(key, param_info['type'], param_info['value'])
+         for key, param_info in _index_material_parameters(target).items()],
+        tolerances
+    )
+
+
+def diff_material_state(
+    current_layers: Dict[int, Tuple[Optional[str], Optional[str]]],
+    target_layers: Dict[int, Tuple[Optional[str], Optional[str]]],
+    current_parameters: Dict[tuple, Tuple[Any, Any]],
+    target_parameters: Sequence[Tuple[tuple, Any, Any]],
+    tolerances: Optional[Dict[str, Tuple[float, float]]] = None
+) -> dict:
+    """Compute the change set between two material states, the rules shared by every diff of the library.
+
+    diff_material_dicts and MaterialSnapshot.diff only differ in how they index their inputs, both compare
+    through here.
+
+    Args:
+        current_layers: Layer index -> (layer asset path, blend asset path) of the current stack, None where no
+            asset is assigned (and for the blend of the base layer)
+        target_layers: Layer index -> (layer asset path, blend asset path) to reach, None keeps the current asset
+        current_parameters: (domain, layer index, name) -> (type, value) of the current parameters. Domains and
+            types may be enum members or their string values, as long as both sides use the same.
+        target_parameters: (key, type, value) of every target parameter, in the order they are reported
+        tolerances: (absolute, relative) tolerance overrides per type, merged over
+            material_values.DEFAULT_TOLERANCES
+
+    Returns:
+        dict: The change set, in the format returned by diff_material_dicts. The ParameterSpecs carry the
+            domains and types they were given.
+    """
+    changes = {
+        'layersAdded': max(0, max(target_layers, default=-1) + 1 - len(current_layers)),
+        'layerAssets': {},
+        'blendAssets': {},
+        'parameters': [],
+        'unchanged': 0
+    }
+
+    # (domain, layer index) of the reassigned slots, whose parameters always count as changed
+    reassigned = set()
+    for layer_idx in sorted(target_layers):
+        current_paths = current_layers.get(layer_idx, (None, None))
+        for slot, domain, changes_key in ((0, ParameterDomain.LAYER, 'layerAssets'),
+                                          (1, ParameterDomain.BLEND, 'blendAssets')):
+            # Base layer has no blend
+            if slot == 1 and layer_idx == 0:
+                continue
+            path = target_layers[layer_idx][slot]
+            if path and path != current_paths[slot]:
+                changes[changes_key][layer_idx] = path
+                reassigned.add((domain, layer_idx))
+
+    # Parameters that can still match are compared together, then reported in target order
+    compared = []
+    current_values = []
+    for i, (key, parameter_type, _) in enumerate(target_parameters):
+        current_entry = current_parameters.get(key)
+        if (current_entry is not None and current_entry[0] == parameter_type
+                and not (reassigned and (ParameterDomain(key[0]), key[1]) in reassigned)):
+            compared.append(i)
+            current_values.append(current_entry[1])
+    changed = [True] * len(target_parameters)
+    change_mask = compute_change_mask([target_parameters[i][1] for i in compared], current_values,
+                                      [target_parameters[i][2] for i in compared], tolerances)
+    for i, parameter_changed in zip(compared, change_mask):
+        changed[i] = parameter_changed
+
+    for ((domain, layer_idx, name), parameter_type, value), parameter_changed in zip(target_parameters, changed):
+        if parameter_changed:
+            changes['parameters'].append(ParameterSpec(name, parameter_type, domain, layer_idx, value))
+        else:
+            changes['unchanged'] += 1
+
+    return changes
+
+
+def _describe_spec(spec: ParameterSpec) -> str:
+    """Describe the parameter of a spec for a report, e.g. "layer 1 parameter 'Roughness'"."""
+    domain = ParameterDomain(spec.parameter_domain)
+    if domain is ParameterDomain.GLOBAL:
+        return f"global parameter '{spec.name}'"
+    return f"{domain.value} {spec.layer_index} parameter '{spec.name}'"
+
+
+def _index_material_layers(material_data: dict) -> Dict[int, Tuple[Optional[str], Optional[str]]]:
+    """Map each layer index of a material dictionary to its (layer asset path, blend asset path)."""
+    return {
+        layer_data['layerIndex']: ((layer_data.get('layerAsset') or {}).get('path'),
+                                   (layer_data.get('blendAsset') or {}).get('path'))
+        for layer_data in material_data.get('layers', {}).values()
+    }
+
+
+def _index_material_parameters(material_data: dict) -> Dict[Tuple[str, int, str], dict]:
+    """Map (domain, layer index, name) to each parameter entry of a material dictionary."""
+    index = {}
+    for param_info in material_data.get('global', {}).get('parameters', {}).values():
+        index[('global', 0, param_info['name'])] = param_info
+
+    for layer_data in material_data.get('layers', {}).values():
+        layer_idx = layer_data['layerIndex']
+        for asset_key, domain in (('layerAsset', 'layer'), ('blendAsset', 'blend')):
+            for param_info in (layer_data.get(asset_key) or {}).get('parameters', {}).values():
+                index[(domain, layer_idx, param_info['name'])] = param_info
+    return index
+
+
+def _iter_parameter_values(
+    values: 'unreal.LayeredParameterValues',
+    texture_paths: bool = False
+) -> Iterator[Tuple['unreal.LayeredParameterInfo', Any]]:
+    """Iterate over (info, value) pairs of every type in a bulk parameter read.
+
+    With texture_paths, texture values are their paths, or None for no texture, instead of the loaded textures.
+    """
+    if texture_paths:
+        textures = [str(path) or None for path in values.texture_paths]
+    else:
+        textures = values.texture_values
+    for infos, type_values in (
+        (values.scalar_infos, values.scalar_values),
+        (values.vector_infos, values.vector_values),
+        (values.static_switch_infos, values.static_switch_values),
+        (values.texture_infos, textures),
+        (values.channel_mask_infos, values.channel_mask_values)
+    ):
+        yield from zip(infos, type_values)
 
 
 '''
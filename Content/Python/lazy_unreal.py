@@ -0,0 +1,48 @@
+import importlib
+from types import ModuleType
+from typing import Any, Optional
+
+
+class LazyModule:
+    """Stand-in for a module that is only imported when one of its attributes is first used.
+
+    Attributes are cached on the stand-in once resolved, so reading a name again costs the same as reading it
+    from the real module.
+
+    Example:
+        >>> unreal = LazyModule('unreal')  # Nothing imported yet
+        >>> color = unreal.LinearColor(1, 0, 0, 0)  # Imports unreal
+    """
+
+    def __init__(self, name: str, missing_message: Optional[str] = None):
+        self.__dict__['_name'] = name
+        self.__dict__['_missing_message'] = missing_message or f"The {name} module is not installed"
+        self.__dict__['_module'] = None
+
+    def __getattr__(self, attribute: str) -> Any:
+        value = getattr(self._load(), attribute)
+        self.__dict__[attribute] = value
+        return value
+
+    def __setattr__(self, attribute: str, value: Any) -> None:
+        # Patch the real module too, so code holding it directly sees the same value
+        setattr(self._load(), attribute, value)
+        self.__dict__[attribute] = value
+
+    def _load(self) -> ModuleType:
+        module = self.__dict__['_module']
+        if module is None:
+            try:
+                module = importlib.import_module(self._name)
+            except ImportError as e:
+                raise ImportError(self._missing_message) from e
+            self.__dict__['_module'] = module
+        return module
+
+    def is_loaded(self) -> bool:
+        """Whether the real module has been imported through this stand-in."""
+        return self.__dict__['_module'] is not None
+
+
+# The unreal module, imported on first use so the pure data helpers can be imported outside the editor
+unreal = LazyModule('unreal', "The unreal module is only available inside the Unreal Editor")
@@ -0,0 +1,238 @@
+import json
+import os
+import time
+from lazy_unreal import unreal
+from asset_resolver import AssetResolver, get_default_resolver
+from layered_material_library import LayeredMaterialLibrary
+from material_values import material_dict_from_plain
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Set
+
+
+class BatchProgress(NamedTuple):
+    """Progress of a batch run, reported after every chunk.
+
+    Attributes:
+        done (int): Assets processed in this run, successful or not
+        total (int): Assets to process in this run (excluding those skipped from the journal)
+        failed (int): Assets that failed in this run
+        elapsed (float): Seconds since the run started
+        assets_per_second (float): Average throughput of this run
+        eta_seconds (float): Estimated seconds until the run completes
+    """
+    done: int
+    total: int
+    failed: int
+    elapsed: float
+    assets_per_second: float
+    eta_seconds: float
+
+
+class MaterialBatchRunner:
+    """Applies a manifest of material edits to many instances, resumably.
+
+    The manifest maps material instance paths to edit specs (material dictionaries, as returned by
+    get_full_material_as_dict). Assets are processed in chunks: each chunk is bulk loaded, edited, saved, and
+    then one journal line per asset is appended and flushed to disk. When a run is restarted with the same
+    journal, every asset already journaled as done is skipped, so a crashed multi-hour job resumes where it
+    stopped instead of starting over.
+
+    Attributes:
+        manifest (dict[str, dict]): Asset path -> edit spec
+        journal_path (str): Path of the JSONL journal file
+        chunk_size (int): Number of assets loaded, edited and saved together
+        mode (str): 'diff' to apply specs with apply_material_dict, 'full' to use create_full_material_from_dict
+        apply_function (Callable): Optional custom edit function called as apply_function(instance, spec),
+            returning True on success. Overrides mode.
+        retry_failed (bool): Whether assets journaled as failed are processed again
+        resolver (AssetResolver): Resolver used for layer, blend and texture paths
+
+    Example:
+        >>> manifest = load_manifest('C:/Jobs/presets.json')
+        >>> runner = MaterialBatchRunner(manifest, 'C:/Jobs/presets.journal.jsonl', chunk_size=200)
+        >>> report = runner.run()
+        >>> print(f"{report['succeeded']} done, {report['failed']} failed")
+    """
+
+    def __init__(
+        self,
+        manifest: Dict[str, dict],
+        journal_path: str,
+        chunk_size: int = 100,
+        mode: str = 'diff',
+        apply_function: Optional[Callable[['unreal.MaterialInstanceConstant', dict], bool]] = None,
+        retry_failed: bool = False,
+        resolver: Optional[AssetResolver] = None,
+        progress_callback: Optional[Callable[[BatchProgress], None]] = None
+    ):
+        if mode not in ('diff', 'full'):
+            raise ValueError(f"Invalid mode '{mode}', expected 'diff' or 'full'")
+        self.manifest = manifest
+        self.journal_path = journal_path
+        self.chunk_size = max(1, chunk_size)
+        self.mode = mode
+        self.apply_function = apply_function
+        self.retry_failed = retry_failed
+        self.resolver = resolver or get_default_resolver()
+        self.progress_callback = progress_callback or _print_progress
+
+    def journaled_paths(self) -> Set[str]:
+        """Read the journal and get the assets that do not need processing again.
+
+        Returns:
+            set[str]: Paths journaled as done, plus those journaled as failed unless retry_failed is set
+        """
+        if not os.path.exists(self.journal_path):
+            return set()
+
+        statuses = {}
+        with open(self.journal_path, 'r', encoding='utf-8') as journal:
+            for line in journal:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A torn last line from a crash mid-write, the asset simply gets processed again
+                    continue
+                statuses[entry['path']] = entry['status']
+
+        skipped = {'done'} if self.retry_failed else {'done', 'failed'}
+        return {path for path, status in statuses.items() if status in skipped}
+
+    def run(self) -> dict:
+        """Process every asset of the manifest that is not journaled yet.
+
+        Returns:
+            dict: 'succeeded', 'failed' and 'skipped' asset counts, 'elapsed' seconds and 'assetsPerSecond'
+        """
+        journaled = self.journaled_paths()
+        pending = [path for path in self.manifest if path not in journaled]
+
+        start = time.perf_counter()
+        succeeded = 0
+        failed = 0
+
+        with open(self.journal_path, 'a', encoding='utf-8') as journal:
+            for chunk in _chunks(pending, self.chunk_size):
+                results = self._process_chunk(chunk)
+
+                for path, error in results.items():
+                    entry = {'path': path, 'status': 'failed' if error else 'done', 'time': time.time()}
+                    if error:
+                        entry['error'] = error
+                        failed += 1
+                    else:
+                        succeeded += 1
+                    journal.write(json.dumps(entry) + '\n')
+                journal.flush()
+                os.fsync(journal.fileno())
+
+                done = succeeded + failed
+                elapsed = time.perf_counter() - start
+                rate = done / elapsed if elapsed > 0 else 0.0
+                eta = (len(pending) - done) / rate if rate > 0 else 0.0
+                self.progress_callback(BatchProgress(done, len(pending), failed, elapsed, rate, eta))
+
+                # Let the editor release the chunk before loading the next one
+                unreal.SystemLibrary.collect_garbage()
+
+        elapsed = time.perf_counter() - start
+        return {
+            'succeeded': succeeded,
+            'failed': failed,
+            'skipped': len(self.manifest) - len(pending),
+            'elapsed': elapsed,
+            'assetsPerSecond': (succeeded + failed) / elapsed if elapsed > 0 else 0.0
+        }
+
+    def _process_chunk(self, chunk: List[str]) -> Dict[str, Optional[str]]:
+        """Load, edit and save a chunk of assets.
+
+        Returns:
+            dict[str, Optional[str]]: Asset path -> error message, or None if the asset was edited and saved
+        """
+        results = {}
+        instances = unreal.LayeredMaterialLibrary.load_objects_by_path(chunk)
+        # Diff applies only load the textures that change, the other modes set every texture
+        preload_textures = self.mode != 'diff' or self.apply_function is not None
+        self.resolver.preload_material_dicts((self.manifest[path] for path in chunk), textures=preload_textures)
+
+        edited = {}
+        for path, instance in zip(chunk, instances):
+            if not isinstance(instance, unreal.MaterialInstanceConstant):
+                results[path] = 'Not a MaterialInstanceConstant or failed to load'
+                continue
+            try:
+                if self._apply(instance, self.manifest[path]):
+                    results[path] = None
+                    edited[path] = instance
+                else:
+                    results[path] = 'Edit failed'
+            except Exception as e:
+                results[path] = str(e)
+
+        # One bulk save per chunk, only assets journaled as done are guaranteed to be on disk
+        if edited:
+            for path in self._save(edited):
+                results[path] = 'Save failed'
+        return results
+
+    def _save(self, edited: Dict[str, 'unreal.MaterialInstanceConstant']) -> List[str]:
+        """Save the edited instances that actually changed.
+
+        Packages the library recorded as edited are saved in bulk through flush_saves, so an asset whose diff was
+        empty (e.g. in a resumed run) is not written again. Edits a custom apply_function made outside the library
+        are not recorded, so the dirty ones among the other instances are saved as well.
+
+        Returns:
+            list[str]: Paths of the assets that failed to save
+        """
+        package_names = {path: instance.get_path_name().split('.')[0] for path, instance in edited.items()}
+        tracked = set(LayeredMaterialLibrary.get_edited_packages()).intersection(package_names.values())
+        failed = []
+        if tracked:
+            LayeredMaterialLibrary.flush_saves(chunk_size=len(tracked), package_names=tracked)
+            # Packages that failed to save stay recorded as edited
+            unsaved = tracked.intersection(LayeredMaterialLibrary.get_edited_packages())
+            failed = [path for path, package_name in package_names.items() if package_name in unsaved]
+
+        untracked = [path for path, package_name in package_names.items() if package_name not in tracked]
+        if self.apply_function is not None and untracked and not unreal.EditorAssetLibrary.save_loaded_assets(
+                [edited[path] for path in untracked], only_if_is_dirty=True):
+            failed += untracked
+        return failed
+
+    def _apply(self, instance: 'unreal.MaterialInstanceConstant', spec: dict) -> bool:
+        if self.apply_function is not None:
+            return self.apply_function(instance, spec)
+        if self.mode == 'full':
+            return LayeredMaterialLibrary.create_full_material_from_dict(instance, spec, resolver=self.resolver)
+        changes = LayeredMaterialLibrary.apply_material_dict(instance, spec, resolver=self.resolver)
+        for failure in changes['failed']:
+            print(f"{instance.get_path_name()}: could not apply {failure}")
+        return not changes['failed']
+
+
+def load_manifest(path: str) -> Dict[str, dict]:
+    """Load a JSON manifest mapping material instance paths to material dictionaries.
+
+    Values use plain JSON types: numbers for scalars, booleans for static switches, [r, g, b, a] lists for
+    vectors and channel masks, and asset path strings for textures.
+
+    Args:
+        path (str): Path of the JSON file
+
+    Returns:
+        dict[str, dict]: Asset path -> material dictionary with vector values converted to unreal.LinearColor
+    """
+    with open(path, 'r', encoding='utf-8') as manifest_file:
+        manifest = json.load(manifest_file)
+    return {asset_path: material_dict_from_plain(material_data) for asset_path, material_data in manifest.items()}
+
+
+def _chunks(items: List[str], size: int) -> Iterator[List[str]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _print_progress(progress: BatchProgress) -> None:
+    print(f"Processed {progress.done}/{progress.total} assets ({progress.failed} failed) "
+          f"at {progress.assets_per_second:.1f} assets/s, ETA {progress.eta_seconds:.0f}s")
@@ -0,0 +1,259 @@
+import hashlib
+import json
+import os
+from lazy_unreal import unreal
+from layered_material_library import LayeredMaterialLibrary
+from material_values import material_dict_to_plain
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+
+def iter_material_snapshots(
+    asset_paths: Iterable[str],
+    chunk_size: int = 50,
+    plain: bool = True
+) -> Iterator[Tuple[str, dict]]:
+    """Snapshot many material instances one at a time.
+
+    Instances are bulk loaded a chunk at a time, snapshotted with get_full_material_as_dict and yielded. Nothing
+    keeps a reference to a chunk once it has been yielded, and garbage is collected before the next chunk is
+    loaded, so memory stays flat no matter how many paths are exported.
+
+    Paths that fail to load or are not material instances are reported and skipped.
+
+    Args:
+        asset_paths (Iterable[str]): Paths of the material instances to snapshot
+        chunk_size (int): Number of instances loaded together
+        plain (bool): Whether values are converted with material_dict_to_plain, so snapshots hold no UE objects.
+            Textures are stored as paths either way, so turning this off only keeps colors as unreal.LinearColor.
+
+    Yields:
+        tuple[str, dict]: (asset path, material dictionary) pairs, in the order of asset_paths
+
+    Example:
+        >>> paths = unreal.EditorAssetLibrary.list_assets('/Game/Materials', recursive=True)
+        >>> for path, snapshot in iter_material_snapshots(paths):
+        ...     print(path, len(snapshot['layers']))
+    """
+    for chunk in _chunks(asset_paths, max(1, chunk_size)):
+        instances = unreal.LayeredMaterialLibrary.load_objects_by_path(chunk)
+        for path, instance in zip(chunk, instances):
+            if not isinstance(instance, unreal.MaterialInstance):
+                print(f"Skipping {path}: not a MaterialInstance or failed to load")
+                continue
+            snapshot = LayeredMaterialLibrary.get_full_material_as_dict(instance)
+            yield path, material_dict_to_plain(snapshot) if plain else snapshot
+
+        # Drop the chunk before collecting so the editor can unload it
+        instances = instance = None
+        unreal.SystemLibrary.collect_garbage()
+
+
+def write_snapshots_jsonl(
+    path: str,
+    snapshots: Iterable[Tuple[str, dict]]
+) -> int:
+    """Stream snapshots to a JSONL file, one material per line.
+
+    Each line is a JSON object with the asset 'path' and its 'material' dictionary. Values that are still UE
+    types are converted to plain values first.
+
+    Args:
+        path (str): Output file path
+        snapshots (Iterable[tuple[str, dict]]): (asset path, material dictionary) pairs, e.g. from
+            iter_material_snapshots
+
+    Returns:
+        int: Number of snapshots written
+    """
+    with open(path, 'w', encoding='utf-8') as output:
+        return _write_snapshot_lines(output, snapshots)
+
+
+def read_snapshots_jsonl(path: str) -> Iterator[Tuple[str, dict]]:
+    """Stream snapshots back from a file written by write_snapshots_jsonl.
+
+    Args:
+        path (str): Path of the JSONL file
+
+    Yields:
+        tuple[str, dict]: (asset path, material dictionary) pairs with plain values
+    """
+    with open(path, 'r', encoding='utf-8') as snapshot_file:
+        for line in snapshot_file:
+            if line.strip():
+                entry = json.loads(line)
+                yield entry['path'], entry['material']
+
+
+def export_materials_jsonl(
+    asset_paths: Iterable[str],
+    path: str,
+    chunk_size: int = 50
+) -> int:
+    """Snapshot material instances and stream them to a JSONL file.
+
+    Args:
+        asset_paths (Iterable[str]): Paths of the material instances to export
+        path (str): Output file path
+        chunk_size (int): Number of instances loaded together
+
+    Returns:
+        int: Number of materials exported
+    """
+    return write_snapshots_jsonl(path, iter_material_snapshots(asset_paths, chunk_size=chunk_size))
+
+
+def export_materials_incremental(
+    asset_paths: Iterable[str],
+    output_path: str,
+    index_path: Optional[str] = None,
+    chunk_size: int = 50
+) -> dict:
+    """Export material instances to JSONL, re-snapshotting only those that changed since the last export.
+
+    A sidecar index stores a fingerprint per asset, hashed from the size and timestamp of its own package file
+    and of every package it depends on (parent materials, layer and blend functions, textures), found through
+    the asset registry without loading anything. Assets whose fingerprint matches the index are carried over
+    from the previous output file, every other asset is loaded and snapshotted again.
+
+    Args:
+        asset_paths (Iterable[str]): Paths of the material instances to export
+        output_path (str): JSONL output file, also read as the previous export when it exists
+        index_path (str): Sidecar index file, defaults to output_path + '.index.json'
+        chunk_size (int): Number of instances loaded together
+
+    Returns:
+        dict: 'exported' (re-snapshotted), 'carried' (copied from the previous output) and 'removed' (in the
+            previous index but no longer requested) asset counts
+
+    Example:
+        >>> paths = unreal.EditorAssetLibrary.list_assets('/Game/Materials', recursive=True)
+        >>> report = export_materials_incremental(paths, 'C:/Audit/materials.jsonl')
+    """
+    index_path = index_path or output_path + '.index.json'
+    asset_paths = list(dict.fromkeys(asset_paths))
+    fingerprints = compute_material_fingerprints(asset_paths)
+
+    previous_index = {}
+    if os.path.exists(index_path) and os.path.exists(output_path):
+        with open(index_path, 'r', encoding='utf-8') as index_file:
+            previous_index = json.load(index_file)
+
+    unchanged = {path for path in asset_paths if path in previous_index and previous_index[path] == fingerprints[path]}
+    requested = set(asset_paths)
+    removed = len(set(previous_index) - requested)
+    carried = 0
+
+    temp_path = output_path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as output:
+        # Unchanged lines are copied verbatim, only their asset path is decoded
+        if unchanged:
+            with open(output_path, 'r', encoding='utf-8') as previous:
+                for line in previous:
+                    path = _line_asset_path(line)
+                    if path in unchanged:
+                        output.write(line)
+                        unchanged.discard(path)
+                        carried += 1
+
+        # Anything missing from the previous output is exported again, even if its fingerprint matched
+        changed = [path for path in asset_paths if path in unchanged or path not in previous_index or
+                   previous_index[path] != fingerprints[path]]
+        exported = _write_snapshot_lines(output, iter_material_snapshots(changed, chunk_size=chunk_size))
+
+    os.replace(temp_path, output_path)
+    with open(index_path, 'w', encoding='utf-8') as index_file:
+        json.dump(fingerprints, index_file)
+
+    return {'exported': exported, 'carried': carried, 'removed': removed}
+
+
+def compute_material_fingerprints(asset_paths: Iterable[str]) -> Dict[str, str]:
+    """Fingerprint assets from their package files and the package files of all their hard dependencies.
+
+    Nothing is loaded: dependencies come from the asset registry and file sizes and timestamps are read from
+    disk in one native call. A fingerprint changes whenever the asset or anything it transitively depends on
+    is saved again.
+
+    Args:
+        asset_paths (Iterable[str]): Asset paths to fingerprint
+
+    Returns:
+        dict[str, str]: Asset path -> fingerprint
+    """
+    registry = unreal.AssetRegistryHelpers.get_asset_registry()
+    options = unreal.AssetRegistryDependencyOptions(
+        include_soft_package_references=False,
+        include_hard_package_references=True,
+        include_searchable_names=False,
+        include_soft_management_references=False,
+        include_hard_management_references=False
+    )
+    direct_dependencies = {}
+
+    def get_direct_dependencies(package_name):
+        dependencies = direct_dependencies.get(package_name)
+        if dependencies is None:
+            names = registry.get_dependencies(package_name, options) or []
+            # Script packages only change with the engine build, they have no file to fingerprint
+            dependencies = direct_dependencies[package_name] = [
+                str(name) for name in names if not str(name).startswith('/Script/')
+            ]
+        return dependencies
+
+    closures = {}
+    for asset_path in asset_paths:
+        package_name = asset_path.split('.')[0]
+        closure = {package_name}
+        pending = [package_name]
+        while pending:
+            for dependency in get_direct_dependencies(pending.pop()):
+                if dependency not in closure:
+                    closure.add(dependency)
+                    pending.append(dependency)
+        closures[asset_path] = sorted(closure)
+
+    packages = sorted(set().union(*closures.values())) if closures else []
+    package_fingerprints = dict(zip(packages, unreal.LayeredMaterialLibrary.get_package_fingerprints(packages)))
+
+    fingerprints = {}
+    for asset_path, closure in closures.items():
+        digest = hashlib.sha1()
+        for package_name in closure:
+            digest.update(f"{package_name}={package_fingerprints[package_name]}\n".encode('utf-8'))
+        fingerprints[asset_path] = digest.hexdigest()
+    return fingerprints
+
+
+def _chunks(items: Iterable[str], size: int) -> Iterator[List[str]]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _write_snapshot_lines(output: TextIO, snapshots: Iterable[Tuple[str, dict]]) -> int:
+    count = 0
+    for asset_path, material_data in snapshots:
+        # 'path' is written first so _line_asset_path can read it without parsing the whole line
+        output.write(json.dumps({'path': asset_path, 'material': material_dict_to_plain(material_data)}) + '\n')
+        count += 1
+    return count
+
+
+_LINE_PREFIX = '{"path": '
+_DECODER = json.JSONDecoder()
+
+
+def _line_asset_path(line: str) -> Optional[str]:
+    # A torn last line from an interrupted export has no newline, the asset gets exported again
+    if not line.startswith(_LINE_PREFIX) or not line.endswith('\n'):
+        return None
+    try:
+        return _DECODER.raw_decode(line, len(_LINE_PREFIX))[0]
+    except ValueError:
+        return None
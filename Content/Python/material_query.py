@@ -0,0 +1,191 @@
+from lazy_unreal import unreal
+from layered_material_library import LayeredMaterialLibrary
+from typing import Iterable, List, Optional, Set, Union
+
+# Asset registry tags the plugin writes on layered material instances when they are saved: the object paths of
+# the layer and blend functions joined with ';', empty for an unassigned slot
+LAYERS_TAG = 'LayeredMaterialLayers'
+BLENDS_TAG = 'LayeredMaterialBlends'
+
+# Classes of the assets searched, and of the functions an instance must reference to be layered
+_INSTANCE_CLASSES = ('MaterialInstanceConstant',)
+_FUNCTION_CLASSES = (
+    'MaterialFunctionMaterialLayer',
+    'MaterialFunctionMaterialLayerBlend',
+    'MaterialFunctionMaterialLayerInstance',
+    'MaterialFunctionMaterialLayerBlendInstance'
+)
+
+AssetOrPath = Union[str, 'unreal.Object']
+
+
+def find_layered_instances(
+    uses_layer: Optional[AssetOrPath] = None,
+    uses_blend: Optional[AssetOrPath] = None,
+    parent: Optional[AssetOrPath] = None,
+    verify: bool = False,
+    include_children: bool = False,
+    chunk_size: int = 50
+) -> List[str]:
+    """Find layered material instances from the asset registry, without loading them.
+
+    Candidates are the instances whose package references every given asset, read from the registry's dependency
+    data. The layer stack tags then tell whether a function is used as a layer or as a blend, and the Parent tag
+    whether the instance derives directly from parent. Instances saved before the plugin wrote its tags only
+    have the dependency data, so they are kept whenever they reference the functions: pass verify=True to load
+    the candidates and check their actual layer stack. With no filter at all, every instance referencing a
+    material layer or blend function is returned.
+
+    Only instances referencing the functions themselves are found. A child instance that inherits its layers from
+    its parent without overriding them does not reference them; include_children adds the child instances of
+    every match, recursively, unless their own tags show a layer stack without the functions.
+
+    Args:
+        uses_layer (str | unreal.Object, optional): Layer function, or its path, the instances must use as a layer
+        uses_blend (str | unreal.Object, optional): Blend function, or its path, the instances must use as a blend
+        parent (str | unreal.Object, optional): Material, or its path, that must be the direct parent of the
+            instances
+        verify (bool): Whether the candidates are loaded, a chunk at a time, and kept only if their layer stack and
+            parent really match
+        include_children (bool): Whether the child instances of every match are included
+        chunk_size (int): Number of instances loaded together when verifying
+
+    Returns:
+        list[str]: Object paths of the matching instances, sorted
+
+    Example:
+        >>> paths = find_layered_instances(uses_layer='/Game/Layers/ML_MaterialLayer_Red')
+        >>> for path, snapshot in iter_material_snapshots(paths):
+        ...     print(path, len(snapshot['layers']))
+    """
+    registry = unreal.AssetRegistryHelpers.get_asset_registry()
+    options = unreal.AssetRegistryDependencyOptions(
+        include_soft_package_references=False,
+        include_hard_package_references=True,
+        include_searchable_names=False,
+        include_soft_management_references=False,
+        include_hard_management_references=False
+    )
+
+    def get_referencers(package_name: str) -> Set[str]:
+        return {str(name) for name in registry.get_referencers(package_name, options) or []}
+
+    def get_instances(package_names: Iterable[str]) -> list:
+        return [
+            asset_data for package_name in sorted(package_names)
+            for asset_data in registry.get_assets_by_package_name(package_name) or []
+            if str(asset_data.asset_class_path.asset_name) in _INSTANCE_CLASSES
+        ]
+
+    layer_package = _package_name(uses_layer)
+    blend_package = _package_name(uses_blend)
+    parent_package = _package_name(parent)
+
+    if layer_package or blend_package:
+        candidates = None
+        for package_name in filter(None, (layer_package, blend_package)):
+            referencers = get_referencers(package_name)
+            candidates = referencers if candidates is None else candidates & referencers
+    else:
+        candidates = set()
+        for class_name in _FUNCTION_CLASSES:
+            class_path = unreal.TopLevelAssetPath('/Script/Engine', class_name)
+            for function_data in registry.get_assets_by_class(class_path, False) or []:
+                candidates |= get_referencers(str(function_data.package_name))
+    if parent_package:
+        candidates &= get_referencers(parent_package)
+
+    matches = {}
+    for asset_data in get_instances(candidates):
+        if parent_package and _package_name(_tag_value(asset_data, 'Parent')) != parent_package:
+            continue
+        if _tags_match(asset_data, layer_package, blend_package):
+            matches[_asset_data_path(asset_data)] = parent_package
+
+    if include_children:
+        pending = sorted(matches)
+        while pending:
+            parent_path = pending.pop()
+            parent_package_name = _package_name(parent_path)
+            for asset_data in get_instances(get_referencers(parent_package_name)):
+                path = _asset_data_path(asset_data)
+                if (path not in matches
+                        and _package_name(_tag_value(asset_data, 'Parent')) == parent_package_name
+                        and _tags_match(asset_data, layer_package, blend_package)):
+                    matches[path] = parent_package_name
+                    pending.append(path)
+
+    if verify:
+        return _verify(matches, layer_package, blend_package, chunk_size)
+    return sorted(matches)
+
+
+def _verify(matches: dict, layer_package: Optional[str], blend_package: Optional[str], chunk_size: int) -> List[str]:
+    """Load the candidates a chunk at a time and keep those whose layer stack and parent match.
+
+    Args:
+        matches (dict): Object path -> package name its parent must have, or None
+        layer_package (str, optional): Package name of the layer function that must be used as a layer
+        blend_package (str, optional): Package name of the blend function that must be used as a blend
+        chunk_size (int): Number of instances loaded together
+
+    Returns:
+        list[str]: Object paths of the verified instances, sorted
+    """
+    paths = sorted(matches)
+    verified = []
+    for start in range(0, len(paths), max(1, chunk_size)):
+        chunk = paths[start:start + max(1, chunk_size)]
+        instances = unreal.LayeredMaterialLibrary.load_objects_by_path(chunk)
+        for path, instance in zip(chunk, instances):
+            if not isinstance(instance, unreal.MaterialInstance):
+                print(f"Skipping {path}: not a MaterialInstance or failed to load")
+                continue
+            stack = LayeredMaterialLibrary.get_layer_stack(instance)
+            layers = {_package_name(layer) for layer in stack.layers if layer}
+            blends = {_package_name(blend) for blend in stack.blends if blend}
+            if not stack.layers or (layer_package and layer_package not in layers) or \
+                    (blend_package and blend_package not in blends):
+                continue
+            if matches[path] and _package_name(instance.get_editor_property('parent')) != matches[path]:
+                continue
+            verified.append(path)
+
+        # Drop the chunk before collecting so the editor can unload it
+        instances = instance = None
+        unreal.SystemLibrary.collect_garbage()
+    return verified
+
+
+def _tags_match(asset_data: 'unreal.AssetData', layer_package: Optional[str], blend_package: Optional[str]) -> bool:
+    """Check the layer stack tags of an instance, passing instances that were saved without them."""
+    layers = _tag_value(asset_data, LAYERS_TAG)
+    if layers is None:
+        return True
+    if not layers:
+        return False
+    if layer_package and layer_package not in {_package_name(path) for path in layers.split(';') if path}:
+        return False
+    blends = _tag_value(asset_data, BLENDS_TAG) or ''
+    if blend_package and blend_package not in {_package_name(path) for path in blends.split(';') if path}:
+        return False
+    return True
+
+
+def _tag_value(asset_data: 'unreal.AssetData', tag_name: str) -> Optional[str]:
+    value = asset_data.get_tag_value(tag_name)
+    return None if value is None else str(value)
+
+
+def _asset_data_path(asset_data: 'unreal.AssetData') -> str:
+    return f"{asset_data.package_name}.{asset_data.asset_name}"
+
+
+def _package_name(asset: Optional[AssetOrPath]) -> Optional[str]:
+    """Get the package name of an asset, an object path, or an export text path like Class'/Game/Foo.Foo'."""
+    if not asset:
+        return None
+    path = asset if isinstance(asset, str) else asset.get_path_name()
+    if "'" in path:
+        path = path.split("'")[1]
+    return path.split('.')[0]
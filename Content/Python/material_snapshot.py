@@ -0,0 +1,311 @@
+import sys
+from lazy_unreal import unreal
+from layered_material_library import LayeredMaterialLibrary, ParameterDomain, ParameterSpec, ParameterType, diff_material_state
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple, Union
+
+# (domain, layer index, name) of a parameter, layer index 0 for global parameters
+ParameterKey = Tuple[ParameterDomain, int, str]
+
+# Dictionary keys of the parameters of each domain inside a layer entry
+_ASSET_KEYS = ((ParameterDomain.LAYER, 'layerAsset'), (ParameterDomain.BLEND, 'blendAsset'))
+
+
+# Every parameter key seen so far, so snapshots of instances with the same layout share their key tuples. It only
+# grows, one entry per distinct parameter of every material captured, see clear_interned_keys.
+_KEYS: Dict[ParameterKey, ParameterKey] = {}
+
+
+def clear_interned_keys() -> int:
+    """Empty the table of interned parameter keys, e.g. between unrelated exports in a long editor session.
+
+    Snapshots that already exist stay valid, they only stop sharing their key tuples with those created afterwards.
+
+    Returns:
+        int: Number of keys dropped
+    """
+    count = len(_KEYS)
+    _KEYS.clear()
+    return count
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    """Intern a string so every snapshot shares one copy of each name and path, None stays None."""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _intern_key(domain: ParameterDomain, layer_index: int, name: str) -> ParameterKey:
+    key = (domain, layer_index, name)
+    return _KEYS.setdefault(key, key)
+
+
+class ParameterRecord:
+    """One parameter value of a material snapshot.
+
+    Only the interned (domain, layer index, name) key, the type and the value are stored; name, domain and
+    layer_index are read from the key.
+
+    Attributes:
+        key (tuple): (domain, layer index, name) of the parameter, shared by every snapshot that has it
+        parameter_type (ParameterType): Type of the parameter
+        value (Any): Value of the parameter. Texture paths are interned.
+    """
+    __slots__ = ('key', 'parameter_type', 'value')
+
+    def __init__(
+        self,
+        name: str,
+        parameter_type: Union[ParameterType, str],
+        domain: Union[ParameterDomain, str],
+        layer_index: int,
+        value: Any
+    ):
+        domain = ParameterDomain(domain)
+        self.key = _intern_key(domain, 0 if domain is ParameterDomain.GLOBAL else layer_index, sys.intern(str(name)))
+        self.parameter_type = ParameterType(parameter_type)
+        self.value = _intern(value) if self.parameter_type is ParameterType.TEXTURE else value
+
+    @property
+    def domain(self) -> ParameterDomain:
+        """Where the parameter lives."""
+        return self.key[0]
+
+    @property
+    def layer_index(self) -> int:
+        """Index of the layer containing the parameter, 0 for global parameters."""
+        return self.key[1]
+
+    @property
+    def name(self) -> str:
+        """Name of the parameter, interned."""
+        return self.key[2]
+
+    def to_spec(self) -> ParameterSpec:
+        """Get the parameter as a ParameterSpec carrying its value, for set_many_parameter_values."""
+        domain, layer_index, name = self.key
+        return ParameterSpec(name, self.parameter_type, domain, layer_index, self.value)
+
+    def to_dict(self) -> dict:
+        """Get the parameter entry of the get_full_material_as_dict format."""
+        domain, layer_index, name = self.key
+        return {
+            'value': self.value,
+            'type': self.parameter_type.value,
+            'domain': domain.value,
+            'layerIndex': layer_index,
+            'name': name
+        }
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, ParameterRecord):
+            return NotImplemented
+        return self.key == other.key and self.parameter_type is other.parameter_type and self.value == other.value
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        domain, layer_index, name = self.key
+        return f"ParameterRecord({name!r}, {self.parameter_type.value!r}, {domain.value!r}, {layer_index}, {self.value!r})"
+
+
+class LayerSnapshot:
+    """The functions assigned to one layer of a material snapshot.
+
+    Attributes:
+        layer_index (int): Index of the layer
+        layer_path (Optional[str]): Path of the layer function, interned. None if no function is assigned.
+        blend_path (Optional[str]): Path of the blend function, interned. None if no function is assigned.
+        has_blend (bool): Whether the layer has a blend entry. The base layer has none.
+    """
+    __slots__ = ('layer_index', 'layer_path', 'blend_path', 'has_blend')
+
+    def __init__(self, layer_index: int, layer_path: Optional[str] = None, blend_path: Optional[str] = None,
+                 has_blend: Optional[bool] = None):
+        self.layer_index = layer_index
+        self.layer_path = _intern(layer_path)
+        self.blend_path = _intern(blend_path)
+        self.has_blend = layer_index > 0 if has_blend is None else has_blend
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, LayerSnapshot):
+            return NotImplemented
+        return ((self.layer_index, self.layer_path, self.blend_path, self.has_blend)
+                == (other.layer_index, other.layer_path, other.blend_path, other.has_blend))
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"LayerSnapshot({self.layer_index}, {self.layer_path!r}, {self.blend_path!r}, {self.has_blend})"
+
+
+class MaterialSnapshot:
+    """Compact snapshot of a layered material instance: its layer stack and every parameter value.
+
+    A typed alternative to the dictionaries of get_full_material_as_dict, meant for holding tens of thousands of
+    snapshots in memory for comparisons. Records use `__slots__`, names and paths are interned so every snapshot
+    shares them, and parameters are indexed by (domain, layer index, name) tuples instead of formatted string
+    keys nested per layer. Snapshots convert to and from the dictionary format, so the apply functions keep
+    working with `to_dict()`.
+
+    Attributes:
+        layers (tuple[LayerSnapshot]): Layer stack, in layer order
+        parameters (dict[tuple, ParameterRecord]): (domain, layer index, name) -> parameter record
+
+    Example:
+        >>> snapshot = MaterialSnapshot.capture(instance)
+        >>> roughness = snapshot.get('Roughness', 2)
+        >>> changes = snapshot.diff(MaterialSnapshot.capture(other_instance))
+        >>> LayeredMaterialLibrary.create_full_material_from_dict(target, snapshot.to_dict())
+    """
+    __slots__ = ('layers', 'parameters')
+
+    def __init__(self, layers: Iterable[LayerSnapshot] = (), parameters: Iterable[ParameterRecord] = ()):
+        self.layers = tuple(layers)
+        self.parameters = {record.key: record for record in parameters}
+
+    @classmethod
+    def capture(cls, instance: 'unreal.MaterialInstance') -> 'MaterialSnapshot':
+        """Snapshot a material instance, with textures stored as paths.
+
+        Args:
+            instance (unreal.MaterialInstance): The material instance to snapshot
+
+        Returns:
+            MaterialSnapshot: The snapshot
+        """
+        return cls.from_dict(LayeredMaterialLibrary.get_full_material_as_dict(instance))
+
+    @classmethod
+    def from_dict(cls, material_data: dict) -> 'MaterialSnapshot':
+        """Build a snapshot from a material dictionary.
+
+        Args:
+            material_data (dict): Material dictionary, as returned by get_full_material_as_dict
+
+        Returns:
+            MaterialSnapshot: The snapshot
+        """
+        layers = []
+        records = [
+            ParameterRecord(param_info['name'], param_info['type'], ParameterDomain.GLOBAL, 0, param_info['value'])
+            for param_info in material_data.get('global', {}).get('parameters', {}).values()
+        ]
+        for layer_data in sorted(material_data.get('layers', {}).values(), key=lambda data: data['layerIndex']):
+            layer_idx = layer_data['layerIndex']
+            blend_data = layer_data.get('blendAsset')
+            layers.append(LayerSnapshot(layer_idx, (layer_data.get('layerAsset') or {}).get('path'),
+                                        (blend_data or {}).get('path'), 'blendAsset' in layer_data))
+            for domain, asset_key in _ASSET_KEYS:
+                for param_info in (layer_data.get(asset_key) or {}).get('parameters', {}).values():
+                    records.append(ParameterRecord(param_info['name'], param_info['type'], domain, layer_idx,
+                                                   param_info['value']))
+        return cls(layers, records)
+
+    def to_dict(self) -> dict:
+        """Convert to the get_full_material_as_dict format.
+
+        Every layer gets a 'layerAsset' entry, and parameters of layers that are not in the stack are dropped,
+        like get_full_material_as_dict does.
+
+        Returns:
+            dict: The material dictionary
+        """
+        result = {'global': {'parameters': {}}, 'layers': {}}
+        layer_entries = {}
+        for layer in self.layers:
+            layer_data = {
+                'layerIndex': layer.layer_index,
+                'layerAsset': {'path': layer.layer_path, 'parameters': {}}
+            }
+            if layer.has_blend:
+                layer_data['blendAsset'] = {'path': layer.blend_path, 'parameters': {}}
+            result['layers'][f"Layer_{layer.layer_index}"] = layer_data
+            layer_entries[layer.layer_index] = layer_data
+
+        asset_keys = dict(_ASSET_KEYS)
+        for (domain, layer_idx, name), record in self.parameters.items():
+            if domain is ParameterDomain.GLOBAL:
+                parameters = result['global']['parameters']
+            else:
+                asset_data = layer_entries.get(layer_idx, {}).get(asset_keys[domain])
+                if asset_data is None:
+                    continue
+                parameters = asset_data['parameters']
+            parameters[f"{name}_{layer_idx}"] = record.to_dict()
+        return result
+
+    def get(
+        self,
+        name: str,
+        layer_index: int = 0,
+        domain: Union[ParameterDomain, str] = ParameterDomain.LAYER
+    ) -> Optional[ParameterRecord]:
+        """Look up a parameter.
+
+        Args:
+            name (str): Name of the parameter
+            layer_index (int): Index of the layer containing the parameter (ignored for global parameters)
+            domain (ParameterDomain | str): Where the parameter lives ('layer', 'blend', 'global')
+
+        Returns:
+            Optional[ParameterRecord]: The parameter, or None if the snapshot does not have it
+        """
+        domain = ParameterDomain(domain)
+        return self.parameters.get((domain, 0 if domain is ParameterDomain.GLOBAL else layer_index, name))
+
+    def __getitem__(self, key: ParameterKey) -> ParameterRecord:
+        return self.parameters[key]
+
+    def __contains__(self, key: ParameterKey) -> bool:
+        return key in self.parameters
+
+    def __iter__(self) -> Iterator[ParameterRecord]:
+        return iter(self.parameters.values())
+
+    def __len__(self) -> int:
+        return len(self.parameters)
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, MaterialSnapshot):
+            return NotImplemented
+        return self.layers == other.layers and self.parameters == other.parameters
+
+    __hash__ = None
+
+    def diff(
+        self,
+        target: 'MaterialSnapshot',
+        tolerances: Optional[Dict[str, Tuple[float, float]]] = None
+    ) -> dict:
+        """Compute the minimal set of changes that turns this snapshot into target.
+
+        Compares through diff_material_state like diff_material_dicts, so the result is the one
+        diff_material_dicts gives on the matching dictionaries. Textures are compared by path.
+
+        Args:
+            target (MaterialSnapshot): Snapshot to reach
+            tolerances (dict[str, tuple[float, float]], optional): (absolute, relative) tolerance overrides per
+                type, merged over material_values.DEFAULT_TOLERANCES
+
+        Returns:
+            dict: The change set, in the format returned by diff_material_dicts, with ParameterSpecs that carry
+                enum types and domains
+        """
+        return diff_material_state(
+            {layer.layer_index: (layer.layer_path, layer.blend_path) for layer in self.layers},
+            {layer.layer_index: (layer.layer_path, layer.blend_path) for layer in target.layers},
+            {key: (record.parameter_type, record.value) for key, record in self.parameters.items()},
+            [(key, record.parameter_type, record.value) for key, record in target.parameters.items()],
+            tolerances
+        )
+
+
+def snapshots_from_dicts(material_dicts: Iterable[Tuple[str, dict]]) -> Dict[str, MaterialSnapshot]:
+    """Convert (asset path, material dictionary) pairs, e.g. from iter_material_snapshots, to snapshots.
+
+    Args:
+        material_dicts (Iterable[tuple[str, dict]]): (asset path, material dictionary) pairs
+
+    Returns:
+        dict[str, MaterialSnapshot]: Interned asset path -> snapshot, in iteration order
+    """
+    return {sys.intern(path): MaterialSnapshot.from_dict(material_data) for path, material_data in material_dicts}
@@ -0,0 +1,183 @@
+from lazy_unreal import unreal
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+# numpy module once imported, False if it is not installed
+_NUMPY = None
+
+# Default (absolute, relative) tolerances per parameter type, a value changed when
+# |current - target| > absolute + relative * |target|, like numpy.isclose
+DEFAULT_TOLERANCES = {
+    'scalar': (0.0001, 0.0),
+    'vector': (0.0001, 0.0),
+    'channel_mask': (0.0001, 0.0)
+}
+
+
+def to_plain_value(parameter_type: str, value: Any) -> Any:
+    """Convert a parameter value to a plain JSON compatible value.
+
+    Scalars become floats, static switches bools, vectors and channel masks [r, g, b, a] lists and textures
+    their asset path. None stays None.
+
+    Args:
+        parameter_type (str): Type of parameter ('scalar', 'vector', 'static_switch', 'texture', 'channel_mask')
+        value: The value, as returned by the getters or stored in a material dictionary
+
+    Returns:
+        The plain value
+    """
+    if value is None:
+        return None
+    if parameter_type in ('vector', 'channel_mask'):
+        if hasattr(value, 'r'):
+            return [value.r, value.g, value.b, value.a]
+        if hasattr(value, 'x'):
+            return [value.x, value.y, value.z, value.w]
+        return [float(component) for component in value]
+    if parameter_type == 'texture':
+        return value if isinstance(value, str) else value.get_path_name()
+    if parameter_type == 'static_switch':
+        return bool(value)
+    return float(value)
+
+
+def from_plain_value(parameter_type: str, value: Any) -> Any:
+    """Convert a plain value back to the type the setters expect.
+
+    Vectors and channel masks become unreal.LinearColor. Texture paths are kept as paths, the setters resolve
+    them when they are applied.
+
+    Args:
+        parameter_type (str): Type of parameter ('scalar', 'vector', 'static_switch', 'texture', 'channel_mask')
+        value: The plain value
+
+    Returns:
+        The converted value
+    """
+    if parameter_type in ('vector', 'channel_mask') and isinstance(value, (list, tuple)):
+        return unreal.LinearColor(*value)
+    return value
+
+
+def material_dict_to_plain(material_data: dict) -> dict:
+    """Get a copy of a material dictionary with every parameter value converted by to_plain_value.
+
+    Args:
+        material_data (dict): Material dictionary, as returned by get_full_material_as_dict
+
+    Returns:
+        dict: A JSON serializable copy of the dictionary
+    """
+    return _map_parameter_values(material_data, to_plain_value)
+
+
+def material_dict_from_plain(material_data: dict) -> dict:
+    """Get a copy of a plain material dictionary with every parameter value converted by from_plain_value.
+
+    Args:
+        material_data (dict): Material dictionary with plain values, e.g. loaded from JSON
+
+    Returns:
+        dict: A copy of the dictionary that can be passed to the apply functions
+    """
+    return _map_parameter_values(material_data, from_plain_value)
+
+
+def compute_change_mask(
+    parameter_types: Sequence[Any],
+    current_values: Sequence[Any],
+    target_values: Sequence[Any],
+    tolerances: Optional[Dict[str, Tuple[float, float]]] = None
+) -> List[bool]:
+    """Find which target values differ from the current values.
+
+    Scalars, vectors and channel masks are compared per type as arrays (with numpy when it is available), using
+    absolute and relative tolerances. Static switches are compared as bools and textures by path, so texture
+    targets given as paths never need loading. A missing (None) value only matches another None.
+
+    Args:
+        parameter_types (Sequence): Type of each value, as ParameterType members or their string values
+        current_values (Sequence): Current values
+        target_values (Sequence): Target values, in the same order
+        tolerances (dict[str, tuple[float, float]]): (absolute, relative) tolerance overrides per type,
+            merged over DEFAULT_TOLERANCES
+
+    Returns:
+        list[bool]: True for every value that needs applying
+    """
+    tolerances = dict(DEFAULT_TOLERANCES, **(tolerances or {}))
+    mask = [True] * len(target_values)
+    numeric = defaultdict(list)
+
+    for i, parameter_type in enumerate(parameter_types):
+        parameter_type = getattr(parameter_type, 'value', parameter_type)
+        current_value = current_values[i]
+        target_value = target_values[i]
+        if current_value is None or target_value is None:
+            mask[i] = current_value is not target_value
+        elif parameter_type in tolerances:
+            numeric[parameter_type].append(i)
+        else:
+            mask[i] = to_plain_value(parameter_type, current_value) != to_plain_value(parameter_type, target_value)
+
+    for parameter_type, indices in numeric.items():
+        absolute, relative = tolerances[parameter_type]
+        current = [to_plain_value(parameter_type, current_values[i]) for i in indices]
+        target = [to_plain_value(parameter_type, target_values[i]) for i in indices]
+        for i, changed in zip(indices, _changed(current, target, absolute, relative)):
+            mask[i] = changed
+    return mask
+
+
+def _changed(current: list, target: list, absolute: float, relative: float) -> List[bool]:
+    """Compare scalars or [r, g, b, a] lists element-wise, a row changed when any component is out of tolerance."""
+    np = _numpy()
+    if np:
+        current_array = np.asarray(current, dtype=np.float64)
+        target_array = np.asarray(target, dtype=np.float64)
+        out_of_tolerance = np.abs(current_array - target_array) > absolute + relative * np.abs(target_array)
+        if out_of_tolerance.ndim > 1:
+            out_of_tolerance = out_of_tolerance.any(axis=1)
+        return out_of_tolerance.tolist()
+
+    if current and isinstance(current[0], list):
+        return [any(abs(a - b) > absolute + relative * abs(b) for a, b in zip(row_current, row_target))
+                for row_current, row_target in zip(current, target)]
+    return [abs(a - b) > absolute + relative * abs(b) for a, b in zip(current, target)]
+
+
+def _numpy():
+    """Import numpy on first use, it is optional and slow to import."""
+    global _NUMPY
+    if _NUMPY is None:
+        try:
+            import numpy
+            _NUMPY = numpy
+        except ImportError:
+            _NUMPY = False
+    return _NUMPY
+
+
+def _map_parameter_values(material_data: dict, convert: Callable[[str, Any], Any]) -> dict:
+    def map_parameters(parameters):
+        return {
+            key: dict(param_info, value=convert(param_info['type'], param_info['value']))
+            for key, param_info in parameters.items()
+        }
+
+    result = dict(material_data)
+    if 'global' in material_data:
+        result['global'] = dict(material_data['global'],
+                                parameters=map_parameters(material_data['global'].get('parameters', {})))
+    if 'layers' in material_data:
+        layers = {}
+        for layer_name, layer_data in material_data['layers'].items():
+            layer_data = dict(layer_data)
+            for asset_key in ('layerAsset', 'blendAsset'):
+                if layer_data.get(asset_key):
+                    layer_data[asset_key] = dict(layer_data[asset_key],
+                                                 parameters=map_parameters(layer_data[asset_key].get('parameters', {})))
+            layers[layer_name] = layer_data
+        result['layers'] = layers
+    return result
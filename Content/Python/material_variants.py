@@ -0,0 +1,535 @@
+import csv
+import io
+import itertools
+import re
+import time
+from lazy_unreal import unreal
+from asset_resolver import AssetResolver, get_default_resolver
+from layered_material_library import LayeredMaterialLibrary, ParameterDomain, ParameterSpec, ParameterType
+from parameter_schema import ParameterSchemaCache, get_default_schema_cache
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Union
+
+# A variant is its parameter overrides, or a dict with 'parameters' and optionally the 'name' of the new asset
+Variant = Union[Sequence[ParameterSpec], dict]
+
+
+def clone_variants(
+    source_instance: 'unreal.MaterialInstanceConstant',
+    variants: Sequence[Variant],
+    dest_folder: str,
+    name_format: str = '{source}_Var{index:03d}',
+    chunk_size: int = 100,
+    save: bool = True,
+    resolver: Optional[AssetResolver] = None
+) -> List[Optional[str]]:
+    """Duplicate a configured material instance once per variant and apply each variant's overrides.
+
+    Duplicating carries the layer stack and every parameter override over in a single copy, so each variant
+    only costs its own overrides: they are applied in one batch per variant, and the editor updates of every
+    variant of a chunk are coalesced by a deferred update scope. Variants are processed in chunks, each saved in
+    bulk and released before the next one, so generating thousands of variants keeps memory bounded.
+
+    Args:
+        source_instance (unreal.MaterialInstanceConstant): Fully configured instance to duplicate
+        variants (list): Per variant, a list of ParameterSpec overrides, or a dict with 'parameters' (the
+            overrides) and optionally 'name' (the asset name). Texture values may be given as asset paths.
+        dest_folder (str): Content folder the variants are created in, e.g. '/Game/Materials/Variants'
+        name_format (str): Asset name of variants without a 'name', formatted with source (the source asset
+            name) and index (the variant index)
+        chunk_size (int): Number of variants created, edited and saved together
+        save (bool): Whether each chunk is saved once it is created
+        resolver (AssetResolver, optional): Resolver used to load texture paths. Defaults to the shared resolver.
+
+    Returns:
+        list[Optional[str]]: Path of every variant in order, or None where it could not be created (for
+            example because an asset already exists at its path, or one of its overrides could not be set)
+
+    Example:
+        >>> variants = [
+        ...     {'name': 'MI_Crate_Red', 'parameters': [ParameterSpec('Tint', 'vector', 'layer', 1, red)]},
+        ...     {'name': 'MI_Crate_Worn', 'parameters': [ParameterSpec('Wear', 'scalar', 'blend', 2, 0.8)]}
+        ... ]
+        >>> paths = clone_variants(source, variants, '/Game/Materials/Crates')
+    """
+    resolver = resolver or get_default_resolver()
+    asset_tools = unreal.AssetToolsHelpers.get_asset_tools()
+    source_name = source_instance.get_name()
+    dest_folder = dest_folder.rstrip('/')
+
+    paths = []
+    for chunk_start, chunk in _chunks(variants, max(1, chunk_size)):
+        created = []
+        with LayeredMaterialLibrary.deferred_updates():
+            for index, variant in enumerate(chunk, chunk_start):
+                if isinstance(variant, dict):
+                    name = variant.get('name') or name_format.format(source=source_name, index=index)
+                    overrides = variant.get('parameters', [])
+                else:
+                    name = name_format.format(source=source_name, index=index)
+                    overrides = variant
+
+                path = f"{dest_folder}/{name}"
+                if unreal.EditorAssetLibrary.does_asset_exist(path):
+                    print(f"Skipping variant {index}: an asset already exists at {path}")
+                    paths.append(None)
+                    continue
+
+                instance = asset_tools.duplicate_asset(name, dest_folder, source_instance)
+                if instance is None:
+                    print(f"Failed to duplicate {source_instance.get_path_name()} to {path}")
+                    paths.append(None)
+                    continue
+
+                if overrides:
+                    with LayeredMaterialLibrary.edit_session(instance):
+                        results = LayeredMaterialLibrary.set_many_parameter_values(instance, overrides,
+                                                                                   resolver=resolver)
+                    if not all(results):
+                        failed = ', '.join(spec.name for spec, result in zip(overrides, results) if not result)
+                        print(f"Failed to create variant {index}: {failed} could not be set")
+                        # A half configured duplicate is not left behind
+                        unreal.EditorAssetLibrary.delete_loaded_asset(instance)
+                        paths.append(None)
+                        continue
+                created.append(instance)
+                paths.append(path)
+
+        if save and created:
+            # Duplicating is not a library edit, the new packages are recorded so the chunk save includes them
+            LayeredMaterialLibrary.track_edited_assets(created)
+            if not _save_instances(created):
+                print(f"Failed to save some of the variants {chunk_start} to {chunk_start + len(chunk) - 1}")
+        # Let the editor release the chunk before creating the next one
+        del created
+        unreal.SystemLibrary.collect_garbage()
+
+    return paths
+
+
+# Spreadsheet-driven variants
+
+# Slot of a column: G (global), L<index> (layer) or B<index> (blend, indexed like the layer it belongs to)
+_SLOT = r'(?P<slot>G|L(?P<layer>\d+)|B(?P<blend>\d+))'
+# L2.Metallic, B1.Mask:channel_mask, or L2_Metallic__scalar for data tables whose column names cannot hold . or :
+_PARAMETER_COLUMN = re.compile(
+    _SLOT + r'[._](?P<name>.+?)(?:(?::|__)(?P<type>scalar|vector|static_switch|texture|channel_mask))?$',
+    re.IGNORECASE
+)
+_ASSET_COLUMN = re.compile(_SLOT + r'$', re.IGNORECASE)
+# Row name column of data tables exported as CSV
+_ROW_NAME_COLUMN = '---'
+# A field of UE struct export text, e.g. R=1.000000 in (R=1.000000,G=0.500000,B=0.000000,A=1.000000)
+_STRUCT_FIELD = re.compile(r'([A-Za-z]+)\s*=\s*([^,()\s]+)')
+
+
+class VariantColumn(NamedTuple):
+    """A parameter column of a variant sheet.
+
+    Attributes:
+        index (int): Position of the column in a row
+        name (str): Name of the parameter
+        domain (ParameterDomain): Domain of the parameter
+        layer_index (int): Layer index of the parameter, 0 for global parameters
+        parameter_type (Optional[ParameterType]): Type given in the header, None to look it up on the instance
+    """
+    index: int
+    name: str
+    domain: ParameterDomain
+    layer_index: int
+    parameter_type: Optional[ParameterType]
+
+
+class VariantHeader(NamedTuple):
+    """Meaning of every column of a variant sheet, parsed once from its header.
+
+    Attributes:
+        path (Optional[int]): Column of the full asset path of the variant
+        name (Optional[int]): Column of the asset name of the variant, created in the destination folder
+        parent (Optional[int]): Column of the instance duplicated when the variant does not exist yet
+        layers (dict[int, int]): Layer index -> column of the layer function path
+        blends (dict[int, int]): Layer index -> column of the blend function path
+        parameters (list[VariantColumn]): Parameter columns
+    """
+    path: Optional[int]
+    name: Optional[int]
+    parent: Optional[int]
+    layers: Dict[int, int]
+    blends: Dict[int, int]
+    parameters: List[VariantColumn]
+
+
+def parse_variant_header(columns: Sequence[str]) -> VariantHeader:
+    """Map the columns of a variant sheet to what they set.
+
+    Recognized columns (case-insensitive):
+        - 'path', or 'name' (or the '---' row name column of a data table): the variant asset
+        - 'parent': instance duplicated to create the variant if it does not exist yet
+        - 'L<i>' / 'B<i>': layer / blend function of layer i, with the library's layer indices (0 is the base
+          layer, B<i> is the blend of layer i)
+        - 'G.<Name>', 'L<i>.<Name>', 'B<i>.<Name>': global, layer or blend parameter, optionally suffixed
+          with ':<type>' (e.g. 'B1.Mask:channel_mask'). '_' and '__' may replace '.' and ':'.
+
+    Other columns are ignored with a warning.
+
+    Args:
+        columns (Sequence[str]): Header row
+
+    Returns:
+        VariantHeader: The parsed header
+
+    Raises:
+        ValueError: If no column identifies the variant asset
+    """
+    special = {}
+    layers = {}
+    blends = {}
+    parameters = []
+    for index, column in enumerate(columns):
+        column = column.strip()
+        key = column.lower()
+        if key in ('path', 'name', 'parent'):
+            special[key] = index
+        elif column == _ROW_NAME_COLUMN:
+            special.setdefault('name', index)
+        elif _ASSET_COLUMN.match(column):
+            match = _ASSET_COLUMN.match(column)
+            if match.group('layer') is not None:
+                layers[int(match.group('layer'))] = index
+            elif match.group('blend') is not None:
+                blends[int(match.group('blend'))] = index
+            else:
+                print(f"Ignoring column '{column}': global parameters need a name, e.g. 'G.{column}'")
+        elif _PARAMETER_COLUMN.match(column):
+            match = _PARAMETER_COLUMN.match(column)
+            if match.group('layer') is not None:
+                domain, layer_index = ParameterDomain.LAYER, int(match.group('layer'))
+            elif match.group('blend') is not None:
+                domain, layer_index = ParameterDomain.BLEND, int(match.group('blend'))
+            else:
+                domain, layer_index = ParameterDomain.GLOBAL, 0
+            type_name = match.group('type')
+            parameters.append(VariantColumn(index, match.group('name'), domain, layer_index,
+                                            ParameterType(type_name.lower()) if type_name else None))
+        elif column:
+            print(f"Ignoring unrecognized column '{column}'")
+
+    if 'path' not in special and 'name' not in special:
+        raise ValueError("A variant sheet needs a 'path' or 'name' column")
+    return VariantHeader(special.get('path'), special.get('name'), special.get('parent'), layers, blends, parameters)
+
+
+def parse_cell_value(text: str, parameter_type: Union[ParameterType, str]) -> Any:
+    """Convert a sheet cell to a parameter value.
+
+    Scalars are numbers, static switches true/false (or 1/0, yes/no), textures asset paths, and vectors and
+    channel masks 3 or 4 numbers separated by commas or spaces, optionally in parentheses, or the struct text
+    data tables export them as, e.g. '(R=1.000000,G=0.500000,B=0.000000,A=1.000000)'. Channel masks may also be
+    a channel letter (R, G, B or A).
+
+    Args:
+        text (str): Cell text, not empty
+        parameter_type (Union[ParameterType, str]): Type of the parameter
+
+    Returns:
+        The value, texture paths are returned as strings and resolved when set
+
+    Raises:
+        ValueError: If the text is not a valid value of that type
+    """
+    parameter_type = ParameterType(parameter_type)
+    text = text.strip()
+    if parameter_type is ParameterType.SCALAR:
+        return float(text)
+    if parameter_type is ParameterType.STATIC_SWITCH:
+        lowered = text.lower()
+        if lowered in ('true', '1', 'yes'):
+            return True
+        if lowered in ('false', '0', 'no'):
+            return False
+        raise ValueError(f"Invalid static switch value '{text}'")
+    if parameter_type is ParameterType.TEXTURE:
+        return text
+    if parameter_type is ParameterType.CHANNEL_MASK and text.upper() in ('R', 'G', 'B', 'A'):
+        return LayeredMaterialLibrary.CHANNELS['RGBA'.index(text.upper())]
+
+    fields = {key.upper(): value for key, value in _STRUCT_FIELD.findall(text)}
+    if fields:
+        keys = 'XYZW' if 'X' in fields else 'RGBA'
+        try:
+            components = [float(fields[key]) for key in keys if key in fields or key != keys[3]]
+        except KeyError as e:
+            raise ValueError(f"Invalid {parameter_type.value} value '{text}', missing {e.args[0]}") from None
+    else:
+        components = [float(component) for component in re.split(r'[\s,]+', text.strip('()[] '))]
+    if len(components) == 3:
+        components.append(1.0 if parameter_type is ParameterType.VECTOR else 0.0)
+    if len(components) != 4:
+        raise ValueError(f"Invalid {parameter_type.value} value '{text}', expected 3 or 4 numbers")
+    return unreal.LinearColor(*components)
+
+
+def generate_variants(
+    rows: Iterable[Sequence[str]],
+    header: VariantHeader,
+    dest_folder: str = '',
+    chunk_size: int = 100,
+    save: bool = True,
+    resolver: Optional[AssetResolver] = None
+) -> dict:
+    """Create or update one material instance per sheet row.
+
+    Rows are consumed lazily, chunk_size at a time, so only one chunk is held in memory: existing variants are
+    updated in place, the others are duplicated from their parent. Each chunk is loaded in bulk, edited inside a
+    deferred update scope, saved in bulk and released before the next one. Empty cells leave the value of the
+    instance (or of its parent) untouched. Parameter columns without a type in their header are looked up on
+    the instance through the shared parameter schema cache. Cells matching the current value are not set, and
+    only variants that were created or actually changed are saved, through the library's edited packages.
+
+    Args:
+        rows (Iterable[Sequence[str]]): Data rows, the header excluded
+        header (VariantHeader): Parsed header, see parse_variant_header
+        dest_folder (str): Folder of variants given by 'name' rather than 'path'
+        chunk_size (int): Number of rows processed and saved together
+        save (bool): Whether each chunk is saved once it is processed
+        resolver (AssetResolver, optional): Resolver used for parents, layer, blend and texture paths. Defaults
+            to the shared resolver.
+
+    Returns:
+        dict: 'created', 'updated' and 'failed' row counts and 'elapsed' seconds
+    """
+    resolver = resolver or get_default_resolver()
+    schemas = get_default_schema_cache()
+    dest_folder = dest_folder.rstrip('/')
+    report = {'created': 0, 'updated': 0, 'failed': 0, 'elapsed': 0.0}
+    start = time.perf_counter()
+    # Columns holding asset paths, loaded in bulk once per chunk
+    asset_columns = [header.parent] + list(header.layers.values()) + list(header.blends.values()) + [
+        column.index for column in header.parameters if column.parameter_type is ParameterType.TEXTURE
+    ]
+
+    rows = iter(rows)
+    row_number = 0
+    while True:
+        chunk = list(itertools.islice(rows, max(1, chunk_size)))
+        if not chunk:
+            break
+        first_row = row_number
+        row_number += len(chunk)
+
+        paths = [_variant_path(row, header, dest_folder) for row in chunk]
+        # Only load variants that exist on disk, the others are created from their parent
+        named_paths = [path for path in paths if path]
+        fingerprints = unreal.LayeredMaterialLibrary.get_package_fingerprints(
+            [path.split('.')[0] for path in named_paths])
+        existing_paths = [path for path, fingerprint in zip(named_paths, fingerprints) if fingerprint]
+        existing = dict(zip(existing_paths, unreal.LayeredMaterialLibrary.load_objects_by_path(existing_paths)))
+        resolver.preload(_cell(row, column) for row in chunk for column in asset_columns)
+
+        edited = []
+        created_instances = []
+        with LayeredMaterialLibrary.deferred_updates():
+            for offset, (row, path) in enumerate(zip(chunk, paths)):
+                instance = None
+                created = False
+                try:
+                    if not path:
+                        raise ValueError("No variant path or name")
+                    instance = existing.get(path)
+                    created = instance is None
+                    if created:
+                        instance = _create_from_parent(row, header, path, resolver)
+                    _apply_row(instance, row, header, resolver, schemas)
+                except Exception as e:
+                    print(f"Row {first_row + offset + 1} ({path}) failed: {e}")
+                    report['failed'] += 1
+                    # A half configured duplicate is not left behind
+                    if created and instance is not None:
+                        unreal.EditorAssetLibrary.delete_loaded_asset(instance)
+                    continue
+                report['created' if created else 'updated'] += 1
+                edited.append(instance)
+                if created:
+                    created_instances.append(instance)
+
+        if save and edited:
+            # Duplicating is not a library edit, the new packages are recorded so the chunk save includes them.
+            # Updated variants whose cells matched their values were not edited, so they are not written again.
+            if created_instances:
+                LayeredMaterialLibrary.track_edited_assets(created_instances)
+            if not _save_instances(edited):
+                print(f"Failed to save some of the variants of rows {first_row + 1} to {row_number}")
+        del edited, created_instances, existing
+        # Let the editor release the chunk before loading the next one
+        unreal.SystemLibrary.collect_garbage()
+
+    report['elapsed'] = time.perf_counter() - start
+    return report
+
+
+def generate_variants_from_csv(csv_path: str, dest_folder: str = '', **kwargs) -> dict:
+    """Create or update one material instance per row of a CSV file, streaming the file.
+
+    Args:
+        csv_path (str): Path of the CSV file, whose first row is the header (see parse_variant_header)
+        dest_folder (str): Folder of variants given by 'name' rather than 'path'
+        **kwargs: chunk_size, save and resolver, see generate_variants
+
+    Returns:
+        dict: See generate_variants
+
+    Example:
+        >>> # path,parent,L2,L2.Metallic,B1.Mask:channel_mask
+        >>> # /Game/Variants/MI_Rock_Wet,/Game/MI_Rock,/Game/Layers/ML_Wet,0.2,R
+        >>> generate_variants_from_csv('C:/Sheets/rock_variants.csv', chunk_size=200)
+    """
+    with open(csv_path, 'r', encoding='utf-8-sig', newline='') as csv_file:
+        reader = csv.reader(csv_file)
+        header = parse_variant_header(next(reader, []))
+        return generate_variants(reader, header, dest_folder, **kwargs)
+
+
+def generate_variants_from_data_table(data_table: 'unreal.DataTable', dest_folder: str = '', **kwargs) -> dict:
+    """Create or update one material instance per row of a data table.
+
+    The row name is used as the asset name unless the row struct has a 'Path' or 'Name' field. Field names
+    follow the CSV headers with '_' instead of '.' (e.g. 'L2_Metallic', 'B1_Mask__channel_mask').
+
+    Args:
+        data_table (unreal.DataTable): The table, whose rows are exported as CSV text
+        dest_folder (str): Folder of variants given by name
+        **kwargs: chunk_size, save and resolver, see generate_variants
+
+    Returns:
+        dict: See generate_variants
+    """
+    csv_text = unreal.DataTableFunctionLibrary.export_data_table_to_csv_string(data_table)
+    reader = csv.reader(io.StringIO(csv_text))
+    header = parse_variant_header(next(reader, []))
+    return generate_variants(reader, header, dest_folder, **kwargs)
+
+
+def _cell(row: Sequence[str], column: Optional[int]) -> str:
+    if column is None or column >= len(row):
+        return ''
+    text = row[column].strip()
+    # Data tables export an empty object reference as None, and a set one as Class'/Game/Path.Path'
+    if text == 'None':
+        return ''
+    if text.endswith("'") and text.count("'") == 2:
+        return text.split("'")[1]
+    return text
+
+
+def _variant_path(row: Sequence[str], header: VariantHeader, dest_folder: str) -> str:
+    path = _cell(row, header.path)
+    if path:
+        return path
+    name = _cell(row, header.name)
+    return f"{dest_folder}/{name}" if name else ''
+
+
+def _create_from_parent(
+    row: Sequence[str],
+    header: VariantHeader,
+    path: str,
+    resolver: AssetResolver
+) -> 'unreal.MaterialInstanceConstant':
+    """Duplicate the parent of a row to the variant path."""
+    parent_path = _cell(row, header.parent)
+    parent = resolver.resolve(parent_path) if parent_path else None
+    if parent is None:
+        raise ValueError(f"Variant does not exist and parent '{parent_path}' could not be loaded")
+    package_path, name = path.split('.')[0].rsplit('/', 1)
+    instance = unreal.AssetToolsHelpers.get_asset_tools().duplicate_asset(name, package_path, parent)
+    if instance is None:
+        raise ValueError(f"Could not duplicate {parent_path}")
+    return instance
+
+
+def _apply_row(
+    instance: 'unreal.MaterialInstanceConstant',
+    row: Sequence[str],
+    header: VariantHeader,
+    resolver: AssetResolver,
+    schemas: ParameterSchemaCache
+) -> None:
+    """Apply the layer stack and parameter cells of a row.
+
+    Inside the deferred update scope of generate_variants the new stack is only committed at the end of the scope,
+    but parameter lookups already follow it. Cells of reassigned slots are always applied, the values read from
+    the instance still belong to the previous function.
+    """
+    layer_assets = {}
+    blend_assets = {}
+    for columns, assets in ((header.layers, layer_assets), (header.blends, blend_assets)):
+        for layer_index, column in columns.items():
+            asset_path = _cell(row, column)
+            if asset_path:
+                asset = resolver.resolve(asset_path)
+                if asset is None:
+                    raise ValueError(f"Could not load {asset_path}")
+                assets[layer_index] = asset
+
+    reassigned = set()
+    if layer_assets or blend_assets:
+        stack = LayeredMaterialLibrary.get_layer_stack(instance)
+        for domain, assets, current, offset in ((ParameterDomain.LAYER, layer_assets, list(stack.layers), 0),
+                                                (ParameterDomain.BLEND, blend_assets, list(stack.blends), 1)):
+            for layer_index, asset in assets.items():
+                slot = layer_index - offset
+                if slot >= len(current) or current[slot] is None or \
+                        current[slot].get_path_name() != asset.get_path_name():
+                    reassigned.add((domain, layer_index))
+
+        layer_count = max(LayeredMaterialLibrary.get_layer_count(instance),
+                          max(list(layer_assets) + list(blend_assets)) + 1)
+        if not LayeredMaterialLibrary.set_layer_stack(
+            instance,
+            [layer_assets.get(layer_index) for layer_index in range(layer_count)],
+            [blend_assets.get(layer_index) for layer_index in range(1, layer_count)]
+        ):
+            raise ValueError("Could not set the layer stack, is it a layered material?")
+
+    specs = []
+    for column in header.parameters:
+        text = _cell(row, column.index)
+        if not text:
+            continue
+        parameter_type = column.parameter_type
+        if parameter_type is None:
+            spec = schemas.resolve(instance, column.name, column.layer_index, column.domain)
+            if spec is None:
+                raise ValueError(f"Parameter {column.name} not found in {column.domain.value} {column.layer_index}")
+            parameter_type = spec.parameter_type
+        specs.append(ParameterSpec(column.name, parameter_type, column.domain, column.layer_index,
+                                   parse_cell_value(text, parameter_type)))
+
+    if specs and reassigned:
+        change_mask = LayeredMaterialLibrary.get_change_mask(instance, specs)
+        specs = [spec for spec, changed in zip(specs, change_mask)
+                 if changed or (spec.parameter_domain, spec.layer_index) in reassigned]
+    if specs:
+        with LayeredMaterialLibrary.edit_session(instance):
+            results = LayeredMaterialLibrary.set_many_parameter_values(
+                instance, specs, only_if_different=not reassigned, resolver=resolver)
+        if not all(results):
+            raise ValueError(', '.join(spec.name for spec, result in zip(specs, results) if not result) +
+                             " could not be set")
+
+
+def _save_instances(instances: Sequence['unreal.MaterialInstanceConstant']) -> bool:
+    """Save the packages of instances that were edited through the library, in one bulk save.
+
+    Instances whose edits did not change anything were never recorded as edited, so they are not written again.
+
+    Returns:
+        bool: Whether every package that needed saving was saved
+    """
+    package_names = [instance.get_path_name().split('.')[0] for instance in instances]
+    return LayeredMaterialLibrary.flush_saves(chunk_size=len(package_names), package_names=package_names)['failed'] == 0
+
+
+def _chunks(items: Sequence, size: int) -> Iterator[tuple]:
+    """Yield (start index, items) chunks."""
+    for start in range(0, len(items), size):
+        yield start, items[start:start + size]
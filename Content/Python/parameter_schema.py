@@ -0,0 +1,210 @@
+from collections import OrderedDict, defaultdict
+from lazy_unreal import unreal
+from layered_material_library import LayeredMaterialLibrary, ParameterDomain, ParameterSpec
+from typing import Any, Dict, List, Optional, Union
+
+# Domain preference when a lookup matches a name in several places
+_DOMAIN_ORDER = {ParameterDomain.GLOBAL: 0, ParameterDomain.LAYER: 1, ParameterDomain.BLEND: 2}
+
+
+class ParameterSchema:
+    """The parameters exposed by one parameter layout, indexed by name.
+
+    Attributes:
+        key (str): Schema key the layout was built for, see LayeredMaterialLibrary.get_parameter_schema_key
+        parameters (dict[str, list[ParameterSpec]]): Parameter name -> every (type, domain, layer index) exposing it
+    """
+
+    def __init__(self, key: str, specs: List[ParameterSpec]):
+        self.key = key
+        parameters = defaultdict(list)
+        for spec in specs:
+            parameters[spec.name].append(spec)
+        for name_specs in parameters.values():
+            name_specs.sort(key=lambda spec: (_DOMAIN_ORDER[spec.parameter_domain], spec.layer_index))
+        self.parameters = dict(parameters)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.parameters
+
+    def lookup(
+        self,
+        name: str,
+        layer: Optional[int] = None,
+        domain: Optional[Union[ParameterDomain, str]] = None
+    ) -> Optional[ParameterSpec]:
+        """Find where a parameter lives.
+
+        Args:
+            name (str): Name of the parameter
+            layer (int): Layer index to look in. When given, global parameters are only matched if domain is
+                'global'. When omitted, global parameters are preferred, then the lowest layer index.
+            domain (Union[ParameterDomain, str]): Domain to look in, layer parameters are preferred over blend
+                parameters when omitted
+
+        Returns:
+            Optional[ParameterSpec]: Spec with the parameter's type, domain and layer index, or None if the
+                layout has no matching parameter
+        """
+        if domain is not None:
+            domain = ParameterDomain(domain)
+        for spec in self.parameters.get(name, ()):
+            if domain is not None and spec.parameter_domain is not domain:
+                continue
+            if layer is not None:
+                if spec.parameter_domain is ParameterDomain.GLOBAL:
+                    if domain is None:
+                        continue
+                elif spec.layer_index != layer:
+                    continue
+            return spec
+        return None
+
+
+class ParameterSchemaCache:
+    """Caches parameter layouts so parameters can be looked up by name alone.
+
+    Instances sharing a base material and layer and blend functions share one schema, so listing the parameters
+    of thousands of instances of the same parent only enumerates them once. Schemas are keyed by
+    LayeredMaterialLibrary.get_parameter_schema_key, which changes when the parent or a function is recompiled
+    or a layer is reassigned, so stale layouts are never returned.
+
+    Attributes:
+        max_size (int): Maximum number of schemas kept in the cache
+        hits (int): Number of schema requests answered from the cache
+        misses (int): Number of schemas that had to be built
+
+    Example:
+        >>> schemas = ParameterSchemaCache()
+        >>> metallic = schemas.get(instance, 'Metallic', layer=2)
+        >>> schemas.set(instance, 'Metallic', 0.5, layer=2)
+    """
+
+    def __init__(self, max_size: int = 256):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+
+    def get_schema(self, instance: 'unreal.MaterialInstance') -> ParameterSchema:
+        """Get the parameter layout of a material instance, building it on a cache miss.
+
+        Args:
+            instance (unreal.MaterialInstance): The material instance to query
+
+        Returns:
+            ParameterSchema: The layout of the instance
+        """
+        key = LayeredMaterialLibrary.get_parameter_schema_key(instance)
+        cache = self._cache
+        schema = cache.get(key)
+        if schema is not None:
+            cache.move_to_end(key)
+            self.hits += 1
+            return schema
+
+        self.misses += 1
+        schema = ParameterSchema(key, LayeredMaterialLibrary.get_parameter_specs(instance))
+        if key:
+            cache[key] = schema
+            while len(cache) > self.max_size:
+                cache.popitem(last=False)
+        return schema
+
+    def resolve(
+        self,
+        instance: 'unreal.MaterialInstance',
+        name: str,
+        layer: Optional[int] = None,
+        domain: Optional[Union[ParameterDomain, str]] = None
+    ) -> Optional[ParameterSpec]:
+        """Find where a parameter lives on a material instance, see ParameterSchema.lookup."""
+        return self.get_schema(instance).lookup(name, layer, domain)
+
+    def get(
+        self,
+        instance: 'unreal.MaterialInstance',
+        name: str,
+        layer: Optional[int] = None,
+        domain: Optional[Union[ParameterDomain, str]] = None,
+        default: Any = None
+    ) -> Any:
+        """Get a parameter value without knowing its type.
+
+        Args:
+            instance (unreal.MaterialInstance): The material instance to query
+            name (str): Name of the parameter
+            layer (int): Layer index to look in, see ParameterSchema.lookup
+            domain (Union[ParameterDomain, str]): Domain to look in, see ParameterSchema.lookup
+            default: Value returned when the instance has no matching parameter
+
+        Returns:
+            The parameter value, or default
+        """
+        spec = self.resolve(instance, name, layer, domain)
+        if spec is None:
+            return default
+        return LayeredMaterialLibrary.get_any_material_parameter_value(
+            instance, name, spec.layer_index, spec.parameter_type, spec.parameter_domain)
+
+    def set(
+        self,
+        instance: 'unreal.MaterialInstanceConstant',
+        name: str,
+        value: Any,
+        layer: Optional[int] = None,
+        domain: Optional[Union[ParameterDomain, str]] = None
+    ) -> bool:
+        """Set a parameter value without knowing its type.
+
+        Args:
+            instance (unreal.MaterialInstanceConstant): The material instance to modify
+            name (str): Name of the parameter
+            value: New value for the parameter. Texture values may be given as asset paths.
+            layer (int): Layer index to look in, see ParameterSchema.lookup
+            domain (Union[ParameterDomain, str]): Domain to look in, see ParameterSchema.lookup
+
+        Returns:
+            bool: True if the parameter was found and set
+        """
+        spec = self.resolve(instance, name, layer, domain)
+        if spec is None:
+            print(f"Parameter {name} not found on {instance.get_name()}")
+            return False
+        return LayeredMaterialLibrary.set_any_material_parameter_value(
+            instance, name, value, spec.layer_index, spec.parameter_type, spec.parameter_domain)
+
+    def clear(self) -> None:
+        """Drop every cached schema and reset the counters."""
+        self._cache.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        """Get the cache counters.
+
+        Returns:
+            dict: 'hits', 'misses', 'size' and 'hitRate' (0.0 when nothing was requested yet)
+        """
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self._cache),
+            'hitRate': self.hits / lookups if lookups else 0.0
+        }
+
+
+_DEFAULT_SCHEMA_CACHE = None
+
+
+def get_default_schema_cache() -> ParameterSchemaCache:
+    """Get the schema cache shared by callers that do not keep their own.
+
+    Returns:
+        ParameterSchemaCache: The shared cache
+    """
+    global _DEFAULT_SCHEMA_CACHE
+    if _DEFAULT_SCHEMA_CACHE is None:
+        _DEFAULT_SCHEMA_CACHE = ParameterSchemaCache()
+    return _DEFAULT_SCHEMA_CACHE
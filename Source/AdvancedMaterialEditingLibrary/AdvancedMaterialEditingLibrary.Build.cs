@@ -40,6 +40,7 @@ public class AdvancedMaterialEditingLibrary : ModuleRules
 				"SlateCore",
 				"UnrealEd",
 				"MaterialEditor",
+				"Json",
 				// ... add private dependencies that you statically link with here ...	
 			}
 			);
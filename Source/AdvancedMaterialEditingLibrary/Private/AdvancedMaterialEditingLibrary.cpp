@@ -1,18 +1,75 @@
 // Copyright Epic Games, Inc. All Rights Reserved.
 
 #include "AdvancedMaterialEditingLibrary.h"
+#include "Materials/MaterialFunctionInterface.h"
+#include "Materials/MaterialInstance.h"
+#include "Misc/EngineVersionComparison.h"
 
 #define LOCTEXT_NAMESPACE "FAdvancedMaterialEditingLibraryModule"
 
+/*
+ Asset registry tags listing the layer stack of layered material instances, so tools can find the instances
+ using a layer or blend without loading them. Each tag holds the object paths of the functions joined with ';',
+ empty for an unassigned slot. Blend i belongs to layer i + 1. Assets get the tags the next time they are saved.
+*/
+
+static const FName LayerStackLayersTag(TEXT("LayeredMaterialLayers"));
+static const FName LayerStackBlendsTag(TEXT("LayeredMaterialBlends"));
+
+template <typename FunctionArrayType>
+static FString JoinFunctionPaths(const FunctionArrayType& Functions)
+{
+	TArray<FString> Paths;
+	Paths.Reserve(Functions.Num());
+	for (const UMaterialFunctionInterface* Function : Functions)
+	{
+		Paths.Add(Function ? Function->GetPathName() : FString());
+	}
+	return FString::Join(Paths, TEXT(";"));
+}
+
+static void GetLayerStackTags(const UObject* Object, TFunctionRef<void(FName, FString)> AddTag)
+{
+	const UMaterialInstance* Instance = Cast<UMaterialInstance>(Object);
+	FMaterialLayersFunctions Layers;
+	if (!Instance || Instance->HasAnyFlags(RF_ClassDefaultObject) || !Instance->GetMaterialLayers(Layers))
+	{
+		return;
+	}
+	AddTag(LayerStackLayersTag, JoinFunctionPaths(Layers.Layers));
+	AddTag(LayerStackBlendsTag, JoinFunctionPaths(Layers.Blends));
+}
+
 void FAdvancedMaterialEditingLibraryModule::StartupModule()
 {
-	// This code will execute after your module is loaded into memory; the exact timing is specified in the .uplugin file per-module
+#if UE_VERSION_OLDER_THAN(5, 4, 0)
+	LayerStackTagsHandle = UObject::FAssetRegistryTag::OnGetExtraObjectTags.AddLambda(
+		[](const UObject* Object, TArray<UObject::FAssetRegistryTag>& OutTags)
+		{
+			GetLayerStackTags(Object, [&OutTags](FName Name, FString Value)
+			{
+				OutTags.Add(UObject::FAssetRegistryTag(Name, MoveTemp(Value), UObject::FAssetRegistryTag::TT_Alphabetical));
+			});
+		});
+#else
+	LayerStackTagsHandle = UObject::FAssetRegistryTag::OnGetExtraObjectTagsWithContext.AddLambda(
+		[](FAssetRegistryTagsContext Context)
+		{
+			GetLayerStackTags(Context.GetObject(), [&Context](FName Name, FString Value)
+			{
+				Context.AddTag(UObject::FAssetRegistryTag(Name, MoveTemp(Value), UObject::FAssetRegistryTag::TT_Alphabetical));
+			});
+		});
+#endif
 }
 
 void FAdvancedMaterialEditingLibraryModule::ShutdownModule()
 {
-	// This function may be called during shutdown to clean up your module.  For modules that support dynamic reloading,
-	// we call this function before unloading the module.
+#if UE_VERSION_OLDER_THAN(5, 4, 0)
+	UObject::FAssetRegistryTag::OnGetExtraObjectTags.Remove(LayerStackTagsHandle);
+#else
+	UObject::FAssetRegistryTag::OnGetExtraObjectTagsWithContext.Remove(LayerStackTagsHandle);
+#endif
 }
 
 #undef LOCTEXT_NAMESPACE
@@ -0,0 +1,357 @@
+#include "LayeredMaterialApplyCommandlet.h"
+#include "LayeredMaterialLibrary.h"
+#include "Dom/JsonObject.h"
+#include "FileHelpers.h"
+#include "Misc/FileHelper.h"
+#include "Serialization/JsonReader.h"
+#include "Serialization/JsonSerializer.h"
+
+DEFINE_LOG_CATEGORY_STATIC(LogLayeredMaterialApply, Log, All);
+
+ULayeredMaterialApplyCommandlet::ULayeredMaterialApplyCommandlet()
+{
+	IsClient = false;
+	IsServer = false;
+	IsEditor = true;
+	LogToConsole = true;
+}
+
+/*
+ Manifest parsing. Material dictionaries look like:
+ { "global": { "parameters": { key: param } }, "layers": { key: { "layerIndex": int, "layerAsset": { "path": str, "parameters": {...} }, "blendAsset": {...} } } }
+ where each param is { "name": str, "type": str, "value": ... }.
+*/
+
+static bool ParseParameterType(const FString& Type, ELayeredParameterType& OutType)
+{
+	if (Type == TEXT("scalar")) { OutType = ELayeredParameterType::Scalar; return true; }
+	if (Type == TEXT("vector")) { OutType = ELayeredParameterType::Vector; return true; }
+	if (Type == TEXT("static_switch")) { OutType = ELayeredParameterType::StaticSwitch; return true; }
+	if (Type == TEXT("texture")) { OutType = ELayeredParameterType::Texture; return true; }
+	if (Type == TEXT("channel_mask")) { OutType = ELayeredParameterType::ChannelMask; return true; }
+	return false;
+}
+
+static bool ParseColor(const TSharedPtr<FJsonValue>& Value, FLinearColor& OutColor)
+{
+	const TArray<TSharedPtr<FJsonValue>>* Components = nullptr;
+	if (!Value.IsValid() || !Value->TryGetArray(Components) || Components->Num() != 4)
+	{
+		return false;
+	}
+	OutColor = FLinearColor((*Components)[0]->AsNumber(), (*Components)[1]->AsNumber(), (*Components)[2]->AsNumber(), (*Components)[3]->AsNumber());
+	return true;
+}
+
+/** Calls Visitor with every parameters object of a material dictionary, along with its association and layer index */
+static void ForEachParameterGroup(const TSharedPtr<FJsonObject>& MaterialData, TFunctionRef<void(const TSharedPtr<FJsonObject>&, EMaterialParameterAssociation, int32)> Visitor)
+{
+	const TSharedPtr<FJsonObject>* Global = nullptr;
+	const TSharedPtr<FJsonObject>* Parameters = nullptr;
+	if (MaterialData->TryGetObjectField(TEXT("global"), Global) && (*Global)->TryGetObjectField(TEXT("parameters"), Parameters))
+	{
+		Visitor(*Parameters, EMaterialParameterAssociation::GlobalParameter, 0);
+	}
+
+	const TSharedPtr<FJsonObject>* Layers = nullptr;
+	if (!MaterialData->TryGetObjectField(TEXT("layers"), Layers))
+	{
+		return;
+	}
+
+	for (const TPair<FString, TSharedPtr<FJsonValue>>& Layer : (*Layers)->Values)
+	{
+		const TSharedPtr<FJsonObject> LayerData = Layer.Value->AsObject();
+		if (!LayerData.IsValid())
+		{
+			continue;
+		}
+		const int32 LayerIndex = LayerData->GetIntegerField(TEXT("layerIndex"));
+
+		const TSharedPtr<FJsonObject>* Asset = nullptr;
+		if (LayerData->TryGetObjectField(TEXT("layerAsset"), Asset) && (*Asset)->TryGetObjectField(TEXT("parameters"), Parameters))
+		{
+			Visitor(*Parameters, EMaterialParameterAssociation::LayerParameter, LayerIndex);
+		}
+		if (LayerIndex > 0 && LayerData->TryGetObjectField(TEXT("blendAsset"), Asset) && (*Asset)->TryGetObjectField(TEXT("parameters"), Parameters))
+		{
+			Visitor(*Parameters, EMaterialParameterAssociation::BlendParameter, LayerIndex);
+		}
+	}
+}
+
+/** Gets the layer or blend asset path of a layer entry, empty if there is none */
+static FString GetLayerAssetPath(const TSharedPtr<FJsonObject>& LayerData, const TCHAR* AssetKey)
+{
+	const TSharedPtr<FJsonObject>* Asset = nullptr;
+	FString Path;
+	if (LayerData->TryGetObjectField(AssetKey, Asset))
+	{
+		(*Asset)->TryGetStringField(TEXT("path"), Path);
+	}
+	return Path;
+}
+
+static void CollectAssetPaths(const TSharedPtr<FJsonObject>& MaterialData, TSet<FString>& OutPaths)
+{
+	const TSharedPtr<FJsonObject>* Layers = nullptr;
+	if (MaterialData->TryGetObjectField(TEXT("layers"), Layers))
+	{
+		for (const TPair<FString, TSharedPtr<FJsonValue>>& Layer : (*Layers)->Values)
+		{
+			const TSharedPtr<FJsonObject> LayerData = Layer.Value->AsObject();
+			if (LayerData.IsValid())
+			{
+				static const TCHAR* AssetKeys[] = { TEXT("layerAsset"), TEXT("blendAsset") };
+				for (const TCHAR* AssetKey : AssetKeys)
+				{
+					const FString Path = GetLayerAssetPath(LayerData, AssetKey);
+					if (!Path.IsEmpty())
+					{
+						OutPaths.Add(Path);
+					}
+				}
+			}
+		}
+	}
+
+	ForEachParameterGroup(MaterialData, [&OutPaths](const TSharedPtr<FJsonObject>& Parameters, EMaterialParameterAssociation, int32)
+	{
+		for (const TPair<FString, TSharedPtr<FJsonValue>>& Parameter : Parameters->Values)
+		{
+			const TSharedPtr<FJsonObject> ParameterData = Parameter.Value->AsObject();
+			FString Path;
+			if (ParameterData.IsValid() && ParameterData->GetStringField(TEXT("type")) == TEXT("texture") && ParameterData->TryGetStringField(TEXT("value"), Path))
+			{
+				OutPaths.Add(Path);
+			}
+		}
+	});
+}
+
+/*
+ Applying a single material dictionary.
+*/
+
+static bool ApplyMaterialData(UMaterialInstanceConstant* Instance, const TSharedPtr<FJsonObject>& MaterialData, const TMap<FString, UObject*>& LoadedAssets)
+{
+	bool bSuccess = true;
+
+	// Layer stack first, parameters of reassigned layers are applied afterwards
+	const TSharedPtr<FJsonObject>* Layers = nullptr;
+	if (MaterialData->TryGetObjectField(TEXT("layers"), Layers))
+	{
+		int32 TargetLayerCount = 0;
+		for (const TPair<FString, TSharedPtr<FJsonValue>>& Layer : (*Layers)->Values)
+		{
+			const TSharedPtr<FJsonObject> LayerData = Layer.Value->AsObject();
+			if (!LayerData.IsValid())
+			{
+				continue;
+			}
+
+			// Checked before anything is applied, the index is used to address the layer and blend arrays below
+			const int32 LayerIndex = LayerData->GetIntegerField(TEXT("layerIndex"));
+			if (LayerIndex < 0)
+			{
+				UE_LOG(LogLayeredMaterialApply, Error, TEXT("%s: invalid layer index %d for layer %s"), *Instance->GetPathName(), LayerIndex, *Layer.Key);
+				return false;
+			}
+			TargetLayerCount = FMath::Max(TargetLayerCount, LayerIndex + 1);
+		}
+
+		// The whole stack is committed at once, missing entries keep their current function
+		TargetLayerCount = FMath::Max(TargetLayerCount, ULayeredMaterialLibrary::GetLayerCount(Instance));
+		TArray<UMaterialFunctionInterface*> LayerFunctions;
+		TArray<UMaterialFunctionInterface*> BlendFunctions;
+		LayerFunctions.SetNumZeroed(TargetLayerCount);
+		BlendFunctions.SetNumZeroed(FMath::Max(TargetLayerCount - 1, 0));
+
+		for (const TPair<FString, TSharedPtr<FJsonValue>>& Layer : (*Layers)->Values)
+		{
+			const TSharedPtr<FJsonObject> LayerData = Layer.Value->AsObject();
+			if (!LayerData.IsValid())
+			{
+				continue;
+			}
+			const int32 LayerIndex = LayerData->GetIntegerField(TEXT("layerIndex"));
+
+			const FString LayerPath = GetLayerAssetPath(LayerData, TEXT("layerAsset"));
+			if (!LayerPath.IsEmpty())
+			{
+				LayerFunctions[LayerIndex] = Cast<UMaterialFunctionInterface>(LoadedAssets.FindRef(LayerPath));
+				if (!LayerFunctions[LayerIndex])
+				{
+					UE_LOG(LogLayeredMaterialApply, Error, TEXT("%s: could not assign layer %d from %s"), *Instance->GetPathName(), LayerIndex, *LayerPath);
+					bSuccess = false;
+				}
+			}
+
+			const FString BlendPath = GetLayerAssetPath(LayerData, TEXT("blendAsset"));
+			if (LayerIndex > 0 && !BlendPath.IsEmpty())
+			{
+				BlendFunctions[LayerIndex - 1] = Cast<UMaterialFunctionInterface>(LoadedAssets.FindRef(BlendPath));
+				if (!BlendFunctions[LayerIndex - 1])
+				{
+					UE_LOG(LogLayeredMaterialApply, Error, TEXT("%s: could not assign blend %d from %s"), *Instance->GetPathName(), LayerIndex, *BlendPath);
+					bSuccess = false;
+				}
+			}
+		}
+
+		if (TargetLayerCount > 0 && !ULayeredMaterialLibrary::SetLayerStack(Instance, LayerFunctions, BlendFunctions, TArray<bool>()))
+		{
+			UE_LOG(LogLayeredMaterialApply, Error, TEXT("%s: could not set the layer stack, is it a layered material?"), *Instance->GetPathName());
+			return false;
+		}
+	}
+
+	TArray<FLayeredParameterEdit> Edits;
+	ForEachParameterGroup(MaterialData, [&](const TSharedPtr<FJsonObject>& Parameters, EMaterialParameterAssociation Association, int32 LayerIndex)
+	{
+		for (const TPair<FString, TSharedPtr<FJsonValue>>& Parameter : Parameters->Values)
+		{
+			const TSharedPtr<FJsonObject> ParameterData = Parameter.Value->AsObject();
+			if (!ParameterData.IsValid())
+			{
+				continue;
+			}
+
+			FLayeredParameterEdit Edit;
+			Edit.ParameterName = FName(*ParameterData->GetStringField(TEXT("name")));
+			Edit.Association = Association;
+			Edit.LayerIndex = LayerIndex;
+
+			const TSharedPtr<FJsonValue> Value = ParameterData->TryGetField(TEXT("value"));
+			bool bValid = Value.IsValid() && ParseParameterType(ParameterData->GetStringField(TEXT("type")), Edit.ParameterType);
+			if (bValid)
+			{
+				switch (Edit.ParameterType)
+				{
+				case ELayeredParameterType::Scalar:
+					bValid = Value->TryGetNumber(Edit.ScalarValue);
+					break;
+				case ELayeredParameterType::Vector:
+				case ELayeredParameterType::ChannelMask:
+					bValid = ParseColor(Value, Edit.VectorValue);
+					break;
+				case ELayeredParameterType::StaticSwitch:
+					bValid = Value->TryGetBool(Edit.bStaticSwitchValue);
+					break;
+				case ELayeredParameterType::Texture:
+					// null clears the texture, anything else must be the path of a loaded texture
+					if (!Value->IsNull())
+					{
+						Edit.TextureValue = Cast<UTexture>(LoadedAssets.FindRef(Value->AsString()));
+						bValid = Edit.TextureValue != nullptr;
+					}
+					break;
+				}
+			}
+
+			if (bValid)
+			{
+				Edits.Add(Edit);
+			}
+			else
+			{
+				UE_LOG(LogLayeredMaterialApply, Error, TEXT("%s: invalid value for parameter %s"), *Instance->GetPathName(), *Edit.ParameterName.ToString());
+				bSuccess = false;
+			}
+		}
+	});
+
+	ULayeredMaterialLibrary::ApplyLayeredParameterBatch(Instance, Edits);
+	return bSuccess;
+}
+
+int32 ULayeredMaterialApplyCommandlet::Main(const FString& Params)
+{
+	FString ManifestPath;
+	if (!FParse::Value(*Params, TEXT("manifest="), ManifestPath))
+	{
+		UE_LOG(LogLayeredMaterialApply, Error, TEXT("Usage: -run=LayeredMaterialApply -manifest=<Manifest.json>"));
+		return 1;
+	}
+
+	FString ManifestText;
+	TSharedPtr<FJsonObject> Manifest;
+	if (!FFileHelper::LoadFileToString(ManifestText, *ManifestPath)
+		|| !FJsonSerializer::Deserialize(TJsonReaderFactory<>::Create(ManifestText), Manifest)
+		|| !Manifest.IsValid())
+	{
+		UE_LOG(LogLayeredMaterialApply, Error, TEXT("Could not read manifest %s"), *ManifestPath);
+		return 1;
+	}
+
+	// Load phase: every instance and every referenced asset in one pass
+	double PhaseStart = FPlatformTime::Seconds();
+
+	TArray<FString> InstancePaths;
+	TSet<FString> AssetPaths;
+	for (const TPair<FString, TSharedPtr<FJsonValue>>& Entry : Manifest->Values)
+	{
+		const TSharedPtr<FJsonObject> MaterialData = Entry.Value->AsObject();
+		if (MaterialData.IsValid())
+		{
+			InstancePaths.Add(Entry.Key);
+			CollectAssetPaths(MaterialData, AssetPaths);
+		}
+	}
+
+	TArray<FString> PathsToLoad = InstancePaths;
+	PathsToLoad.Append(AssetPaths.Array());
+	const TArray<UObject*> Objects = ULayeredMaterialLibrary::LoadObjectsByPath(PathsToLoad);
+
+	TMap<FString, UObject*> LoadedAssets;
+	for (int32 Index = 0; Index < PathsToLoad.Num(); ++Index)
+	{
+		LoadedAssets.Add(PathsToLoad[Index], Objects[Index]);
+	}
+
+	const double LoadSeconds = FPlatformTime::Seconds() - PhaseStart;
+
+	// Edit phase
+	PhaseStart = FPlatformTime::Seconds();
+
+	int32 NumFailed = 0;
+	TArray<UPackage*> PackagesToSave;
+	for (const FString& InstancePath : InstancePaths)
+	{
+		UMaterialInstanceConstant* Instance = Cast<UMaterialInstanceConstant>(LoadedAssets.FindRef(InstancePath));
+		if (!Instance)
+		{
+			UE_LOG(LogLayeredMaterialApply, Error, TEXT("%s is not a loadable MaterialInstanceConstant"), *InstancePath);
+			++NumFailed;
+			continue;
+		}
+
+		// A partly applied instance is not saved
+		if (!ApplyMaterialData(Instance, Manifest->GetObjectField(InstancePath), LoadedAssets))
+		{
+			++NumFailed;
+			continue;
+		}
+		Instance->MarkPackageDirty();
+		PackagesToSave.AddUnique(Instance->GetOutermost());
+	}
+
+	const double EditSeconds = FPlatformTime::Seconds() - PhaseStart;
+
+	// Save phase: every edited package in one call
+	PhaseStart = FPlatformTime::Seconds();
+
+	const bool bSaved = PackagesToSave.Num() == 0 || UEditorLoadingAndSavingUtils::SavePackages(PackagesToSave, false);
+
+	const double SaveSeconds = FPlatformTime::Seconds() - PhaseStart;
+
+	UE_LOG(LogLayeredMaterialApply, Display, TEXT("Applied %d material instances (%d failed)"), InstancePaths.Num() - NumFailed, NumFailed);
+	UE_LOG(LogLayeredMaterialApply, Display, TEXT("Load: %.2fs (%d objects), Edit: %.2fs, Save: %.2fs (%d packages)"),
+		LoadSeconds, PathsToLoad.Num(), EditSeconds, SaveSeconds, PackagesToSave.Num());
+
+	if (!bSaved)
+	{
+		UE_LOG(LogLayeredMaterialApply, Error, TEXT("Some packages could not be saved"));
+	}
+	return (NumFailed == 0 && bSaved) ? 0 : 1;
+}
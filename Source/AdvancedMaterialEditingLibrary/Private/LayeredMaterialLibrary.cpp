@@ -1,8 +1,41 @@
 #include "LayeredMaterialLibrary.h"
 #include "MaterialEditor/MaterialEditorInstanceConstant.h"
+#include "HAL/FileManager.h"
+#include "Materials/Material.h"
+#include "Materials/MaterialCachedData.h"
+#include "Materials/MaterialFunctionInterface.h"
+#include "MaterialShared.h"
+#include "FileHelpers.h"
+#include "Hash/CityHash.h"
+#include "Misc/PackageName.h"
+#include "Serialization/ObjectWriter.h"
+#include "UObject/UObjectGlobals.h"
+#include "UObject/UObjectHash.h"
+#include "ProfilingDebugging/CpuProfilerTrace.h"
+#include "Stats/Stats.h"
+
+// Shows up in "stat LayeredMaterialLibrary" and, through the trace markers, in Unreal Insights
+DECLARE_STATS_GROUP(TEXT("LayeredMaterialLibrary"), STATGROUP_LayeredMaterialLibrary, STATCAT_Advanced);
+DECLARE_CYCLE_STAT(TEXT("Get Parameter"), STAT_LayeredMaterial_GetParameter, STATGROUP_LayeredMaterialLibrary);
+DECLARE_CYCLE_STAT(TEXT("Set Parameter"), STAT_LayeredMaterial_SetParameter, STATGROUP_LayeredMaterialLibrary);
+DECLARE_CYCLE_STAT(TEXT("Apply Parameter Batch"), STAT_LayeredMaterial_ApplyBatch, STATGROUP_LayeredMaterialLibrary);
+DECLARE_CYCLE_STAT(TEXT("Enumerate Parameters"), STAT_LayeredMaterial_Enumerate, STATGROUP_LayeredMaterialLibrary);
+DECLARE_CYCLE_STAT(TEXT("Layer Stack"), STAT_LayeredMaterial_Layers, STATGROUP_LayeredMaterialLibrary);
+DECLARE_CYCLE_STAT(TEXT("Load Objects"), STAT_LayeredMaterial_LoadObjects, STATGROUP_LayeredMaterialLibrary);
+DECLARE_CYCLE_STAT(TEXT("Save Packages"), STAT_LayeredMaterial_SavePackages, STATGROUP_LayeredMaterialLibrary);
+DECLARE_CYCLE_STAT(TEXT("Refresh Editor Instance"), STAT_LayeredMaterial_Refresh, STATGROUP_LayeredMaterialLibrary);
+DECLARE_CYCLE_STAT(TEXT("Set Material Layers"), STAT_LayeredMaterial_SetMaterialLayers, STATGROUP_LayeredMaterialLibrary);
+DECLARE_DWORD_ACCUMULATOR_STAT(TEXT("Refreshes"), STAT_LayeredMaterial_RefreshCount, STATGROUP_LayeredMaterialLibrary);
+DECLARE_DWORD_ACCUMULATOR_STAT(TEXT("Set Material Layers Calls"), STAT_LayeredMaterial_SetMaterialLayersCount, STATGROUP_LayeredMaterialLibrary);
+DECLARE_DWORD_ACCUMULATOR_STAT(TEXT("Deferred Updates"), STAT_LayeredMaterial_DeferredCount, STATGROUP_LayeredMaterialLibrary);
+
+#define LAYERED_MATERIAL_SCOPE(Name, Stat) TRACE_CPUPROFILER_EVENT_SCOPE(Name); SCOPE_CYCLE_COUNTER(Stat)
 
 void RefreshEditorMaterialInstance(UMaterialInstanceConstant* Instance)
 {
+	LAYERED_MATERIAL_SCOPE(RefreshEditorMaterialInstance, STAT_LayeredMaterial_Refresh);
+	INC_DWORD_STAT(STAT_LayeredMaterial_RefreshCount);
+
 	// This is necessary as the editor caches the materialLayerParameters.
 	// > The material instance editor window puts MaterialLayersParameters into our StaticParameters, if we don't do this, our settings could get wiped out on first launch of the material editor.
 	// > If there's ever a cleaner and more isolated way of populating MaterialLayersParameters, we should do that instead.
@@ -10,13 +43,145 @@ void RefreshEditorMaterialInstance(UMaterialInstanceConstant* Instance)
 	MaterialEditorInstance->SetSourceInstance(Instance);
 }
 
+/*
+ Edited package tracking. The first edit of an instance records its package, so SaveEditedPackages saves only what
+ the library touched. With change detection enabled, it also records a hash of the package state before the edit,
+ so SaveEditedPackages can tell when the edits ended up restoring the loaded state. Hashing serializes the whole
+ package, so it is off unless a caller asks for it.
+*/
+
+struct FTrackedPackage
+{
+	uint64 LoadedStateHash = 0;
+	bool bHasLoadedStateHash = false;
+	bool bWasDirty = false;
+};
+
+static TMap<TWeakObjectPtr<UPackage>, FTrackedPackage> GTrackedPackages;
+static bool GDetectUnchangedPackages = false;
+
+// Hashes every saved object of the package, so edits to subobjects (e.g. the editor only data) count too
+static uint64 HashPackageState(UPackage* Package)
+{
+	TArray<UObject*> Objects;
+	GetObjectsWithPackage(Package, Objects, true, RF_ClassDefaultObject | RF_Transient);
+	// The object order of a package is not stable, so hash in path order
+	Objects.Sort([](const UObject& A, const UObject& B) { return A.GetPathName() < B.GetPathName(); });
+
+	uint64 Hash = 0;
+	TArray<uint8> Bytes;
+	for (UObject* Object : Objects)
+	{
+		Bytes.Reset();
+		FObjectWriter Writer(Object, Bytes);
+		Hash = CityHash64WithSeed(reinterpret_cast<const char*>(Bytes.GetData()), Bytes.Num(), Hash);
+	}
+	return Hash;
+}
+
+// Called by every editing function once it knows the edit will happen, before it changes the instance
+static void TrackPackageEdit(UObject* Asset)
+{
+	if (!Asset)
+	{
+		return;
+	}
+
+	UPackage* Package = Asset->GetOutermost();
+	if (Package != GetTransientPackage() && !GTrackedPackages.Contains(Package))
+	{
+		FTrackedPackage& Tracked = GTrackedPackages.Add(Package);
+		Tracked.bWasDirty = Package->IsDirty();
+		if (GDetectUnchangedPackages)
+		{
+			Tracked.LoadedStateHash = HashPackageState(Package);
+			Tracked.bHasLoadedStateHash = true;
+		}
+	}
+}
+
+/*
+ Deferred updates. Between BeginDeferredMaterialUpdates and EndDeferredMaterialUpdates, edited instances are only
+ recorded and layer stack changes are kept aside, then everything is updated once when the outermost scope ends.
+*/
+
+struct FDeferredMaterialUpdates
+{
+	int32 Depth = 0;
+	int32 DeferredEdits = 0;
+	TSet<TWeakObjectPtr<UMaterialInstance>> Instances;
+	TMap<TWeakObjectPtr<UMaterialInstance>, FMaterialLayersFunctions> PendingLayers;
+	// Instances whose static switches changed, their static permutation is updated at the end of the scope
+	TSet<TWeakObjectPtr<UMaterialInstance>> PermutationInstances;
+};
+
+static FDeferredMaterialUpdates GDeferredUpdates;
+
+static void DeferInstanceUpdate(UMaterialInstance* Instance)
+{
+	INC_DWORD_STAT(STAT_LayeredMaterial_DeferredCount);
+	GDeferredUpdates.Instances.Add(Instance);
+	++GDeferredUpdates.DeferredEdits;
+}
+
+// Called by every parameter setter after its edit
+static void NotifyInstanceEdited(UMaterialInstanceConstant* Instance)
+{
+	if (GDeferredUpdates.Depth > 0)
+	{
+		DeferInstanceUpdate(Instance);
+		return;
+	}
+	RefreshEditorMaterialInstance(Instance);
+}
+
+// Called instead of NotifyInstanceEdited after an edit that changes the static permutation of the instance
+static void NotifyStaticPermutationEdited(UMaterialInstanceConstant* Instance)
+{
+	if (GDeferredUpdates.Depth > 0)
+	{
+		GDeferredUpdates.PermutationInstances.Add(Instance);
+	}
+	NotifyInstanceEdited(Instance);
+}
+
+// Reads the layer stack, including a change still waiting for the end of a deferred scope
+static bool ReadMaterialLayers(UMaterialInstance* Instance, FMaterialLayersFunctions& OutLayers)
+{
+	if (GDeferredUpdates.Depth > 0)
+	{
+		if (const FMaterialLayersFunctions* Pending = GDeferredUpdates.PendingLayers.Find(Instance))
+		{
+			OutLayers = *Pending;
+			return true;
+		}
+	}
+	return Instance->GetMaterialLayers(OutLayers);
+}
+
+// Every layer stack change goes through here so its cost shows up on its own
+static void CommitMaterialLayers(UMaterialInstance* Instance, const FMaterialLayersFunctions& Layers)
+{
+	TrackPackageEdit(Instance);
+	if (GDeferredUpdates.Depth > 0)
+	{
+		GDeferredUpdates.PendingLayers.Add(Instance, Layers);
+		DeferInstanceUpdate(Instance);
+		return;
+	}
+
+	LAYERED_MATERIAL_SCOPE(SetMaterialLayers, STAT_LayeredMaterial_SetMaterialLayers);
+	INC_DWORD_STAT(STAT_LayeredMaterial_SetMaterialLayersCount);
+	Instance->SetMaterialLayers(Layers);
+}
 
 int32 ULayeredMaterialLibrary::GetLayerCount(UMaterialInstance* Instance)
 {
+	LAYERED_MATERIAL_SCOPE(ULayeredMaterialLibrary::GetLayerCount, STAT_LayeredMaterial_Layers);
 	int32 result = 0;
 	if (Instance) {
 		FMaterialLayersFunctions layers;
-		Instance->GetMaterialLayers(layers);
+		ReadMaterialLayers(Instance, layers);
 
 		return layers.Layers.Num();
 	}
@@ -25,11 +190,12 @@ int32 ULayeredMaterialLibrary::GetLayerCount(UMaterialInstance* Instance)
 
 bool ULayeredMaterialLibrary::AddMaterialLayer(UMaterialInstance* Instance)
 {
+	LAYERED_MATERIAL_SCOPE(ULayeredMaterialLibrary::AddMaterialLayer, STAT_LayeredMaterial_Layers);
 	FMaterialLayersFunctions layers;
-	if (Instance->GetMaterialLayers(layers))
+	if (ReadMaterialLayers(Instance, layers))
 	{
 		layers.AppendBlendedLayer();
-		Instance->SetMaterialLayers(layers);
+		CommitMaterialLayers(Instance, layers);
 
 		return true;
 	}
@@ -39,6 +205,7 @@ bool ULayeredMaterialLibrary::AddMaterialLayer(UMaterialInstance* Instance)
 
 bool ULayeredMaterialLibrary::IsLayeredMaterial(UMaterialInstance* Instance)
 {
+	LAYERED_MATERIAL_SCOPE(ULayeredMaterialLibrary::IsLayeredMaterial, STAT_LayeredMaterial_Layers);
 	FMaterialLayersFunctions layers;
 	return Instance->GetMaterialLayers(layers);
 }
@@ -50,12 +217,13 @@ bool ULayeredMaterialLibrary::IsLayeredMaterial(UMaterialInstance* Instance)
 
 bool ULayeredMaterialLibrary::AssignLayerMaterial(UMaterialInstance* Instance, int32 LayerIndex, UMaterialFunctionInterface* NewLayerFunction)
 {
+	LAYERED_MATERIAL_SCOPE(ULayeredMaterialLibrary::AssignLayerMaterial, STAT_LayeredMaterial_Layers);
 	FMaterialLayersFunctions layers;
-	if (Instance->GetMaterialLayers(layers)) {
+	if (ReadMaterialLayers(Instance, layers)) {
 		layers.Layers[LayerIndex] = NewLayerFunction;
 		layers.UnlinkLayerFromParent(LayerIndex);
 
-		Instance->SetMaterialLayers(layers);
+		CommitMaterialLayers(Instance, layers);
 
 		return true;
 	}
@@ -65,14 +233,15 @@ bool ULayeredMaterialLibrary::AssignLayerMaterial(UMaterialInstance* Instance, i
 
 bool ULayeredMaterialLibrary::AssignBlendLayer(UMaterialInstance* Instance, int32 LayerIndex, UMaterialFunctionInterface* NewBlendLayerFunction)
 {
+	LAYERED_MATERIAL_SCOPE(ULayeredMaterialLibrary::AssignBlendLayer, STAT_LayeredMaterial_Layers);
 	FMaterialLayersFunctions layers;
-	if (Instance->GetMaterialLayers(layers)) {
+	if (ReadMaterialLayers(Instance, layers)) {
 		int32 adjustedIndex = LayerIndex - 1; // To match the editor UI, but blend indices are offset by 1
 
 		layers.Blends[adjustedIndex] = NewBlendLayerFunction;
 		layers.UnlinkLayerFromParent(adjustedIndex + 1); // Blend indices are offset by 1, no blend for base layer
 
-		Instance->SetMaterialLayers(layers);
+		CommitMaterialLayers(Instance, layers);
 
 		return true;
 	}
@@ -80,12 +249,308 @@ bool ULayeredMaterialLibrary::AssignBlendLayer(UMaterialInstance* Instance, int3
 	return false;
 }
 
+bool ULayeredMaterialLibrary::SetLayerStack(UMaterialInstance* Instance, const TArray<UMaterialFunctionInterface*>& Layers, const TArray<UMaterialFunctionInterface*>& Blends, const TArray<bool>& LinkToParent)
+{
+	LAYERED_MATERIAL_SCOPE(ULayeredMaterialLibrary::SetLayerStack, STAT_LayeredMaterial_Layers);
+	FMaterialLayersFunctions layers;
+	if (!Instance || Layers.Num() == 0 || !ReadMaterialLayers(Instance, layers))
+	{
+		return false;
+	}
+
+	bool bChanged = false;
+	while (layers.Layers.Num() < Layers.Num())
+	{
+		layers.AppendBlendedLayer();
+		bChanged = true;
+	}
+	while (layers.Layers.Num() > Layers.Num())
+	{
+		layers.RemoveBlendedLayerAt(layers.Layers.Num() - 1);
+		bChanged = true;
+	}
+
+	for (int32 LayerIndex = 0; LayerIndex < Layers.Num(); ++LayerIndex)
+	{
+		if (LinkToParent.IsValidIndex(LayerIndex) && LinkToParent[LayerIndex])
+		{
+			continue;
+		}
+
+		// Same bookkeeping as AssignLayerMaterial and AssignBlendLayer, but only for the layers that actually change
+		bool bLayerChanged = false;
+		if (Layers[LayerIndex] && layers.Layers[LayerIndex] != Layers[LayerIndex])
+		{
+			layers.Layers[LayerIndex] = Layers[LayerIndex];
+			bLayerChanged = true;
+		}
+
+		const int32 BlendIndex = LayerIndex - 1; // No blend for the base layer
+		if (Blends.IsValidIndex(BlendIndex) && Blends[BlendIndex] && layers.Blends[BlendIndex] != Blends[BlendIndex])
+		{
+			layers.Blends[BlendIndex] = Blends[BlendIndex];
+			bLayerChanged = true;
+		}
+
+		if (bLayerChanged)
+		{
+			layers.UnlinkLayerFromParent(LayerIndex);
+			bChanged = true;
+		}
+	}
+
+	// An unchanged stack is not committed, so its static permutation stays valid
+	if (bChanged)
+	{
+		CommitMaterialLayers(Instance, layers);
+	}
+
+	return true;
+}
+
+FLayeredMaterialStack ULayeredMaterialLibrary::GetLayerStack(UMaterialInstance* Instance)
+{
+	LAYERED_MATERIAL_SCOPE(ULayeredMaterialLibrary::GetLayerStack, STAT_LayeredMaterial_Layers);
+	FLayeredMaterialStack Stack;
+	FMaterialLayersFunctions layers;
+	if (Instance && ReadMaterialLayers(Instance, layers))
+	{
+		Stack.Layers = layers.Layers;
+		Stack.Blends = layers.Blends;
+	}
+	return Stack;
+}
+
+/*
+ Parameter enumeration. The engine already knows the association and layer index of every parameter,
+ so we ask for them once instead of probing every name against every layer.
+*/
+
+static FLayeredParameterInfo MakeLayeredParameterInfo(const FMaterialParameterInfo& ParameterInfo, ELayeredParameterType Type)
+{
+	FLayeredParameterInfo Info;
+	Info.ParameterName = ParameterInfo.Name;
+	Info.Association = ParameterInfo.Association;
+	Info.ParameterType = Type;
+
+	switch (ParameterInfo.Association)
+	{
+	case EMaterialParameterAssociation::LayerParameter:
+		Info.LayerIndex = ParameterInfo.Index;
+		break;
+	case EMaterialParameterAssociation::BlendParameter:
+		Info.LayerIndex = ParameterInfo.Index + 1; // Same offset as AssignBlendLayer
+		break;
+	default:
+		Info.LayerIndex = 0;
+		break;
+	}
+	return Info;
+}
+
+static ELayeredParameterType GetLayeredParameterType(EMaterialParameterType Type, const FMaterialParameterMetadata& Metadata)
+{
+	switch (Type)
+	{
+	case EMaterialParameterType::Scalar:
+		return ELayeredParameterType::Scalar;
+	case EMaterialParameterType::Vector:
+		return Metadata.bUsedAsChannelMask ? ELayeredParameterType::ChannelMask : ELayeredParameterType::Vector;
+	case EMaterialParameterType::Texture:
+		return ELayeredParameterType::Texture;
+	default:
+		return ELayeredParameterType::StaticSwitch;
+	}
+}
+
+static const EMaterialParameterType EnumeratedParameterTypes[] = {
+	EMaterialParameterType::Scalar,
+	EMaterialParameterType::Vector,
+	EMaterialParameterType::Texture,
+	EMaterialParameterType::StaticSwitch
+};
+
+// Adds the parameters of a layer or blend function, with the association and index they have once it is assigned
+static void AppendFunctionParameters(UMaterialFunctionInterface* Function, EMaterialParameterAssociation Association, int32 Index, EMaterialParameterType Type, TMap<FMaterialParameterInfo, FMaterialParameterMetadata>& OutParameters)
+{
+	if (!Function)
+	{
+		return;
+	}
+
+	TMap<FMaterialParameterInfo, FMaterialParameterMetadata> FunctionParameters;
+	Function->GetCachedExpressionData().GetAllParametersOfType(Type, FunctionParameters);
+	for (const TPair<FMaterialParameterInfo, FMaterialParameterMetadata>& Parameter : FunctionParameters)
+	{
+		OutParameters.Add(FMaterialParameterInfo(Parameter.Key.Name, Association, Index), Parameter.Value);
+	}
+}
+
+// Like GetAllParametersOfType, but a layer stack change still waiting for the end of a deferred scope is taken into account: layer and blend parameters then come from the pending functions
+static void GetParametersOfType(UMaterialInstance* Instance, EMaterialParameterType Type, TMap<FMaterialParameterInfo, FMaterialParameterMetadata>& OutParameters)
+{
+	Instance->GetAllParametersOfType(Type, OutParameters);
+
+	const FMaterialLayersFunctions* Pending = GDeferredUpdates.Depth > 0 ? GDeferredUpdates.PendingLayers.Find(Instance) : nullptr;
+	if (!Pending)
+	{
+		return;
+	}
+
+	for (auto It = OutParameters.CreateIterator(); It; ++It)
+	{
+		if (It->Key.Association != EMaterialParameterAssociation::GlobalParameter)
+		{
+			It.RemoveCurrent();
+		}
+	}
+	for (int32 LayerIndex = 0; LayerIndex < Pending->Layers.Num(); ++LayerIndex)
+	{
+		AppendFunctionParameters(Pending->Layers[LayerIndex], EMaterialParameterAssociation::LayerParameter, LayerIndex, Type, OutParameters);
+	}
+	for (int32 BlendIndex = 0; BlendIndex < Pending->Blends.Num(); ++BlendIndex)
+	{
+		AppendFunctionParameters(Pending->Blends[BlendIndex], EMaterialParameterAssociation::BlendParameter, BlendIndex, Type, OutParameters);
+	}
+}
+
+TArray<FLayeredParameterInfo> ULayeredMaterialLibrary::GetLayeredParameterInfos(UMaterialInstance* Instance)
+{
+	LAYERED_MATERIAL_SCOPE(ULayeredMaterialLibrary::GetLayeredParameterInfos, STAT_LayeredMaterial_Enumerate);
+	TArray<FLayeredParameterInfo> Infos;
+	if (Instance)
+	{
+		for (EMaterialParameterType Type : EnumeratedParameterTypes)
+		{
+			TMap<FMaterialParameterInfo, FMaterialParameterMetadata> Parameters;
+			GetParametersOfType(Instance, Type, Parameters);
+
+			for (const TPair<FMaterialParameterInfo, FMaterialParameterMetadata>& Parameter : Parameters)
+			{
+				Infos.Add(MakeLayeredParameterInfo(Parameter.Key, GetLayeredParameterType(Type, Parameter.Value)));
+			}
+		}
+	}
+	return Infos;
+}
+
+// Path of a texture reference, read from the object handle so a texture that is not loaded yet stays unloaded
+static FString GetTexturePath(const TObjectPtr<UTexture>& Texture)
+{
+	return Texture ? Texture.GetPathName() : FString();
+}
+
+FLayeredParameterValues ULayeredMaterialLibrary::GetAllLayeredParameterValues(UMaterialInstance* Instance, bool bLoadTextures)
+{
+	LAYERED_MATERIAL_SCOPE(ULayeredMaterialLibrary::GetAllLayeredParameterValues, STAT_LayeredMaterial_Enumerate);
+	FLayeredParameterValues Values;
+	if (!Instance)
+	{
+		return Values;
+	}
+
+	// Texture paths come from the override data of the instance where it has one, and from the inherited value otherwise
+	TMap<FMaterialParameterInfo, FString> OverriddenTexturePaths;
+	for (const FTextureParameterValue& Override : Instance->TextureParameterValues)
+	{
+		OverriddenTexturePaths.Add(Override.ParameterInfo, GetTexturePath(Override.ParameterValue));
+	}
+
+	for (EMaterialParameterType Type : EnumeratedParameterTypes)
+	{
+		TMap<FMaterialParameterInfo, FMaterialParameterMetadata> Parameters;
+		Instance->GetAllParametersOfType(Type, Parameters);
+
+		for (const TPair<FMaterialParameterInfo, FMaterialParameterMetadata>& Parameter : Parameters)
+		{
+			const ELayeredParameterType LayeredType = GetLayeredParameterType(Type, Parameter.Value);
+			const FLayeredParameterInfo Info = MakeLayeredParameterInfo(Parameter.Key, LayeredType);
+			const FMaterialParameterValue& Value = Parameter.Value.Value;
+
+			switch (LayeredType)
+			{
+			case ELayeredParameterType::Scalar:
+				Values.ScalarInfos.Add(Info);
+				Values.ScalarValues.Add(Value.AsScalar());
+				break;
+			case ELayeredParameterType::Vector:
+				Values.VectorInfos.Add(Info);
+				Values.VectorValues.Add(Value.AsLinearColor());
+				break;
+			case ELayeredParameterType::ChannelMask:
+				Values.ChannelMaskInfos.Add(Info);
+				Values.ChannelMaskValues.Add(Value.AsLinearColor());
+				break;
+			case ELayeredParameterType::Texture:
+				Values.TextureInfos.Add(Info);
+				if (const FString* OverriddenPath = OverriddenTexturePaths.Find(Parameter.Key))
+				{
+					Values.TexturePaths.Add(*OverriddenPath);
+				}
+				else
+				{
+					Values.TexturePaths.Add(GetTexturePath(Value.Texture));
+				}
+				if (bLoadTextures)
+				{
+					Values.TextureValues.Add(Value.AsTextureObject());
+				}
+				break;
+			case ELayeredParameterType::StaticSwitch:
+				Values.StaticSwitchInfos.Add(Info);
+				Values.StaticSwitchValues.Add(Value.AsStaticSwitch());
+				break;
+			}
+		}
+	}
+	return Values;
+}
+
+static void AppendSchemaKey(FString& Key, const UObject* Object, const FGuid& StateId)
+{
+	Key += Object ? Object->GetPathName() : TEXT("None");
+	Key += TEXT("@");
+	Key += StateId.ToString();
+	Key += TEXT(";");
+}
+
+FString ULayeredMaterialLibrary::GetParameterSchemaKey(UMaterialInstance* Instance)
+{
+	LAYERED_MATERIAL_SCOPE(ULayeredMaterialLibrary::GetParameterSchemaKey, STAT_LayeredMaterial_Enumerate);
+	FString Key;
+	UMaterial* BaseMaterial = Instance ? Instance->GetMaterial() : nullptr;
+	if (!BaseMaterial)
+	{
+		return Key;
+	}
+
+	// Parameter names, types and associations only depend on the base material and the assigned functions, not on the instance chain in between
+	AppendSchemaKey(Key, BaseMaterial, BaseMaterial->StateId);
+
+	FMaterialLayersFunctions layers;
+	if (ReadMaterialLayers(Instance, layers))
+	{
+		Key += TEXT("|Layers:");
+		for (UMaterialFunctionInterface* Layer : layers.Layers)
+		{
+			AppendSchemaKey(Key, Layer, Layer ? Layer->StateId : FGuid());
+		}
+		Key += TEXT("|Blends:");
+		for (UMaterialFunctionInterface* Blend : layers.Blends)
+		{
+			AppendSchemaKey(Key, Blend, Blend ? Blend->StateId : FGuid());
+		}
+	}
+	return Key;
+}
+
 /*
  The following functions are for Layer Parameters.
 */
 
 float ULayeredMaterialLibrary::GetLayeredMaterialScalarParameterValue(UMaterialInstance* Instance, FName ParameterName, int32 LayerIndex)
 {
+	LAYERED_MATERIAL_SCOPE(ULayeredMaterialLibrary::GetLayeredMaterialScalarParameterValue, STAT_LayeredMaterial_GetParameter);
 	float Result = 0.f;
 	if (Instance)
 	{
@@ -96,10 +561,12 @@ float ULayeredMaterialLibrary::GetLayeredMaterialScalarParameterValue(UMaterialI
 
 bool ULayeredMaterialLibrary::SetLayeredMaterialScalarParameterValue(UMaterialInstanceConstant* Instance, FName ParameterName, int32 LayerIndex, float Value)
 {
+	LAYERED_MATERIAL_SCOPE(ULayeredMaterialLibrary::SetLayeredMaterialScalarParameterValue, STAT_LayeredMaterial_SetParameter);
 	if (Instance)
 	{
+		TrackPackageEdit(Instance);
 		Instance->SetScalarParameterValueEditorOnly(FMaterialParameterInfo(ParameterName, EMaterialParameterAssociation::LayerParameter, LayerIndex), Value);
-		RefreshEditorMaterialInstance(Instance);
+		NotifyInstanceEdited(Instance);
 		return true;
 	}
 	return false;
@@ -107,6 +574,7 @@ bool ULayeredMaterialLibrary::SetLayeredMaterialScalarParameterValue(UMaterialIn
 
 FLinearColor ULayeredMaterialLibrary::GetLayeredMaterialVectorParameterValue(UMaterialInstance* Instance, FName ParameterName, int32 LayerIndex)
 {
+	LAYERED_MATERIAL_SCOPE(ULayeredMaterialLibrary::GetLayeredMaterialVectorParameterValue, STAT_LayeredMaterial_GetParameter);
     FLinearColor Result = FLinearColor(0, 0, 0, 0);
     if (Instance)
     {
@@ -117,10 +585,12 @@ FLinearColor ULayeredMaterialLibrary::GetLayeredMaterialVectorParameterValue(UMa
 
 bool ULayeredMaterialLibrary::SetLayeredMaterialVectorParameterValue(UMaterialInstanceConstant* Instance, FName ParameterName, int32 LayerIndex, FLinearColor Value)
 {
+	LAYERED_MATERIAL_SCOPE(ULayeredMaterialLibrary::SetLayeredMaterialVectorParameterValue, STAT_LayeredMaterial_SetParameter);
     if (Instance)
     {
+        TrackPackageEdit(Instance);
         Instance->SetVectorParameterValueEditorOnly(FMaterialParameterInfo(ParameterName, EMaterialParameterAssociation::LayerParameter, LayerIndex), Value);
-        RefreshEditorMaterialInstance(Instance);
+        NotifyInstanceEdited(Instance);
         return true;
     }
     return false;
@@ -128,6 +598,7 @@ bool ULayeredMaterialLibrary::SetLayeredMaterialVectorParameterValue(UMaterialIn
 
 bool ULayeredMaterialLibrary::GetLayeredMaterialStaticSwitchParameterValue(UMaterialInstance* Instance, FName ParameterName, int32 LayerIndex)
 {
+	LAYERED_MATERIAL_SCOPE(ULayeredMaterialLibrary::GetLayeredMaterialStaticSwitchParameterValue, STAT_LayeredMaterial_GetParameter);
 	bool bResult = false;
 	if (Instance)
 	{
@@ -139,10 +610,12 @@ bool ULayeredMaterialLibrary::GetLayeredMaterialStaticSwitchParameterValue(UMate
 
 bool ULayeredMaterialLibrary::SetLayeredMaterialStaticSwitchParameterValue(UMaterialInstanceConstant* Instance, FName ParameterName, int32 LayerIndex, bool Value)
 {
+	LAYERED_MATERIAL_SCOPE(ULayeredMaterialLibrary::SetLayeredMaterialStaticSwitchParameterValue, STAT_LayeredMaterial_SetParameter);
 	if (Instance)
 	{
+		TrackPackageEdit(Instance);
 		Instance->SetStaticSwitchParameterValueEditorOnly(FMaterialParameterInfo(ParameterName, EMaterialParameterAssociation::LayerParameter, LayerIndex), Value);
-		RefreshEditorMaterialInstance(Instance);
+		NotifyStaticPermutationEdited(Instance);
 		return true;
 	}
 	return false;
@@ -150,6 +623,7 @@ bool ULayeredMaterialLibrary::SetLayeredMaterialStaticSwitchParameterValue(UMate
 
 UTexture* ULayeredMaterialLibrary::GetLayeredMaterialTextureParameterValue(UMaterialInstance* Instance, FName ParameterName, int32 LayerIndex)
 {
+	LAYERED_MATERIAL_SCOPE(ULayeredMaterialLibrary::GetLayeredMaterialTextureParameterValue, STAT_LayeredMaterial_GetParameter);
 	UTexture* Result = nullptr;
 	if (Instance)
 	{
@@ -160,10 +634,12 @@ UTexture* ULayeredMaterialLibrary::GetLayeredMaterialTextureParameterValue(UMate
 
 bool ULayeredMaterialLibrary::SetLayeredMaterialTextureParameterValue(UMaterialInstanceConstant* Instance, FName ParameterName, int32 LayerIndex, UTexture* Value)
 {
+	LAYERED_MATERIAL_SCOPE(ULayeredMaterialLibrary::SetLayeredMaterialTextureParameterValue, STAT_LayeredMaterial_SetParameter);
 	if (Instance)
 	{
+		TrackPackageEdit(Instance);
 		Instance->SetTextureParameterValueEditorOnly(FMaterialParameterInfo(ParameterName, EMaterialParameterAssociation::LayerParameter, LayerIndex), Value);
-		RefreshEditorMaterialInstance(Instance);
+		NotifyInstanceEdited(Instance);
 
 		return true;
 	}
@@ -172,6 +648,7 @@ bool ULayeredMaterialLibrary::SetLayeredMaterialTextureParameterValue(UMaterialI
 
 FVector4 ULayeredMaterialLibrary::GetLayeredMaterialChannelMaskParameterValue(UMaterialInstance* Instance, FName ParameterName, int32 LayerIndex)
 {
+	LAYERED_MATERIAL_SCOPE(ULayeredMaterialLibrary::GetLayeredMaterialChannelMaskParameterValue, STAT_LayeredMaterial_GetParameter);
     FLinearColor Result = FLinearColor(0, 0, 0, 0);
     if (Instance)
     {
@@ -182,11 +659,13 @@ FVector4 ULayeredMaterialLibrary::GetLayeredMaterialChannelMaskParameterValue(UM
 
 bool ULayeredMaterialLibrary::SetLayeredMaterialChannelMaskParameterValue(UMaterialInstanceConstant* Instance, FName ParameterName, int32 LayerIndex, FVector4 Value)
 {
+	LAYERED_MATERIAL_SCOPE(ULayeredMaterialLibrary::SetLayeredMaterialChannelMaskParameterValue, STAT_LayeredMaterial_SetParameter);
     if (Instance)
     {
+        TrackPackageEdit(Instance);
         FLinearColor Color(Value.X, Value.Y, Value.Z, Value.W);
         Instance->SetVectorParameterValueEditorOnly(FMaterialParameterInfo(ParameterName, EMaterialParameterAssociation::LayerParameter, LayerIndex), Color);
-        RefreshEditorMaterialInstance(Instance);
+        NotifyInstanceEdited(Instance);
         return true;
     }
     return false;
@@ -198,6 +677,7 @@ bool ULayeredMaterialLibrary::SetLayeredMaterialChannelMaskParameterValue(UMater
 
 float ULayeredMaterialLibrary::GetLayeredMaterialBlendScalarParameterValue(UMaterialInstance* Instance, FName ParameterName, int32 LayerIndex)
 {
+	LAYERED_MATERIAL_SCOPE(ULayeredMaterialLibrary::GetLayeredMaterialBlendScalarParameterValue, STAT_LayeredMaterial_GetParameter);
     float Result = 0.f;
     if (Instance)
     {
@@ -209,11 +689,13 @@ float ULayeredMaterialLibrary::GetLayeredMaterialBlendScalarParameterValue(UMate
 
 bool ULayeredMaterialLibrary::SetLayeredMaterialBlendScalarParameterValue(UMaterialInstanceConstant* Instance, FName ParameterName, int32 LayerIndex, float Value)
 {
+	LAYERED_MATERIAL_SCOPE(ULayeredMaterialLibrary::SetLayeredMaterialBlendScalarParameterValue, STAT_LayeredMaterial_SetParameter);
     if (Instance)
     {
+        TrackPackageEdit(Instance);
 		int32 adjustedIndex = LayerIndex - 1; // Same offset as AssignBlendLayer
         Instance->SetScalarParameterValueEditorOnly(FMaterialParameterInfo(ParameterName, EMaterialParameterAssociation::BlendParameter, adjustedIndex), Value);
-        RefreshEditorMaterialInstance(Instance);
+        NotifyInstanceEdited(Instance);
         return true;
     }
     return false;
@@ -221,6 +703,7 @@ bool ULayeredMaterialLibrary::SetLayeredMaterialBlendScalarParameterValue(UMater
 
 FLinearColor ULayeredMaterialLibrary::GetLayeredMaterialBlendVectorParameterValue(UMaterialInstance* Instance, FName ParameterName, int32 LayerIndex)
 {
+	LAYERED_MATERIAL_SCOPE(ULayeredMaterialLibrary::GetLayeredMaterialBlendVectorParameterValue, STAT_LayeredMaterial_GetParameter);
     FLinearColor Result = FLinearColor(0, 0, 0, 0);
     if (Instance)
     {
@@ -232,11 +715,13 @@ FLinearColor ULayeredMaterialLibrary::GetLayeredMaterialBlendVectorParameterValu
 
 bool ULayeredMaterialLibrary::SetLayeredMaterialBlendVectorParameterValue(UMaterialInstanceConstant* Instance, FName ParameterName, int32 LayerIndex, FLinearColor Value)
 {
+	LAYERED_MATERIAL_SCOPE(ULayeredMaterialLibrary::SetLayeredMaterialBlendVectorParameterValue, STAT_LayeredMaterial_SetParameter);
     if (Instance)
     {
+        TrackPackageEdit(Instance);
         int32 adjustedIndex = LayerIndex - 1;  // Same offset as AssignBlendLayer
         Instance->SetVectorParameterValueEditorOnly(FMaterialParameterInfo(ParameterName, EMaterialParameterAssociation::BlendParameter, adjustedIndex), Value);
-        RefreshEditorMaterialInstance(Instance);
+        NotifyInstanceEdited(Instance);
         return true;
     }
     return false;
@@ -244,6 +729,7 @@ bool ULayeredMaterialLibrary::SetLayeredMaterialBlendVectorParameterValue(UMater
 
 bool ULayeredMaterialLibrary::GetLayeredMaterialBlendStaticSwitchParameterValue(UMaterialInstance* Instance, FName ParameterName, int32 LayerIndex)
 {
+	LAYERED_MATERIAL_SCOPE(ULayeredMaterialLibrary::GetLayeredMaterialBlendStaticSwitchParameterValue, STAT_LayeredMaterial_GetParameter);
     bool bResult = false;
     if (Instance)
     {
@@ -256,11 +742,13 @@ bool ULayeredMaterialLibrary::GetLayeredMaterialBlendStaticSwitchParameterValue(
 
 bool ULayeredMaterialLibrary::SetLayeredMaterialBlendStaticSwitchParameterValue(UMaterialInstanceConstant* Instance, FName ParameterName, int32 LayerIndex, bool Value)
 {
+	LAYERED_MATERIAL_SCOPE(ULayeredMaterialLibrary::SetLayeredMaterialBlendStaticSwitchParameterValue, STAT_LayeredMaterial_SetParameter);
     if (Instance)
     {
+        TrackPackageEdit(Instance);
 		int32 adjustedIndex = LayerIndex - 1; // Same offset as AssignBlendLayer
         Instance->SetStaticSwitchParameterValueEditorOnly(FMaterialParameterInfo(ParameterName, EMaterialParameterAssociation::BlendParameter, adjustedIndex), Value);
-        RefreshEditorMaterialInstance(Instance);
+        NotifyStaticPermutationEdited(Instance);
         return true;
     }
     return false;
@@ -268,6 +756,7 @@ bool ULayeredMaterialLibrary::SetLayeredMaterialBlendStaticSwitchParameterValue(
 
 UTexture* ULayeredMaterialLibrary::GetLayeredMaterialBlendTextureParameterValue(UMaterialInstance* Instance, FName ParameterName, int32 LayerIndex)
 {
+	LAYERED_MATERIAL_SCOPE(ULayeredMaterialLibrary::GetLayeredMaterialBlendTextureParameterValue, STAT_LayeredMaterial_GetParameter);
     UTexture* Result = nullptr;
     if (Instance)
     {
@@ -279,11 +768,13 @@ UTexture* ULayeredMaterialLibrary::GetLayeredMaterialBlendTextureParameterValue(
 
 bool ULayeredMaterialLibrary::SetLayeredMaterialBlendTextureParameterValue(UMaterialInstanceConstant* Instance, FName ParameterName, int32 LayerIndex, UTexture* Value)
 {
+	LAYERED_MATERIAL_SCOPE(ULayeredMaterialLibrary::SetLayeredMaterialBlendTextureParameterValue, STAT_LayeredMaterial_SetParameter);
     if (Instance)
     {
+        TrackPackageEdit(Instance);
 		int32 adjustedIndex = LayerIndex - 1; // Same offset as AssignBlendLayer
         Instance->SetTextureParameterValueEditorOnly(FMaterialParameterInfo(ParameterName, EMaterialParameterAssociation::BlendParameter, adjustedIndex), Value);
-        RefreshEditorMaterialInstance(Instance);
+        NotifyInstanceEdited(Instance);
         return true;
     }
     return false;
@@ -291,6 +782,7 @@ bool ULayeredMaterialLibrary::SetLayeredMaterialBlendTextureParameterValue(UMate
 
 FVector4 ULayeredMaterialLibrary::GetLayeredMaterialBlendChannelMaskParameterValue(UMaterialInstance* Instance, FName ParameterName, int32 LayerIndex)
 {
+	LAYERED_MATERIAL_SCOPE(ULayeredMaterialLibrary::GetLayeredMaterialBlendChannelMaskParameterValue, STAT_LayeredMaterial_GetParameter);
     FLinearColor Result = FLinearColor(0, 0, 0, 0);
     if (Instance)
     {
@@ -302,12 +794,14 @@ FVector4 ULayeredMaterialLibrary::GetLayeredMaterialBlendChannelMaskParameterVal
 
 bool ULayeredMaterialLibrary::SetLayeredMaterialBlendChannelMaskParameterValue(UMaterialInstanceConstant* Instance, FName ParameterName, int32 LayerIndex, FVector4 Value)
 {
+	LAYERED_MATERIAL_SCOPE(ULayeredMaterialLibrary::SetLayeredMaterialBlendChannelMaskParameterValue, STAT_LayeredMaterial_SetParameter);
     if (Instance)
     {
+        TrackPackageEdit(Instance);
         int32 adjustedIndex = LayerIndex - 1;
         FLinearColor Color(Value.X, Value.Y, Value.Z, Value.W);
         Instance->SetVectorParameterValueEditorOnly(FMaterialParameterInfo(ParameterName, EMaterialParameterAssociation::BlendParameter, adjustedIndex), Color);
-        RefreshEditorMaterialInstance(Instance);
+        NotifyInstanceEdited(Instance);
         return true;
     }
     return false;
@@ -318,6 +812,7 @@ bool ULayeredMaterialLibrary::SetLayeredMaterialBlendChannelMaskParameterValue(U
 
 FVector4 ULayeredMaterialLibrary::GetMaterialInstanceChannelMaskParameterValue(UMaterialInstance* Instance, FName ParameterName, EMaterialParameterAssociation Association)
 {
+	LAYERED_MATERIAL_SCOPE(ULayeredMaterialLibrary::GetMaterialInstanceChannelMaskParameterValue, STAT_LayeredMaterial_GetParameter);
     FLinearColor Result = FLinearColor(0, 0, 0, 0);
     if (Instance)
     {
@@ -328,12 +823,320 @@ FVector4 ULayeredMaterialLibrary::GetMaterialInstanceChannelMaskParameterValue(U
 
 bool ULayeredMaterialLibrary::SetMaterialInstanceChannelMaskParameterValue(UMaterialInstanceConstant* Instance, FName ParameterName, FVector4 Value, EMaterialParameterAssociation Association)
 {
+	LAYERED_MATERIAL_SCOPE(ULayeredMaterialLibrary::SetMaterialInstanceChannelMaskParameterValue, STAT_LayeredMaterial_SetParameter);
     if (Instance)
     {
+        TrackPackageEdit(Instance);
         FLinearColor Color(Value.X, Value.Y, Value.Z, Value.W);
         Instance->SetVectorParameterValueEditorOnly(FMaterialParameterInfo(ParameterName, Association), Color);
-        RefreshEditorMaterialInstance(Instance);
+        NotifyInstanceEdited(Instance);
         return true;
     }
     return false;
 }
+
+
+/*
+ Asset loading
+*/
+
+static FSoftObjectPath MakeObjectPath(const FString& ObjectPath)
+{
+	// Accept package paths like unreal.load_object does, /Game/Foo resolves to /Game/Foo.Foo
+	if (!ObjectPath.Contains(TEXT(".")))
+	{
+		return FSoftObjectPath(ObjectPath + TEXT(".") + FPackageName::GetShortName(ObjectPath));
+	}
+	return FSoftObjectPath(ObjectPath);
+}
+
+TArray<UObject*> ULayeredMaterialLibrary::LoadObjectsByPath(const TArray<FString>& ObjectPaths)
+{
+	LAYERED_MATERIAL_SCOPE(ULayeredMaterialLibrary::LoadObjectsByPath, STAT_LayeredMaterial_LoadObjects);
+	TArray<FSoftObjectPath> SoftPaths;
+	SoftPaths.Reserve(ObjectPaths.Num());
+
+	// Request every missing package first so the loader can overlap their IO, then wait once
+	TSet<FString> RequestedPackages;
+	for (const FString& ObjectPath : ObjectPaths)
+	{
+		const FSoftObjectPath& SoftPath = SoftPaths.Add_GetRef(MakeObjectPath(ObjectPath));
+		const FString PackageName = SoftPath.GetLongPackageName();
+		if (!PackageName.IsEmpty() && !SoftPath.ResolveObject() && !RequestedPackages.Contains(PackageName))
+		{
+			RequestedPackages.Add(PackageName);
+			LoadPackageAsync(PackageName);
+		}
+	}
+
+	if (RequestedPackages.Num() > 0)
+	{
+		FlushAsyncLoading();
+	}
+
+	TArray<UObject*> Objects;
+	Objects.Reserve(SoftPaths.Num());
+	for (const FSoftObjectPath& SoftPath : SoftPaths)
+	{
+		Objects.Add(SoftPath.TryLoad());
+	}
+	return Objects;
+}
+
+TArray<FString> ULayeredMaterialLibrary::GetPackageFingerprints(const TArray<FString>& PackageNames)
+{
+	LAYERED_MATERIAL_SCOPE(ULayeredMaterialLibrary::GetPackageFingerprints, STAT_LayeredMaterial_LoadObjects);
+	TArray<FString> Fingerprints;
+	Fingerprints.Reserve(PackageNames.Num());
+
+	IFileManager& FileManager = IFileManager::Get();
+	for (const FString& PackageName : PackageNames)
+	{
+		// Only the file stat is read, so this stays cheap for packages that are not loaded
+		FString Filename;
+		FFileStatData StatData;
+		if (FPackageName::DoesPackageExist(PackageName, &Filename))
+		{
+			StatData = FileManager.GetStatData(*Filename);
+		}
+
+		if (StatData.bIsValid)
+		{
+			Fingerprints.Add(FString::Printf(TEXT("%lld-%lld"), StatData.FileSize, StatData.ModificationTime.GetTicks()));
+		}
+		else
+		{
+			Fingerprints.Add(FString());
+		}
+	}
+	return Fingerprints;
+}
+
+/*
+ The following functions are for batched edits, so many parameters can be set with a single editor refresh.
+*/
+
+static FMaterialParameterInfo MakeEditParameterInfo(const FLayeredParameterEdit& Edit)
+{
+	switch (Edit.Association)
+	{
+	case EMaterialParameterAssociation::GlobalParameter:
+		return FMaterialParameterInfo(Edit.ParameterName);
+	case EMaterialParameterAssociation::BlendParameter:
+		return FMaterialParameterInfo(Edit.ParameterName, EMaterialParameterAssociation::BlendParameter, Edit.LayerIndex - 1); // Same offset as AssignBlendLayer
+	default:
+		return FMaterialParameterInfo(Edit.ParameterName, EMaterialParameterAssociation::LayerParameter, Edit.LayerIndex);
+	}
+}
+
+static void ApplyParameterEdit(UMaterialInstanceConstant* Instance, const FLayeredParameterEdit& Edit)
+{
+	const FMaterialParameterInfo ParameterInfo = MakeEditParameterInfo(Edit);
+
+	switch (Edit.ParameterType)
+	{
+	case ELayeredParameterType::Scalar:
+		Instance->SetScalarParameterValueEditorOnly(ParameterInfo, Edit.ScalarValue);
+		break;
+	case ELayeredParameterType::Vector:
+	case ELayeredParameterType::ChannelMask:
+		Instance->SetVectorParameterValueEditorOnly(ParameterInfo, Edit.VectorValue);
+		break;
+	case ELayeredParameterType::StaticSwitch:
+		Instance->SetStaticSwitchParameterValueEditorOnly(ParameterInfo, Edit.bStaticSwitchValue);
+		break;
+	case ELayeredParameterType::Texture:
+		Instance->SetTextureParameterValueEditorOnly(ParameterInfo, Edit.TextureValue);
+		break;
+	}
+}
+
+int32 ULayeredMaterialLibrary::ApplyLayeredParameterBatch(UMaterialInstanceConstant* Instance, const TArray<FLayeredParameterEdit>& Edits)
+{
+	LAYERED_MATERIAL_SCOPE(ULayeredMaterialLibrary::ApplyLayeredParameterBatch, STAT_LayeredMaterial_ApplyBatch);
+	if (!Instance || Edits.Num() == 0)
+	{
+		return 0;
+	}
+	TrackPackageEdit(Instance);
+
+	bool bStaticSwitchEdited = false;
+	for (const FLayeredParameterEdit& Edit : Edits)
+	{
+		ApplyParameterEdit(Instance, Edit);
+		bStaticSwitchEdited |= Edit.ParameterType == ELayeredParameterType::StaticSwitch;
+	}
+
+	// One refresh for the whole batch instead of one per edit
+	if (bStaticSwitchEdited)
+	{
+		NotifyStaticPermutationEdited(Instance);
+	}
+	else
+	{
+		NotifyInstanceEdited(Instance);
+	}
+	return Edits.Num();
+}
+
+void ULayeredMaterialLibrary::BeginDeferredMaterialUpdates()
+{
+	++GDeferredUpdates.Depth;
+}
+
+FLayeredMaterialUpdateReport ULayeredMaterialLibrary::EndDeferredMaterialUpdates()
+{
+	LAYERED_MATERIAL_SCOPE(ULayeredMaterialLibrary::EndDeferredMaterialUpdates, STAT_LayeredMaterial_Refresh);
+	FLayeredMaterialUpdateReport Report;
+	if (GDeferredUpdates.Depth == 0 || --GDeferredUpdates.Depth > 0)
+	{
+		return Report;
+	}
+
+	FDeferredMaterialUpdates Updates = MoveTemp(GDeferredUpdates);
+	GDeferredUpdates = FDeferredMaterialUpdates();
+	Report.DeferredEdits = Updates.DeferredEdits;
+
+	TSet<UMaterial*> ParentMaterials;
+	{
+		// Components using any of the instances have their render state recreated once, when the context is destroyed
+		FMaterialUpdateContext UpdateContext;
+		for (const TWeakObjectPtr<UMaterialInstance>& WeakInstance : Updates.Instances)
+		{
+			UMaterialInstance* Instance = WeakInstance.Get();
+			if (!Instance)
+			{
+				continue;
+			}
+
+			const FMaterialLayersFunctions* Layers = Updates.PendingLayers.Find(WeakInstance);
+			if (Layers || Updates.PermutationInstances.Contains(WeakInstance))
+			{
+				// What UMaterialInstance::SetMaterialLayers does, sharing the update context. Layer stack and static
+				// switch changes made during the scope are committed together, with one permutation update.
+				LAYERED_MATERIAL_SCOPE(SetMaterialLayers, STAT_LayeredMaterial_SetMaterialLayers);
+				INC_DWORD_STAT(STAT_LayeredMaterial_SetMaterialLayersCount);
+				FStaticParameterSet StaticParameters;
+				Instance->GetStaticParameterValues(StaticParameters);
+				if (Layers)
+				{
+					StaticParameters.bHasMaterialLayers = true;
+					StaticParameters.MaterialLayers = Layers->GetRuntime();
+					StaticParameters.EditorOnly.MaterialLayers = Layers->EditorOnly;
+				}
+				Instance->UpdateStaticPermutation(StaticParameters, &UpdateContext);
+				++Report.PermutationUpdates;
+			}
+			else
+			{
+				UpdateContext.AddMaterialInstance(Instance);
+			}
+
+			if (UMaterialInstanceConstant* Constant = Cast<UMaterialInstanceConstant>(Instance))
+			{
+				RefreshEditorMaterialInstance(Constant);
+			}
+			ParentMaterials.Add(Instance->GetMaterial());
+			++Report.InstancesUpdated;
+		}
+	}
+
+	Report.ParentMaterialsUpdated = ParentMaterials.Num();
+	Report.AvoidedUpdates = FMath::Max(Report.DeferredEdits - Report.InstancesUpdated, 0);
+	return Report;
+}
+
+bool ULayeredMaterialLibrary::IsDeferringMaterialUpdates()
+{
+	return GDeferredUpdates.Depth > 0;
+}
+
+void ULayeredMaterialLibrary::TrackEditedAssets(const TArray<UObject*>& Assets)
+{
+	for (UObject* Asset : Assets)
+	{
+		TrackPackageEdit(Asset);
+	}
+}
+
+TArray<FString> ULayeredMaterialLibrary::GetEditedPackages()
+{
+	TArray<FString> PackageNames;
+	for (const TPair<TWeakObjectPtr<UPackage>, FTrackedPackage>& Tracked : GTrackedPackages)
+	{
+		if (UPackage* Package = Tracked.Key.Get())
+		{
+			PackageNames.Add(Package->GetName());
+		}
+	}
+	return PackageNames;
+}
+
+FLayeredPackageSaveReport ULayeredMaterialLibrary::SaveEditedPackages(const TArray<FString>& PackageNames, bool bSkipUnchanged)
+{
+	LAYERED_MATERIAL_SCOPE(ULayeredMaterialLibrary::SaveEditedPackages, STAT_LayeredMaterial_SavePackages);
+	FLayeredPackageSaveReport Report;
+	const double StartTime = FPlatformTime::Seconds();
+
+	TArray<UPackage*> PackagesToSave;
+	for (const FString& PackageName : PackageNames)
+	{
+		UPackage* Package = FindPackage(nullptr, *PackageName);
+		const FTrackedPackage* Tracked = Package ? GTrackedPackages.Find(Package) : nullptr;
+		if (!Tracked)
+		{
+			continue;
+		}
+
+		// A package that was clean and exists on disk does not need saving if the edits restored its loaded state
+		if (bSkipUnchanged && Tracked->bHasLoadedStateHash && !Tracked->bWasDirty && FPackageName::DoesPackageExist(PackageName)
+			&& HashPackageState(Package) == Tracked->LoadedStateHash)
+		{
+			Package->SetDirtyFlag(false);
+			GTrackedPackages.Remove(Package);
+			++Report.Skipped;
+			continue;
+		}
+		PackagesToSave.Add(Package);
+	}
+
+	if (PackagesToSave.Num() > 0)
+	{
+		// One bulk save instead of one save call per asset
+		const bool bSaved = UEditorLoadingAndSavingUtils::SavePackages(PackagesToSave, false);
+		for (UPackage* Package : PackagesToSave)
+		{
+			const FString Filename = FPackageName::LongPackageNameToFilename(Package->GetName(), FPackageName::GetAssetPackageExtension());
+			const int64 FileSize = IFileManager::Get().FileSize(*Filename);
+			if (bSaved && !Package->IsDirty() && FileSize >= 0)
+			{
+				// Failed packages stay tracked, so they can be saved again
+				GTrackedPackages.Remove(Package);
+				++Report.Saved;
+				Report.BytesWritten += FileSize;
+			}
+			else
+			{
+				++Report.Failed;
+			}
+		}
+	}
+
+	Report.Seconds = FPlatformTime::Seconds() - StartTime;
+	return Report;
+}
+
+void ULayeredMaterialLibrary::ClearEditedPackages()
+{
+	GTrackedPackages.Reset();
+}
+
+void ULayeredMaterialLibrary::SetEditedPackageChangeDetection(bool bEnabled)
+{
+	GDetectUnchangedPackages = bEnabled;
+}
+
+bool ULayeredMaterialLibrary::IsEditedPackageChangeDetectionEnabled()
+{
+	return GDetectUnchangedPackages;
+}
@@ -12,4 +12,8 @@ public:
 	/** IModuleInterface implementation */
 	virtual void StartupModule() override;
 	virtual void ShutdownModule() override;
+
+private:
+	/** Adds the layer stack tags to material instances as they are saved */
+	FDelegateHandle LayerStackTagsHandle;
 };
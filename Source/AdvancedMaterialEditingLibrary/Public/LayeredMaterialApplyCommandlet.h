@@ -0,0 +1,25 @@
+#pragma once
+
+#include "CoreMinimal.h"
+#include "Commandlets/Commandlet.h"
+#include "LayeredMaterialApplyCommandlet.generated.h"
+
+/**
+ * Applies a JSON manifest of layer stacks and parameter values to material instances without the editor UI, then saves them.
+ *
+ * Usage: UnrealEditor-Cmd <Project> -run=LayeredMaterialApply -manifest=<Manifest.json>
+ *
+ * The manifest maps material instance paths to material dictionaries in the format of get_full_material_as_dict, with plain
+ * JSON values: numbers for scalars, booleans for static switches, [r, g, b, a] arrays for vectors and channel masks, and asset
+ * paths for textures. This is the same format read by load_manifest in the Python library.
+ */
+UCLASS()
+class ULayeredMaterialApplyCommandlet : public UCommandlet
+{
+	GENERATED_BODY()
+
+public:
+	ULayeredMaterialApplyCommandlet();
+
+	virtual int32 Main(const FString& Params) override;
+};
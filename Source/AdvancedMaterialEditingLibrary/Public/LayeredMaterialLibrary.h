@@ -3,6 +3,7 @@
 #include "CoreMinimal.h"
 #include "Kismet/BlueprintFunctionLibrary.h"
 #include "Materials/MaterialInstanceConstant.h"
+#include "LayeredMaterialTypes.h"
 #include "LayeredMaterialLibrary.generated.h"
 
 /**
@@ -13,6 +14,7 @@ class ADVANCEDMATERIALEDITINGLIBRARY_API ULayeredMaterialLibrary : public UBluep
 {
 	GENERATED_BODY()
 
+public:
 	UFUNCTION(BlueprintCallable, Category = "AdvancedMaterialEditingLibrary")
 		static int32 GetLayerCount(UMaterialInstance* Instance);
 
@@ -27,6 +29,25 @@ class ADVANCEDMATERIALEDITINGLIBRARY_API ULayeredMaterialLibrary : public UBluep
 	UFUNCTION(BlueprintCallable, Category = "AdvancedMaterialEditingLibrary")
 		static bool AssignBlendLayer(UMaterialInstance* Instance, int32 LayerIndex, UMaterialFunctionInterface* NewBlendLayerFunction);
 
+	UFUNCTION(BlueprintCallable, Category = "AdvancedMaterialEditingLibrary")
+		static FLayeredMaterialStack GetLayerStack(UMaterialInstance* Instance);
+
+	// Sets the whole layer stack with a single SetMaterialLayers call, resizing it to Layers.Num() layers. Blends[i] belongs to layer i + 1. Null entries keep the function currently assigned, and layers flagged in LinkToParent are left linked to the parent. Returns false if the material is not layered.
+	UFUNCTION(BlueprintCallable, Category = "AdvancedMaterialEditingLibrary")
+		static bool SetLayerStack(UMaterialInstance* Instance, const TArray<UMaterialFunctionInterface*>& Layers, const TArray<UMaterialFunctionInterface*>& Blends, const TArray<bool>& LinkToParent);
+
+	// Lists every parameter of the instance with its association and layer index, without reading values. Follows a layer stack set during a deferred scope.
+	UFUNCTION(BlueprintCallable, Category = "AdvancedMaterialEditingLibrary")
+		static TArray<FLayeredParameterInfo> GetLayeredParameterInfos(UMaterialInstance* Instance);
+
+	// Reads every parameter value of the instance in one call, tagged with association and layer index. Without bLoadTextures, textures are only reported as TexturePaths and TextureValues stays empty.
+	UFUNCTION(BlueprintCallable, Category = "AdvancedMaterialEditingLibrary")
+		static FLayeredParameterValues GetAllLayeredParameterValues(UMaterialInstance* Instance, bool bLoadTextures = true);
+
+	// Identifies the parameter layout of the instance: its base material and layer and blend functions with their state ids. Changes when any of them is recompiled or a layer is reassigned, including during a deferred scope.
+	UFUNCTION(BlueprintCallable, Category = "AdvancedMaterialEditingLibrary")
+		static FString GetParameterSchemaKey(UMaterialInstance* Instance);
+
 	// Parameter value getters and setters for material layers
 
 	UFUNCTION(BlueprintCallable, Category = "AdvancedMaterialEditingLibrary")
@@ -87,4 +108,58 @@ class ADVANCEDMATERIALEDITINGLIBRARY_API ULayeredMaterialLibrary : public UBluep
 	// For non-layered materials
 	UFUNCTION(BlueprintCallable, Category = "AdvancedMaterialEditingLibrary")
 		static bool SetMaterialInstanceChannelMaskParameterValue(UMaterialInstanceConstant* Instance, FName ParameterName, FVector4 Value, EMaterialParameterAssociation Association = EMaterialParameterAssociation::GlobalParameter);
+
+	// Asset loading
+
+	// Loads every object in one pass, issuing all package loads before waiting on any of them. Accepts package paths (/Game/Foo) or object paths (/Game/Foo.Foo).
+	UFUNCTION(BlueprintCallable, Category = "AdvancedMaterialEditingLibrary")
+		static TArray<UObject*> LoadObjectsByPath(const TArray<FString>& ObjectPaths);
+
+	// Gets a "<size>-<timestamp>" fingerprint of each package file on disk without loading it, or an empty string if the package has no file.
+	UFUNCTION(BlueprintCallable, Category = "AdvancedMaterialEditingLibrary")
+		static TArray<FString> GetPackageFingerprints(const TArray<FString>& PackageNames);
+
+	// Batched edits
+
+	// Applies every edit and refreshes the editor instance once. Returns the number of edits applied.
+	UFUNCTION(BlueprintCallable, Category = "AdvancedMaterialEditingLibrary")
+		static int32 ApplyLayeredParameterBatch(UMaterialInstanceConstant* Instance, const TArray<FLayeredParameterEdit>& Edits);
+
+	// Edited package tracking
+
+	// Records the packages of assets about to be edited outside this library (e.g. global parameters set through UMaterialEditingLibrary), so SaveEditedPackages includes them. Every editing function of this library records its instance itself.
+	UFUNCTION(BlueprintCallable, Category = "AdvancedMaterialEditingLibrary")
+		static void TrackEditedAssets(const TArray<UObject*>& Assets);
+
+	// Gets the names of the packages edited through this library and not saved since
+	UFUNCTION(BlueprintCallable, Category = "AdvancedMaterialEditingLibrary")
+		static TArray<FString> GetEditedPackages();
+
+	// Saves the given edited packages in one bulk save and stops tracking those saved. Packages that fail to save stay tracked. With bSkipUnchanged, packages tracked while change detection was enabled and whose edits restored the state they were loaded with are marked clean instead of saved.
+	UFUNCTION(BlueprintCallable, Category = "AdvancedMaterialEditingLibrary")
+		static FLayeredPackageSaveReport SaveEditedPackages(const TArray<FString>& PackageNames, bool bSkipUnchanged = true);
+
+	// Stops tracking every edited package without saving
+	UFUNCTION(BlueprintCallable, Category = "AdvancedMaterialEditingLibrary")
+		static void ClearEditedPackages();
+
+	// Enables hashing the package of every instance on its first edit, so SaveEditedPackages(bSkipUnchanged) can skip packages whose edits restored their loaded state. Off by default, as each hash serializes the whole package.
+	UFUNCTION(BlueprintCallable, Category = "AdvancedMaterialEditingLibrary")
+		static void SetEditedPackageChangeDetection(bool bEnabled);
+
+	UFUNCTION(BlueprintCallable, Category = "AdvancedMaterialEditingLibrary")
+		static bool IsEditedPackageChangeDetectionEnabled();
+
+	// Deferred updates
+
+	// Starts deferring material updates: edits and layer stack changes are applied to the instances, but their editor refresh and static permutation update wait for the matching EndDeferredMaterialUpdates. Scopes nest.
+	UFUNCTION(BlueprintCallable, Category = "AdvancedMaterialEditingLibrary")
+		static void BeginDeferredMaterialUpdates();
+
+	// Ends a deferred update scope. The outermost scope updates every touched instance once, through a single material update context. Inner scopes return an empty report.
+	UFUNCTION(BlueprintCallable, Category = "AdvancedMaterialEditingLibrary")
+		static FLayeredMaterialUpdateReport EndDeferredMaterialUpdates();
+
+	UFUNCTION(BlueprintCallable, Category = "AdvancedMaterialEditingLibrary")
+		static bool IsDeferringMaterialUpdates();
 };
@@ -0,0 +1,175 @@
+#pragma once
+
+#include "CoreMinimal.h"
+#include "Materials/MaterialInstanceConstant.h"
+#include "LayeredMaterialTypes.generated.h"
+
+/** Kind of value a layered parameter holds, mirrors the getter/setter families of ULayeredMaterialLibrary */
+UENUM(BlueprintType)
+enum class ELayeredParameterType : uint8
+{
+	Scalar,
+	Vector,
+	StaticSwitch,
+	Texture,
+	ChannelMask
+};
+
+/**
+ * A single queued parameter edit, used to apply many edits to an instance with one editor refresh.
+ * LayerIndex follows the same convention as the individual setters (blend indices are offset by 1, ignored for globals).
+ */
+USTRUCT(BlueprintType)
+struct ADVANCEDMATERIALEDITINGLIBRARY_API FLayeredParameterEdit
+{
+	GENERATED_BODY()
+
+	UPROPERTY(EditAnywhere, BlueprintReadWrite, Category = "AdvancedMaterialEditingLibrary")
+		FName ParameterName;
+
+	UPROPERTY(EditAnywhere, BlueprintReadWrite, Category = "AdvancedMaterialEditingLibrary")
+		TEnumAsByte<EMaterialParameterAssociation> Association = EMaterialParameterAssociation::LayerParameter;
+
+	UPROPERTY(EditAnywhere, BlueprintReadWrite, Category = "AdvancedMaterialEditingLibrary")
+		int32 LayerIndex = 0;
+
+	UPROPERTY(EditAnywhere, BlueprintReadWrite, Category = "AdvancedMaterialEditingLibrary")
+		ELayeredParameterType ParameterType = ELayeredParameterType::Scalar;
+
+	UPROPERTY(EditAnywhere, BlueprintReadWrite, Category = "AdvancedMaterialEditingLibrary")
+		float ScalarValue = 0.f;
+
+	// Used for both vector and channel mask edits
+	UPROPERTY(EditAnywhere, BlueprintReadWrite, Category = "AdvancedMaterialEditingLibrary")
+		FLinearColor VectorValue = FLinearColor(0, 0, 0, 0);
+
+	UPROPERTY(EditAnywhere, BlueprintReadWrite, Category = "AdvancedMaterialEditingLibrary")
+		bool bStaticSwitchValue = false;
+
+	UPROPERTY(EditAnywhere, BlueprintReadWrite, Category = "AdvancedMaterialEditingLibrary")
+		TObjectPtr<UTexture> TextureValue = nullptr;
+};
+
+/**
+ * Describes one parameter exposed by a material instance, with its real association and layer.
+ * LayerIndex follows the same convention as the getters and setters (blend indices are offset by 1, 0 for globals).
+ */
+USTRUCT(BlueprintType)
+struct ADVANCEDMATERIALEDITINGLIBRARY_API FLayeredParameterInfo
+{
+	GENERATED_BODY()
+
+	UPROPERTY(EditAnywhere, BlueprintReadWrite, Category = "AdvancedMaterialEditingLibrary")
+		FName ParameterName;
+
+	UPROPERTY(EditAnywhere, BlueprintReadWrite, Category = "AdvancedMaterialEditingLibrary")
+		TEnumAsByte<EMaterialParameterAssociation> Association = EMaterialParameterAssociation::GlobalParameter;
+
+	UPROPERTY(EditAnywhere, BlueprintReadWrite, Category = "AdvancedMaterialEditingLibrary")
+		int32 LayerIndex = 0;
+
+	UPROPERTY(EditAnywhere, BlueprintReadWrite, Category = "AdvancedMaterialEditingLibrary")
+		ELayeredParameterType ParameterType = ELayeredParameterType::Scalar;
+};
+
+/** The layer and blend functions assigned to a layered material instance. Blends[i] belongs to layer i + 1. */
+USTRUCT(BlueprintType)
+struct ADVANCEDMATERIALEDITINGLIBRARY_API FLayeredMaterialStack
+{
+	GENERATED_BODY()
+
+	UPROPERTY(EditAnywhere, BlueprintReadWrite, Category = "AdvancedMaterialEditingLibrary")
+		TArray<TObjectPtr<UMaterialFunctionInterface>> Layers;
+
+	UPROPERTY(EditAnywhere, BlueprintReadWrite, Category = "AdvancedMaterialEditingLibrary")
+		TArray<TObjectPtr<UMaterialFunctionInterface>> Blends;
+};
+
+/**
+ * Every parameter value of a material instance, read in one call.
+ * Each value array runs parallel to the info array of the same type.
+ */
+USTRUCT(BlueprintType)
+struct ADVANCEDMATERIALEDITINGLIBRARY_API FLayeredParameterValues
+{
+	GENERATED_BODY()
+
+	UPROPERTY(EditAnywhere, BlueprintReadWrite, Category = "AdvancedMaterialEditingLibrary")
+		TArray<FLayeredParameterInfo> ScalarInfos;
+	UPROPERTY(EditAnywhere, BlueprintReadWrite, Category = "AdvancedMaterialEditingLibrary")
+		TArray<float> ScalarValues;
+
+	UPROPERTY(EditAnywhere, BlueprintReadWrite, Category = "AdvancedMaterialEditingLibrary")
+		TArray<FLayeredParameterInfo> VectorInfos;
+	UPROPERTY(EditAnywhere, BlueprintReadWrite, Category = "AdvancedMaterialEditingLibrary")
+		TArray<FLinearColor> VectorValues;
+
+	UPROPERTY(EditAnywhere, BlueprintReadWrite, Category = "AdvancedMaterialEditingLibrary")
+		TArray<FLayeredParameterInfo> StaticSwitchInfos;
+	UPROPERTY(EditAnywhere, BlueprintReadWrite, Category = "AdvancedMaterialEditingLibrary")
+		TArray<bool> StaticSwitchValues;
+
+	UPROPERTY(EditAnywhere, BlueprintReadWrite, Category = "AdvancedMaterialEditingLibrary")
+		TArray<FLayeredParameterInfo> TextureInfos;
+	UPROPERTY(EditAnywhere, BlueprintReadWrite, Category = "AdvancedMaterialEditingLibrary")
+		TArray<TObjectPtr<UTexture>> TextureValues;
+	// Soft object paths of the texture values, empty for no texture. Filled even when the textures are not loaded.
+	UPROPERTY(EditAnywhere, BlueprintReadWrite, Category = "AdvancedMaterialEditingLibrary")
+		TArray<FString> TexturePaths;
+
+	UPROPERTY(EditAnywhere, BlueprintReadWrite, Category = "AdvancedMaterialEditingLibrary")
+		TArray<FLayeredParameterInfo> ChannelMaskInfos;
+	UPROPERTY(EditAnywhere, BlueprintReadWrite, Category = "AdvancedMaterialEditingLibrary")
+		TArray<FLinearColor> ChannelMaskValues;
+};
+
+/** What EndDeferredMaterialUpdates flushed. */
+USTRUCT(BlueprintType)
+struct ADVANCEDMATERIALEDITINGLIBRARY_API FLayeredMaterialUpdateReport
+{
+	GENERATED_BODY()
+
+	// Edits and layer stack changes whose update was deferred
+	UPROPERTY(EditAnywhere, BlueprintReadWrite, Category = "AdvancedMaterialEditingLibrary")
+		int32 DeferredEdits = 0;
+
+	// Instances updated when the scope ended, once each
+	UPROPERTY(EditAnywhere, BlueprintReadWrite, Category = "AdvancedMaterialEditingLibrary")
+		int32 InstancesUpdated = 0;
+
+	// Distinct parent materials of the updated instances
+	UPROPERTY(EditAnywhere, BlueprintReadWrite, Category = "AdvancedMaterialEditingLibrary")
+		int32 ParentMaterialsUpdated = 0;
+
+	// Instances whose static permutation was updated, for layer stack or static switch changes
+	UPROPERTY(EditAnywhere, BlueprintReadWrite, Category = "AdvancedMaterialEditingLibrary")
+		int32 PermutationUpdates = 0;
+
+	// Updates (editor refreshes and static permutation updates) that did not happen because edits were coalesced
+	UPROPERTY(EditAnywhere, BlueprintReadWrite, Category = "AdvancedMaterialEditingLibrary")
+		int32 AvoidedUpdates = 0;
+};
+
+/** Outcome of one SaveEditedPackages call. */
+USTRUCT(BlueprintType)
+struct ADVANCEDMATERIALEDITINGLIBRARY_API FLayeredPackageSaveReport
+{
+	GENERATED_BODY()
+
+	UPROPERTY(EditAnywhere, BlueprintReadWrite, Category = "AdvancedMaterialEditingLibrary")
+		int32 Saved = 0;
+
+	// Packages not saved because their edits restored the loaded state
+	UPROPERTY(EditAnywhere, BlueprintReadWrite, Category = "AdvancedMaterialEditingLibrary")
+		int32 Skipped = 0;
+
+	UPROPERTY(EditAnywhere, BlueprintReadWrite, Category = "AdvancedMaterialEditingLibrary")
+		int32 Failed = 0;
+
+	// Size on disk of the saved packages
+	UPROPERTY(EditAnywhere, BlueprintReadWrite, Category = "AdvancedMaterialEditingLibrary")
+		int64 BytesWritten = 0;
+
+	UPROPERTY(EditAnywhere, BlueprintReadWrite, Category = "AdvancedMaterialEditingLibrary")
+		float Seconds = 0.0f;
+};
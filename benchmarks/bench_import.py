@@ -0,0 +1,94 @@
+"""Import-time benchmark for the Python library.
+
+Imports each module in a fresh interpreter where the unreal module is blocked, so the run fails if a module
+needs unreal at import time, and reports the best import time over several runs. Runs anywhere Python does,
+no engine needed:
+
+    python benchmarks/bench_import.py --budget-ms 50
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+CONTENT_PYTHON = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Content', 'Python')
+
+MODULES = [
+    'layered_material_library',
+    'asset_resolver',
+    'material_values',
+    'material_batch_runner',
+    'material_export',
+    'parameter_schema',
+    'columnar_snapshot',
+    'instrumentation',
+    'material_variants',
+    'edit_planner',
+    'material_snapshot',
+    'material_query'
+]
+
+# Run in the child interpreter: a None entry in sys.modules makes any import of unreal raise ImportError
+_IMPORT_SNIPPET = """
+import json, sys, time
+sys.modules['unreal'] = None
+sys.path.insert(0, {path!r})
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'seconds': elapsed, 'numpy': 'numpy' in sys.modules}}))
+"""
+
+
+def measure_import(module: str, runs: int) -> dict:
+    """Import a module in fresh interpreters and keep the fastest run.
+
+    Args:
+        module (str): Name of the module to import
+        runs (int): Number of fresh interpreters to import it in
+
+    Returns:
+        dict: 'seconds' (best import time), 'numpy' (whether numpy was imported) and 'error' (None on success)
+    """
+    best = None
+    for _ in range(runs):
+        completed = subprocess.run(
+            [sys.executable, '-c', _IMPORT_SNIPPET.format(path=CONTENT_PYTHON, module=module)],
+            capture_output=True, text=True
+        )
+        if completed.returncode != 0:
+            return {'seconds': None, 'numpy': False, 'error': completed.stderr.strip().splitlines()[-1]}
+        result = json.loads(completed.stdout)
+        if best is None or result['seconds'] < best['seconds']:
+            best = result
+    best['error'] = None
+    return best
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5, help='Fresh interpreters per module, the best run is kept')
+    parser.add_argument('--budget-ms', type=float, default=50.0, help='Fail if any module takes longer to import')
+    args = parser.parse_args()
+
+    failed = False
+    for module in MODULES:
+        result = measure_import(module, args.runs)
+        if result['error']:
+            print(f"FAIL {module}: {result['error']}")
+            failed = True
+            continue
+
+        milliseconds = result['seconds'] * 1000
+        status = 'ok'
+        if milliseconds > args.budget_ms:
+            status = f'FAIL over {args.budget_ms:.0f} ms budget'
+            failed = True
+        note = ' (imported numpy)' if result['numpy'] else ''
+        print(f"{status:>4} {module}: {milliseconds:.1f} ms{note}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,293 @@
+"""Benchmark suite for the Python library, run against the in-process fake unreal module.
+
+Synthetic layered materials from 1 to 16 layers and 10 to 500 parameters are pushed through the main library
+operations. Each case reports its best wall time, the number of native calls (boundary crossings) it made and
+the number of material instance editor refreshes it caused, and is compared against benchmarks/baseline.json:
+
+    python benchmarks/bench_library.py                      # Compare against the baseline
+    python benchmarks/bench_library.py --check-time         # Also compare wall times
+    python benchmarks/bench_library.py --update-baseline    # Record a new baseline
+
+A case fails when it makes more native calls or refreshes than its baseline. Those counts do not depend on the
+machine. Wall times do, and the value comparisons run through numpy when it is installed, so times are only
+compared with --check-time, on a baseline recorded with the same numpy availability: a case then also fails
+when its time exceeds the baseline by more than --time-tolerance.
+"""
+import argparse
+import importlib.util
+import itertools
+import json
+import os
+import random
+import sys
+import time
+from typing import Callable, Dict, List, NamedTuple, Tuple
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(BENCHMARKS_DIR), 'Content', 'Python'))
+
+import fake_unreal  # noqa: E402
+sys.modules['unreal'] = fake_unreal
+
+from asset_resolver import AssetResolver  # noqa: E402
+from edit_planner import EditPlanner  # noqa: E402
+from layered_material_library import LayeredMaterialLibrary, ParameterSpec  # noqa: E402
+from material_query import find_layered_instances  # noqa: E402
+from material_variants import clone_variants  # noqa: E402
+
+BASELINE_PATH = os.path.join(BENCHMARKS_DIR, 'baseline.json')
+
+# The value comparisons run through numpy when it is installed, which changes their wall times
+HAS_NUMPY = importlib.util.find_spec('numpy') is not None
+
+# Unique suffixes for cases that create assets
+_RUN_IDS = itertools.count()
+
+# (layer count, parameter count) of the synthetic materials
+SIZES = [(1, 10), (4, 100), (8, 250), (16, 500)]
+
+# Share of each parameter type in the synthetic materials
+_TYPE_WEIGHTS = [('scalar', 5), ('vector', 2), ('static_switch', 1), ('texture', 1), ('channel_mask', 1)]
+
+_ASSOCIATIONS = {
+    'global': fake_unreal.MaterialParameterAssociation.GLOBAL_PARAMETER,
+    'layer': fake_unreal.MaterialParameterAssociation.LAYER_PARAMETER,
+    'blend': fake_unreal.MaterialParameterAssociation.BLEND_PARAMETER
+}
+
+
+class CaseResult(NamedTuple):
+    """Measurement of one benchmark case."""
+    seconds: float
+    calls: int
+    refreshes: int
+
+
+def make_material(path: str, layer_count: int, parameter_count: int, seed: int = 0) -> 'fake_unreal.MaterialInstanceConstant':
+    """Build a synthetic layered material instance.
+
+    Roughly a tenth of the parameters are global, the rest are spread over the layers and the blends.
+
+    Args:
+        path (str): Path of the instance
+        layer_count (int): Number of layers
+        parameter_count (int): Total number of parameters
+        seed (int): Seed of the random values
+
+    Returns:
+        fake_unreal.MaterialInstanceConstant: The instance
+    """
+    rng = random.Random(seed)
+    layers = [fake_unreal.register_asset(fake_unreal.MaterialFunctionInterface(f'/Game/Layers/ML_{i}'))
+              for i in range(layer_count)]
+    blends = [fake_unreal.register_asset(fake_unreal.MaterialFunctionInterface(f'/Game/Blends/MLB_{i}'))
+              for i in range(1, layer_count)]
+    textures = [fake_unreal.register_asset(fake_unreal.Texture(f'/Game/Textures/T_{i}')) for i in range(8)]
+    types = [type_name for type_name, weight in _TYPE_WEIGHTS for _ in range(weight)]
+
+    slots = [('global', 0)] + [('layer', i) for i in range(layer_count)] + [('blend', i) for i in range(1, layer_count)]
+    parameters = {}
+    for i in range(parameter_count):
+        domain, layer_index = slots[0] if i % 10 == 0 else slots[1 + i % (len(slots) - 1)]
+        type_name = types[i % len(types)]
+        parameter_type = fake_unreal.LayeredParameterType[type_name.upper()]
+        if type_name == 'scalar':
+            value = rng.random()
+        elif type_name == 'static_switch':
+            value = rng.random() > 0.5
+        elif type_name == 'texture':
+            value = rng.choice(textures)
+        elif type_name == 'channel_mask':
+            value = fake_unreal.LinearColor(*[1.0 if c == i % 4 else 0.0 for c in range(4)])
+        else:
+            value = fake_unreal.LinearColor(rng.random(), rng.random(), rng.random(), 1.0)
+        parameters[(_ASSOCIATIONS[domain], layer_index, f'Param_{i}')] = [parameter_type, value]
+
+    return fake_unreal.MaterialInstanceConstant(path, layers, blends, parameters)
+
+
+def make_blank_material(path: str, source: 'fake_unreal.MaterialInstanceConstant') -> 'fake_unreal.MaterialInstanceConstant':
+    """Build an instance with the same layer count as source but no parameter overrides or assignments."""
+    layer_count = len(source.layers)
+    return fake_unreal.MaterialInstanceConstant(path, [None] * layer_count, [None] * max(0, layer_count - 1))
+
+
+def _cases() -> List[Tuple[str, Callable[[], Callable[[], object]]]]:
+    """Build every case as (name, setup), setup returning the function to time."""
+    cases = []
+    for layer_count, parameter_count in SIZES:
+        size = f'{layer_count}x{parameter_count}'
+        source = make_material(f'/Game/MI_Source_{size}', layer_count, parameter_count)
+        source_dict = LayeredMaterialLibrary.get_full_material_as_dict(source)
+        specs = [
+            ParameterSpec(param_info['name'], param_info['type'], param_info['domain'], param_info['layerIndex'],
+                          param_info['value'])
+            for group in [source_dict['global']] + [
+                layer_data[asset_key] for layer_data in source_dict['layers'].values()
+                for asset_key in ('layerAsset', 'blendAsset') if asset_key in layer_data
+            ]
+            for param_info in group['parameters'].values()
+        ]
+
+        def get_full(source=source):
+            return lambda: LayeredMaterialLibrary.get_full_material_as_dict(source)
+
+        def create_full(source=source, source_dict=source_dict):
+            target = make_blank_material('/Game/MI_Target', source)
+            return lambda: LayeredMaterialLibrary.create_full_material_from_dict(target, source_dict, resolver=AssetResolver())
+
+        def apply_unchanged(source=source, source_dict=source_dict):
+            return lambda: LayeredMaterialLibrary.apply_material_dict(source, source_dict, resolver=AssetResolver())
+
+        def apply_changed(source=source, source_dict=source_dict, size=size, layer_count=layer_count,
+                          parameter_count=parameter_count):
+            target = make_material(f'/Game/MI_Changed_{size}', layer_count, parameter_count, seed=1)
+            return lambda: LayeredMaterialLibrary.apply_material_dict(target, source_dict, resolver=AssetResolver())
+
+        def set_many_if_different(source=source, specs=specs):
+            return lambda: LayeredMaterialLibrary.set_many_parameter_values(source, specs, only_if_different=True,
+                                                                            resolver=AssetResolver())
+
+        def clone(source=source, specs=specs, size=size):
+            # 20 variants of 5 overrides each, into a fresh folder every run
+            variants = [list(specs[i:i + 5]) for i in range(20)]
+            folder = f'/Game/Variants_{size}_{next(_RUN_IDS)}'
+            return lambda: clone_variants(source, variants, folder, save=True)
+
+        def plan_changed(source=source, specs=specs, size=size, layer_count=layer_count,
+                         parameter_count=parameter_count):
+            # Every parameter of the source plus a layer reassignment, planned against a different instance
+            target = make_material(f'/Game/MI_Planned_{size}', layer_count, parameter_count, seed=1)
+            def run():
+                planner = EditPlanner(resolver=AssetResolver())
+                planner.assign_layer(target, layer_count - 1, source.layers[0])
+                planner.set_parameters(target, specs)
+                return planner.execute()
+            return run
+
+        cases += [
+            (f'get_full_material_as_dict[{size}]', get_full),
+            (f'create_full_material_from_dict[{size}]', create_full),
+            (f'apply_material_dict_unchanged[{size}]', apply_unchanged),
+            (f'apply_material_dict_changed[{size}]', apply_changed),
+            (f'set_many_parameter_values_if_different[{size}]', set_many_if_different),
+            (f'clone_variants[{size}]', clone),
+            (f'edit_planner_execute[{size}]', plan_changed)
+        ]
+
+    # A project of 500 instances, a tenth of them using the layer searched for
+    red = fake_unreal.register_asset(fake_unreal.MaterialFunctionMaterialLayer('/Game/Query/ML_Red'))
+    blue = fake_unreal.register_asset(fake_unreal.MaterialFunctionMaterialLayer('/Game/Query/ML_Blue'))
+    for i in range(500):
+        layers = [blue, red] if i % 10 == 0 else [blue, blue]
+        fake_unreal.register_asset(fake_unreal.MaterialInstanceConstant(f'/Game/Query/MI_{i}', layers, [None]))
+
+    def find_registry():
+        return lambda: find_layered_instances(uses_layer=red)
+
+    def find_verified():
+        return lambda: find_layered_instances(uses_layer=red, verify=True)
+
+    cases += [
+        ('find_layered_instances[registry]', find_registry),
+        ('find_layered_instances[verify]', find_verified)
+    ]
+    return cases
+
+
+def run_case(setup: Callable[[], Callable[[], object]], repeat: int) -> CaseResult:
+    """Time a case on fresh state, keeping the best run.
+
+    Args:
+        setup (Callable): Builds the state and returns the function to time
+        repeat (int): Number of timed runs
+
+    Returns:
+        CaseResult: Best wall time, native calls and refreshes of the case
+    """
+    best = None
+    calls = refreshes = 0
+    for _ in range(repeat):
+        operation = setup()
+        fake_unreal.reset_counters()
+        start = time.perf_counter()
+        operation()
+        elapsed = time.perf_counter() - start
+        calls = fake_unreal.total_calls()
+        refreshes = fake_unreal.total_refreshes()
+        best = elapsed if best is None else min(best, elapsed)
+    return CaseResult(best, calls, refreshes)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per case, the best run is kept')
+    parser.add_argument('--latency-us', type=float, default=2.0, help='Cost of every native call, in microseconds')
+    parser.add_argument('--refresh-latency-us', type=float, default=200.0,
+                        help='Cost of every material instance editor refresh, in microseconds')
+    parser.add_argument('--time-tolerance', type=float, default=1.0,
+                        help='Allowed relative slowdown against the baseline, 1.0 allows twice the baseline time')
+    parser.add_argument('--check-time', action='store_true',
+                        help='Also compare wall times, when the baseline was recorded with the same numpy availability')
+    parser.add_argument('--ignore-time', action='store_true', help='Deprecated, times are only compared with --check-time')
+    parser.add_argument('--update-baseline', action='store_true', help='Write the results as the new baseline')
+    parser.add_argument('--filter', default='', help='Only run cases whose name contains this text')
+    args = parser.parse_args()
+
+    fake_unreal.configure(args.latency_us / 1e6, args.refresh_latency_us / 1e6)
+
+    baseline = {}
+    check_time = args.check_time and not args.ignore_time
+    if os.path.exists(BASELINE_PATH) and not args.update_baseline:
+        with open(BASELINE_PATH, 'r', encoding='utf-8') as baseline_file:
+            baseline_data = json.load(baseline_file)
+        baseline = baseline_data['cases']
+        if check_time and baseline_data.get('numpy') != HAS_NUMPY:
+            print(f"Not comparing times: the baseline was recorded {'with' if baseline_data.get('numpy') else 'without'} "
+                  f"numpy, this run is {'with' if HAS_NUMPY else 'without'}")
+            check_time = False
+
+    results: Dict[str, CaseResult] = {}
+    failures = []
+    for name, setup in _cases():
+        if args.filter not in name:
+            continue
+        result = results[name] = run_case(setup, args.repeat)
+
+        status = ''
+        expected = baseline.get(name)
+        if expected:
+            if result.calls > expected['calls']:
+                failures.append(name)
+                status = f"FAIL calls {expected['calls']} -> {result.calls}"
+            elif result.refreshes > expected['refreshes']:
+                failures.append(name)
+                status = f"FAIL refreshes {expected['refreshes']} -> {result.refreshes}"
+            elif check_time and result.seconds > expected['seconds'] * (1 + args.time_tolerance):
+                failures.append(name)
+                status = f"FAIL time {expected['seconds'] * 1000:.2f} ms -> {result.seconds * 1000:.2f} ms"
+            else:
+                status = f"{(result.seconds / expected['seconds'] - 1) * 100:+.0f}% time" if expected['seconds'] else ''
+        print(f"{name:<55} {result.seconds * 1000:9.2f} ms {result.calls:7d} calls {result.refreshes:5d} refreshes  "
+              f"{status}")
+
+    if args.update_baseline:
+        with open(BASELINE_PATH, 'w', encoding='utf-8') as baseline_file:
+            json.dump({
+                'latency_us': args.latency_us,
+                'refresh_latency_us': args.refresh_latency_us,
+                'numpy': HAS_NUMPY,
+                'cases': {name: result._asdict() for name, result in sorted(results.items())}
+            }, baseline_file, indent=2)
+            baseline_file.write('\n')
+        print(f"Baseline written to {BASELINE_PATH}")
+        return 0
+
+    if failures:
+        print(f"{len(failures)} case(s) regressed: {', '.join(failures)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,682 @@
+"""In-process stand-in for the parts of the unreal module used by the Python library.
+
+Install it before importing the library, so benchmarks run on any machine without the engine:
+
+    import sys, fake_unreal
+    sys.modules['unreal'] = fake_unreal
+
+Every native function counts its calls in `calls` and can spin for a configurable latency, which models the
+cost of crossing from Python into the engine. Individual parameter setters also pay a refresh latency, like the
+native setters that refresh the material instance editor data after every edit, while a batch pays it once.
+"""
+import copy
+import time
+from collections import Counter
+from enum import Enum
+from functools import wraps
+from typing import Callable, Dict, List, Optional
+
+# Native call counts, keyed by 'Class.function'
+calls = Counter()
+
+_latency = 0.0
+_refresh_latency = 0.0
+
+
+def configure(latency: float = 0.0, refresh_latency: float = 0.0) -> None:
+    """Set the cost model.
+
+    Args:
+        latency (float): Seconds spent in every native call
+        refresh_latency (float): Extra seconds spent on every material instance editor refresh
+    """
+    global _latency, _refresh_latency
+    _latency = latency
+    _refresh_latency = refresh_latency
+
+
+def reset_counters() -> None:
+    """Clear the call counters."""
+    calls.clear()
+
+
+def total_calls() -> int:
+    """Get the number of native calls since the counters were reset, refreshes excluded."""
+    return sum(count for name, count in calls.items() if name != 'refresh')
+
+
+def total_refreshes() -> int:
+    """Get the number of material instance editor refreshes since the counters were reset."""
+    return calls.get('refresh', 0)
+
+
+def _spin(seconds: float) -> None:
+    # time.sleep is far too coarse for microsecond latencies
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def _native(func: Callable) -> staticmethod:
+    """Count calls to a native function and charge its latency."""
+    name = func.__qualname__
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        calls[name] += 1
+        if _latency:
+            _spin(_latency)
+        return func(*args, **kwargs)
+    return staticmethod(wrapper)
+
+
+def _refresh() -> None:
+    calls['refresh'] += 1
+    if _refresh_latency:
+        _spin(_refresh_latency)
+
+
+# Deferred update scope: nesting depth, deferred edits, the touched instances in order, the ids of those whose
+# static permutation changed, and the layouts of the functions assigned meanwhile, per instance id:
+# (instance, {(association, layer index): function}, parameter keys set since)
+_deferred = {'depth': 0, 'edits': 0, 'instances': {}, 'permutations': set(), 'layouts': {}}
+
+
+def _notify(instance, permutation: bool = False) -> None:
+    """Refresh after an edit, or record the instance while updates are deferred."""
+    if _deferred['depth']:
+        _deferred['edits'] += 1
+        _deferred['instances'][id(instance)] = instance
+        if permutation:
+            _deferred['permutations'].add(id(instance))
+    else:
+        _refresh()
+
+
+# Enums and structs
+
+class LayeredParameterType(Enum):
+    SCALAR = 0
+    VECTOR = 1
+    STATIC_SWITCH = 2
+    TEXTURE = 3
+    CHANNEL_MASK = 4
+
+
+class MaterialParameterAssociation(Enum):
+    LAYER_PARAMETER = 0
+    BLEND_PARAMETER = 1
+    GLOBAL_PARAMETER = 2
+
+
+class LinearColor:
+    def __init__(self, r: float = 0.0, g: float = 0.0, b: float = 0.0, a: float = 0.0):
+        self.r, self.g, self.b, self.a = r, g, b, a
+
+    def __eq__(self, other):
+        return isinstance(other, LinearColor) and (self.r, self.g, self.b, self.a) == (other.r, other.g, other.b, other.a)
+
+    def __repr__(self):
+        return f"LinearColor({self.r}, {self.g}, {self.b}, {self.a})"
+
+
+class Vector4:
+    def __init__(self, x: float = 0.0, y: float = 0.0, z: float = 0.0, w: float = 0.0):
+        self.x, self.y, self.z, self.w = x, y, z, w
+
+    def __repr__(self):
+        return f"Vector4({self.x}, {self.y}, {self.z}, {self.w})"
+
+
+class LayeredParameterInfo:
+    def __init__(self, parameter_name='', association=MaterialParameterAssociation.GLOBAL_PARAMETER, layer_index=0,
+                 parameter_type=LayeredParameterType.SCALAR):
+        self.parameter_name = parameter_name
+        self.association = association
+        self.layer_index = layer_index
+        self.parameter_type = parameter_type
+
+
+class LayeredParameterEdit(LayeredParameterInfo):
+    def __init__(self):
+        super().__init__()
+        self.scalar_value = 0.0
+        self.vector_value = LinearColor()
+        self.static_switch_value = False
+        self.texture_value = None
+
+
+class LayeredParameterValues:
+    def __init__(self):
+        for prefix in ('scalar', 'vector', 'static_switch', 'texture', 'channel_mask'):
+            setattr(self, f'{prefix}_infos', [])
+            setattr(self, f'{prefix}_values', [])
+        self.texture_paths = []
+
+
+class LayeredMaterialUpdateReport:
+    def __init__(self):
+        self.deferred_edits = 0
+        self.instances_updated = 0
+        self.parent_materials_updated = 0
+        self.permutation_updates = 0
+        self.avoided_updates = 0
+
+
+class LayeredPackageSaveReport:
+    def __init__(self):
+        self.saved = 0
+        self.skipped = 0
+        self.failed = 0
+        self.bytes_written = 0
+        self.seconds = 0.0
+
+
+class LayeredMaterialStack:
+    def __init__(self, layers=None, blends=None):
+        self.layers = layers or []
+        self.blends = blends or []
+
+
+# Objects
+
+class Object:
+    def __init__(self, path: str):
+        self.path = path
+
+    def get_path_name(self) -> str:
+        return self.path
+
+    def get_name(self) -> str:
+        return self.path.rsplit('/', 1)[-1].split('.')[0]
+
+    def get_editor_property(self, name: str):
+        return getattr(self, name)
+
+
+class Texture(Object):
+    pass
+
+
+class MaterialFunctionInterface(Object):
+    """A layer or blend function.
+
+    Attributes:
+        parameters (dict): Name -> [LayeredParameterType, default value] of the parameters it exposes, None to leave
+            the parameters of the slots it is assigned to untouched
+    """
+
+    def __init__(self, path: str, parameters=None):
+        super().__init__(path)
+        self.parameters = parameters
+
+
+class MaterialFunctionMaterialLayer(MaterialFunctionInterface):
+    pass
+
+
+class MaterialFunctionMaterialLayerBlend(MaterialFunctionInterface):
+    pass
+
+
+class MaterialInterface(Object):
+    pass
+
+
+class MaterialInstance(MaterialInterface):
+    """A layered material instance.
+
+    Attributes:
+        layers (list[MaterialFunctionInterface]): Assigned layer functions
+        blends (list[MaterialFunctionInterface]): Assigned blend functions, blends[i] belongs to layer i + 1
+        parameters (dict): (association, layer index, name) -> [LayeredParameterType, value]. Layer indices
+            follow the library convention (blend indices offset by 1, 0 for global parameters).
+        parent (MaterialInterface): Parent material
+        saved_with_tags (bool): Whether the asset registry has the layer stack tags of the instance, False models
+            an asset saved before the plugin wrote them
+    """
+
+    def __init__(self, path: str, layers=None, blends=None, parameters=None, parent=None):
+        super().__init__(path)
+        self.layers = list(layers or [])
+        self.blends = list(blends or [])
+        self.parameters = dict(parameters or {})
+        self.parent = parent
+        self.saved_with_tags = True
+
+
+class MaterialInstanceConstant(MaterialInstance):
+    pass
+
+
+# Registered assets, returned by load_object and load_objects_by_path
+assets: Dict[str, Object] = {}
+
+
+def register_asset(asset: Object) -> Object:
+    """Make an asset loadable by path."""
+    assets[asset.path] = asset
+    return asset
+
+
+def load_object(outer, path: str) -> Optional[Object]:
+    calls['load_object'] += 1
+    if _latency:
+        _spin(_latency)
+    return assets.get(path)
+
+
+# Parameter helpers shared by the native libraries
+
+_DEFAULTS = {
+    LayeredParameterType.SCALAR: 0.0,
+    LayeredParameterType.STATIC_SWITCH: False,
+    LayeredParameterType.TEXTURE: None
+}
+
+
+def _get(instance, association, layer_index, name, parameter_type):
+    entry = instance.parameters.get((association, layer_index, name))
+    if entry is None:
+        if parameter_type is LayeredParameterType.CHANNEL_MASK:
+            return Vector4()
+        if parameter_type is LayeredParameterType.VECTOR:
+            return LinearColor()
+        return _DEFAULTS[parameter_type]
+    value = entry[1]
+    if parameter_type is LayeredParameterType.CHANNEL_MASK:
+        return Vector4(value.r, value.g, value.b, value.a)
+    return value
+
+
+# Packages edited through the library: path -> (instance, state before the first edit)
+_tracked = {}
+_change_detection = {'enabled': False}
+
+
+def _state(instance) -> tuple:
+    return list(instance.layers), list(instance.blends), dict(instance.parameters)
+
+
+def _track(instance) -> None:
+    if instance is not None and instance.path not in _tracked:
+        _tracked[instance.path] = (instance, _state(instance) if _change_detection['enabled'] else None)
+
+
+def _apply_layout(instance, slots, written=()) -> None:
+    """Give the slots of newly assigned functions the parameters of those functions, as committing a stack does.
+
+    The values of the previous functions are dropped, only the keys in written (set after the assignment) are kept.
+    """
+    for (association, layer_index), function in slots.items():
+        for key in [key for key in instance.parameters
+                    if key[:2] == (association, layer_index) and key[2] not in function.parameters]:
+            del instance.parameters[key]
+        for name, (parameter_type, value) in function.parameters.items():
+            if (association, layer_index, name) not in written:
+                instance.parameters[(association, layer_index, name)] = [parameter_type, value]
+
+
+def _set(instance, association, layer_index, name, parameter_type, value, refresh=True, track=True):
+    if track:
+        _track(instance)
+    if parameter_type is LayeredParameterType.CHANNEL_MASK and hasattr(value, 'x'):
+        value = LinearColor(value.x, value.y, value.z, value.w)
+    layout = _deferred['layouts'].get(id(instance))
+    if layout is not None:
+        layout[2].add((association, layer_index, name))
+    # Entries are replaced rather than mutated, so a shallow copy of the parameters is a snapshot
+    entry = instance.parameters.get((association, layer_index, name))
+    instance.parameters[(association, layer_index, name)] = [entry[0] if entry else parameter_type, value]
+    if refresh:
+        _notify(instance, parameter_type is LayeredParameterType.STATIC_SWITCH)
+    return True
+
+
+def _layered_accessors(association, parameter_type):
+    def get(instance, parameter_name, layer_index):
+        return _get(instance, association, layer_index, str(parameter_name), parameter_type)
+
+    def set_value(instance, parameter_name, layer_index, value):
+        return _set(instance, association, layer_index, str(parameter_name), parameter_type, value)
+    return get, set_value
+
+
+def _global_accessors(parameter_type, track=True):
+    def get(instance, parameter_name, association=MaterialParameterAssociation.GLOBAL_PARAMETER):
+        return _get(instance, association, 0, str(parameter_name), parameter_type)
+
+    def set_value(instance, parameter_name, value, association=MaterialParameterAssociation.GLOBAL_PARAMETER):
+        return _set(instance, association, 0, str(parameter_name), parameter_type, value, track=track)
+    return get, set_value
+
+
+def _add_accessors(cls, prefix, accessors):
+    """Add counted get_/set_ native functions named after the real ones."""
+    for type_name, (get, set_value) in accessors.items():
+        for verb, func in (('get', get), ('set', set_value)):
+            name = f'{verb}_{prefix}_{type_name}_parameter_value'
+            func.__name__ = name
+            func.__qualname__ = f'{cls.__name__}.{name}'
+            setattr(cls, name, _native(func))
+
+
+_TYPE_NAMES = {
+    'scalar': LayeredParameterType.SCALAR,
+    'vector': LayeredParameterType.VECTOR,
+    'static_switch': LayeredParameterType.STATIC_SWITCH,
+    'texture': LayeredParameterType.TEXTURE,
+    'channel_mask': LayeredParameterType.CHANNEL_MASK
+}
+
+
+class LayeredMaterialLibrary:
+    @_native
+    def get_layer_count(instance) -> int:
+        return len(instance.layers)
+
+    @_native
+    def add_material_layer(instance) -> bool:
+        instance.layers.append(None)
+        instance.blends.append(None)
+        return True
+
+    @_native
+    def is_layered_material(instance) -> bool:
+        return bool(instance.layers)
+
+    @_native
+    def assign_layer_material(instance, layer_index, new_layer_function) -> bool:
+        instance.layers[layer_index] = new_layer_function
+        return True
+
+    @_native
+    def assign_blend_layer(instance, layer_index, new_blend_layer_function) -> bool:
+        instance.blends[layer_index - 1] = new_blend_layer_function
+        return True
+
+    @_native
+    def get_layer_stack(instance) -> LayeredMaterialStack:
+        return LayeredMaterialStack(list(instance.layers), list(instance.blends))
+
+    @_native
+    def set_layer_stack(instance, layers, blends, link_to_parent) -> bool:
+        if not layers:
+            return False
+        _track(instance)
+        del instance.layers[len(layers):]
+        del instance.blends[len(layers) - 1:]
+        instance.layers += [None] * (len(layers) - len(instance.layers))
+        instance.blends += [None] * (len(layers) - 1 - len(instance.blends))
+        slots = {}
+        for layer_index, layer in enumerate(layers):
+            if layer_index < len(link_to_parent) and link_to_parent[layer_index]:
+                continue
+            if layer is not None:
+                if layer is not instance.layers[layer_index] and layer.parameters is not None:
+                    slots[(MaterialParameterAssociation.LAYER_PARAMETER, layer_index)] = layer
+                instance.layers[layer_index] = layer
+            if 0 < layer_index <= len(blends) and blends[layer_index - 1] is not None:
+                blend = blends[layer_index - 1]
+                if blend is not instance.blends[layer_index - 1] and blend.parameters is not None:
+                    slots[(MaterialParameterAssociation.BLEND_PARAMETER, layer_index)] = blend
+                instance.blends[layer_index - 1] = blend
+        if _deferred['depth']:
+            # The parameters only follow the new functions once the stack is committed at the end of the scope
+            _deferred['layouts'].setdefault(id(instance), (instance, {}, set()))[1].update(slots)
+            _notify(instance, permutation=True)
+        else:
+            _apply_layout(instance, slots)
+        return True
+
+    @_native
+    def get_layered_parameter_infos(instance) -> List[LayeredParameterInfo]:
+        # Slots whose function was reassigned during a deferred scope list the parameters of the pending function
+        pending = _deferred['layouts'].get(id(instance), (None, {}, None))[1]
+        infos = [LayeredParameterInfo(name, association, layer_index, entry[0])
+                 for (association, layer_index, name), entry in instance.parameters.items()
+                 if (association, layer_index) not in pending]
+        for (association, layer_index), function in pending.items():
+            infos += [LayeredParameterInfo(name, association, layer_index, entry[0])
+                      for name, entry in function.parameters.items()]
+        return infos
+
+    @_native
+    def get_all_layered_parameter_values(instance, load_textures=True) -> LayeredParameterValues:
+        values = LayeredParameterValues()
+        for (association, layer_index, name), (parameter_type, value) in instance.parameters.items():
+            prefix = parameter_type.name.lower()
+            getattr(values, f'{prefix}_infos').append(LayeredParameterInfo(name, association, layer_index, parameter_type))
+            if parameter_type is LayeredParameterType.TEXTURE:
+                values.texture_paths.append(value.get_path_name() if value else '')
+                if not load_textures:
+                    continue
+            getattr(values, f'{prefix}_values').append(value)
+        return values
+
+    @_native
+    def get_parameter_schema_key(instance) -> str:
+        paths = [asset.get_path_name() if asset else 'None' for asset in instance.layers + instance.blends]
+        return ';'.join(paths)
+
+    @_native
+    def load_objects_by_path(object_paths) -> List[Optional[Object]]:
+        # Assets are registered by package path, object paths resolve to the same asset
+        return [assets.get(path, assets.get(path.split('.')[0])) for path in object_paths]
+
+    @_native
+    def get_package_fingerprints(package_names) -> List[str]:
+        return ['1-1' if name in assets else '' for name in package_names]
+
+    @_native
+    def apply_layered_parameter_batch(instance, edits) -> int:
+        for edit in edits:
+            parameter_type = edit.parameter_type
+            if parameter_type is LayeredParameterType.SCALAR:
+                value = edit.scalar_value
+            elif parameter_type is LayeredParameterType.STATIC_SWITCH:
+                value = edit.static_switch_value
+            elif parameter_type is LayeredParameterType.TEXTURE:
+                value = edit.texture_value
+            else:
+                value = edit.vector_value
+            layer_index = 0 if edit.association is MaterialParameterAssociation.GLOBAL_PARAMETER else edit.layer_index
+            _set(instance, edit.association, layer_index, str(edit.parameter_name), parameter_type, value, refresh=False)
+        if edits:
+            _notify(instance, any(edit.parameter_type is LayeredParameterType.STATIC_SWITCH for edit in edits))
+        return len(edits)
+
+    @_native
+    def begin_deferred_material_updates() -> None:
+        _deferred['depth'] += 1
+
+    @_native
+    def end_deferred_material_updates() -> LayeredMaterialUpdateReport:
+        report = LayeredMaterialUpdateReport()
+        if not _deferred['depth']:
+            return report
+        _deferred['depth'] -= 1
+        if _deferred['depth']:
+            return report
+        instances = list(_deferred['instances'].values())
+        report.deferred_edits = _deferred['edits']
+        report.instances_updated = len(instances)
+        report.parent_materials_updated = len({id(getattr(instance, 'parent', None)) for instance in instances})
+        report.permutation_updates = len(_deferred['permutations'])
+        report.avoided_updates = max(0, report.deferred_edits - report.instances_updated)
+        for instance, slots, written in _deferred['layouts'].values():
+            _apply_layout(instance, slots, written)
+        _deferred['edits'] = 0
+        _deferred['instances'] = {}
+        _deferred['permutations'] = set()
+        _deferred['layouts'] = {}
+        for _ in instances:
+            _refresh()
+        return report
+
+    @_native
+    def is_deferring_material_updates() -> bool:
+        return bool(_deferred['depth'])
+
+    @_native
+    def track_edited_assets(assets_to_track) -> None:
+        for asset in assets_to_track:
+            _track(asset)
+
+    @_native
+    def get_edited_packages() -> List[str]:
+        return list(_tracked)
+
+    @_native
+    def save_edited_packages(package_names, skip_unchanged=True) -> LayeredPackageSaveReport:
+        report = LayeredPackageSaveReport()
+        for name in package_names:
+            if name not in _tracked:
+                continue
+            instance, loaded_state = _tracked.pop(name)
+            if skip_unchanged and loaded_state is not None and _state(instance) == loaded_state:
+                report.skipped += 1
+            else:
+                report.saved += 1
+                report.bytes_written += 1024 + 64 * len(instance.parameters)
+        return report
+
+    @_native
+    def clear_edited_packages() -> None:
+        _tracked.clear()
+
+    @_native
+    def set_edited_package_change_detection(enabled) -> None:
+        _change_detection['enabled'] = enabled
+
+    @_native
+    def is_edited_package_change_detection_enabled() -> bool:
+        return _change_detection['enabled']
+
+
+_add_accessors(LayeredMaterialLibrary, 'layered_material', {
+    type_name: _layered_accessors(MaterialParameterAssociation.LAYER_PARAMETER, parameter_type)
+    for type_name, parameter_type in _TYPE_NAMES.items()
+})
+_add_accessors(LayeredMaterialLibrary, 'layered_material_blend', {
+    type_name: _layered_accessors(MaterialParameterAssociation.BLEND_PARAMETER, parameter_type)
+    for type_name, parameter_type in _TYPE_NAMES.items()
+})
+_add_accessors(LayeredMaterialLibrary, 'material_instance', {
+    'channel_mask': _global_accessors(LayeredParameterType.CHANNEL_MASK)
+})
+
+
+class MaterialEditingLibrary:
+    pass
+
+
+_add_accessors(MaterialEditingLibrary, 'material_instance', {
+    type_name: _global_accessors(parameter_type, track=False)
+    for type_name, parameter_type in _TYPE_NAMES.items()
+    if parameter_type is not LayeredParameterType.CHANNEL_MASK
+})
+
+
+class SystemLibrary:
+    @_native
+    def collect_garbage() -> None:
+        pass
+
+
+class EditorAssetLibrary:
+    @_native
+    def save_loaded_assets(assets_to_save, only_if_is_dirty=True) -> bool:
+        return True
+
+    @_native
+    def does_asset_exist(asset_path) -> bool:
+        return asset_path in assets
+
+    @_native
+    def delete_loaded_asset(asset_to_delete) -> bool:
+        _tracked.pop(asset_to_delete.path, None)
+        return assets.pop(asset_to_delete.path, None) is not None
+
+
+class AssetTools:
+    @_native
+    def duplicate_asset(asset_name, package_path, original_object) -> Optional[Object]:
+        duplicate = copy.copy(original_object)
+        duplicate.path = f'{package_path}/{asset_name}'
+        duplicate.layers = list(original_object.layers)
+        duplicate.blends = list(original_object.blends)
+        duplicate.parameters = dict(original_object.parameters)
+        return register_asset(duplicate)
+
+
+class AssetToolsHelpers:
+    @staticmethod
+    def get_asset_tools() -> AssetTools:
+        return AssetTools()
+
+
+# Asset registry, answered from the registered assets without "loading" them
+
+class AssetRegistryDependencyOptions:
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+class TopLevelAssetPath:
+    def __init__(self, package_name: str = '', asset_name: str = ''):
+        self.package_name = package_name
+        self.asset_name = asset_name
+
+
+class AssetData:
+    def __init__(self, asset: Object):
+        self.package_name = asset.path.split('.')[0]
+        self.asset_name = asset.get_name()
+        self.asset_class_path = TopLevelAssetPath('/Script/Engine', type(asset).__name__)
+        self._tags = {}
+        if isinstance(asset, MaterialInstance):
+            if asset.parent is not None:
+                self._tags['Parent'] = f"/Script/Engine.{type(asset.parent).__name__}'{asset.parent.path}'"
+            if asset.saved_with_tags and asset.layers:
+                self._tags['LayeredMaterialLayers'] = ';'.join(f.get_path_name() if f else '' for f in asset.layers)
+                self._tags['LayeredMaterialBlends'] = ';'.join(f.get_path_name() if f else '' for f in asset.blends)
+
+    def get_tag_value(self, tag_name):
+        return self._tags.get(str(tag_name))
+
+
+def _dependencies(asset: Object) -> set:
+    if not isinstance(asset, MaterialInstance):
+        return set()
+    referenced = asset.layers + asset.blends + [asset.parent] + [
+        value for parameter_type, value in asset.parameters.values() if parameter_type is LayeredParameterType.TEXTURE
+    ]
+    return {dependency.path.split('.')[0] for dependency in referenced if dependency is not None}
+
+
+class AssetRegistry:
+    @_native
+    def get_referencers(package_name, reference_options) -> List[str]:
+        return sorted(asset.path.split('.')[0] for asset in assets.values() if package_name in _dependencies(asset))
+
+    @_native
+    def get_dependencies(package_name, dependency_options) -> List[str]:
+        asset = assets.get(package_name)
+        return sorted(_dependencies(asset)) if asset else []
+
+    @_native
+    def get_assets_by_package_name(package_name, include_only_on_disk_assets=False) -> List[AssetData]:
+        asset = assets.get(package_name)
+        return [AssetData(asset)] if asset else []
+
+    @_native
+    def get_assets_by_class(class_path_name, search_sub_classes=False) -> List[AssetData]:
+        return [AssetData(asset) for asset in assets.values()
+                if type(asset).__name__ == class_path_name.asset_name]
+
+
+class AssetRegistryHelpers:
+    @staticmethod
+    def get_asset_registry() -> AssetRegistry:
+        return AssetRegistry()